@@ -12,12 +12,13 @@ About:      Visualisation of GStreamer video mixing capabilities.
 ################################################################################
 ################################################################################
 
-import sys, gi
+import sys, os, gi
 gi.require_version('Gst', '1.0')
 gi.require_version('Gtk', '3.0')
 gi.require_version('GdkX11', '3.0')
 gi.require_version('GstVideo', '1.0')
 from gi.repository import Gst, Gtk, GLib, GdkX11, GstVideo
+from DMA_2_bench import PipelineBenchmark
 
 ################################################################################
 ################################################################################
@@ -26,16 +27,44 @@ class VideoMixer():
     
     ############################################################################
     
-    def __init__(self):
+    DEFAULT_CONFIG = {
+        "name" : "DMA_2_2",
+        "uris" : ["file:///home/dma/Downloads/sintel_SD.mp4",
+                  "file:///home/dma/Downloads/sita_SD.mp4"],
+        "output" : "DMA_2_2.mkv",
+        "headless" : False,
+        "buffers" : 500,
+        "test_caps" : "video/x-raw,width=720,height=576,framerate=25/1",
+        "backend" : "videomixer",
+        "width" : 720,
+        "height" : 576,
+        "framerate" : "25/1",
+        "format" : "I420",
+        "threads" : 0 }
+    
+    ############################################################################
+    
+    def __init__(self, config = None):
         """
         A VideoMixer object displays ans stores a mix of two video streams in
         which the opacity of each stream can be controlled using a slider.
+        The entries of config override those of DEFAULT_CONFIG. In headless
+        mode, no window is built and the display branch ends in a fakesink.
+        The pipeline then runs for a fixed number of buffers, using two
+        videotestsrc inputs if no URIs are given, and reports its throughput.
+        The mixing backend is either the videomixer, fed by two videoscale
+        elements, or the compositor, which scales its inputs inside its sink
+        pads and blends onto a fixed canvas using multiple threads.
         """
+        self.config = dict(self.DEFAULT_CONFIG, **(config or {}))
+        self.headless = self.config["headless"]
+        self.test_src = self.headless and not self.config["uris"]
+        self.compositor = self.config["backend"] == "compositor"
         Gst.init(None)
-        Gtk.init(None)
+        if not self.headless: Gtk.init(None)
         self.create_elements()
         self.build_pipeline()
-        self.build_ui()
+        if not self.headless: self.build_ui()
         self.configure_pipeline()
         self.start()
     
@@ -45,11 +74,13 @@ class VideoMixer():
         """
         Create all GStreamer elements.
         """
-        self.src_0 = Gst.ElementFactory.make("uridecodebin", "src_0")
-        self.src_1 = Gst.ElementFactory.make("uridecodebin", "src_1")
-        self.scl_0 = Gst.ElementFactory.make("videoscale", "scl_0")
-        self.scl_1 = Gst.ElementFactory.make("videoscale", "scl_1")
-        self.mix_0 = Gst.ElementFactory.make("videomixer", "mix_0")
+        src = "videotestsrc" if self.test_src else "uridecodebin"
+        snk = "fakesink" if self.headless else "xvimagesink"
+        
+        self.src_0 = Gst.ElementFactory.make(src, "src_0")
+        self.src_1 = Gst.ElementFactory.make(src, "src_1")
+        self.mix_0 = Gst.ElementFactory.make(self.config["backend"], "mix_0")
+        self.cap_0 = Gst.ElementFactory.make("capsfilter", "cap_0")
         self.tee_0 = Gst.ElementFactory.make("tee", "tee_0")
         self.que_0 = Gst.ElementFactory.make("queue", "que_0")
         self.que_1 = Gst.ElementFactory.make("queue", "que_1")
@@ -57,14 +88,22 @@ class VideoMixer():
         self.vco_1 = Gst.ElementFactory.make("videoconvert", "vco_1")
         self.enc_0 = Gst.ElementFactory.make("x264enc", "enc_0")
         self.mux_0 = Gst.ElementFactory.make("matroskamux", "mux_0")
-        self.snk_0 = Gst.ElementFactory.make("xvimagesink", "snk_0")
+        self.snk_0 = Gst.ElementFactory.make(snk, "snk_0")
         self.snk_1 = Gst.ElementFactory.make("filesink", "snk_1")
         self.pip_0 = Gst.Pipeline.new("pip_0")
         self.bus_0 = self.pip_0.get_bus()
         
-        if None in (self.src_0, self.src_1, self.scl_0, self.scl_1, self.mix_0,
-                    self.tee_0, self.que_0, self.que_1, self.vco_0, self.vco_1, 
-                    self.enc_0, self.mux_0, self.snk_0, self.snk_1, self.pip_0):
+        if self.compositor:
+            self.scalers = []
+        else:
+            self.scl_0 = Gst.ElementFactory.make("videoscale", "scl_0")
+            self.scl_1 = Gst.ElementFactory.make("videoscale", "scl_1")
+            self.scalers = [self.scl_0, self.scl_1]
+        
+        if None in (self.src_0, self.src_1, self.mix_0, self.cap_0, self.tee_0,
+                    self.que_0, self.que_1, self.vco_0, self.vco_1, self.enc_0,
+                    self.mux_0, self.snk_0, self.snk_1, self.pip_0,
+                    *self.scalers):
             print("ERROR : Unable to create all elements!")
             sys.exit(1)
         
@@ -73,15 +112,16 @@ class VideoMixer():
     def build_pipeline(self):
         """
         Link all GStreamer elements. The source elements are not yet linked and
-        will be linked dynamically.
+        will be linked dynamically, unless they are test sources.
         """
-        self.pip_0.add(self.src_0, self.src_1, self.scl_0, self.scl_1,
-                       self.mix_0, self.tee_0, self.que_0, self.que_1,
-                       self.vco_0, self.vco_1, self.enc_0, self.mux_0,
-                       self.snk_0, self.snk_1)
+        self.pip_0.add(self.src_0, self.src_1, self.mix_0, self.cap_0,
+                       self.tee_0, self.que_0, self.que_1, self.vco_0,
+                       self.vco_1, self.enc_0, self.mux_0, self.snk_0,
+                       self.snk_1, *self.scalers)
                        
         # Regular linking.
-        ret = self.mix_0.link(self.tee_0)
+        ret = self.mix_0.link(self.cap_0)
+        ret = ret and self.cap_0.link(self.tee_0)
         ret = ret and self.que_0.link(self.vco_0)
         ret = ret and self.vco_0.link(self.snk_0)
         ret = ret and self.que_1.link(self.vco_1)
@@ -93,13 +133,20 @@ class VideoMixer():
             print("ERROR : Unable to link some elements!")
             sys.exit(1)
 
-        # Pad-based linking.
+        # Pad-based linking. The inputs (in_0, in_1) are the pads to which the
+        # sources will be linked.
         tmp_0 = self.mix_0.get_pad_template("sink_%u")
         self.pad_0 = self.mix_0.request_pad(tmp_0, None, None)
-        ret_0 = self.scl_0.get_static_pad("src").link(self.pad_0)
         tmp_1 = self.mix_0.get_pad_template("sink_%u")
         self.pad_1 = self.mix_0.request_pad(tmp_1, None, None)
-        ret_1 = self.scl_1.get_static_pad("src").link(self.pad_1)
+        if self.compositor:
+            self.in_0, self.in_1 = self.pad_0, self.pad_1
+            ret_0 = ret_1 = Gst.PadLinkReturn.OK
+        else:
+            self.in_0 = self.scl_0.get_static_pad("sink")
+            self.in_1 = self.scl_1.get_static_pad("sink")
+            ret_0 = self.scl_0.get_static_pad("src").link(self.pad_0)
+            ret_1 = self.scl_1.get_static_pad("src").link(self.pad_1)
         tmp_2 = self.tee_0.get_pad_template("src_%u")
         self.pad_2 = self.tee_0.request_pad(tmp_2, None, None)
         ret_2 = self.pad_2.link(self.que_0.get_static_pad("sink"))
@@ -111,25 +158,47 @@ class VideoMixer():
                                                        ret_3)):
             print("ERROR : Unable to link some pads!")
             sys.exit(1)
+        
+        if self.test_src:
+            caps = Gst.Caps.from_string(self.config["test_caps"])
+            for src, pad in ((self.src_0, self.in_0), (self.src_1, self.in_1)):
+                if not src.link_pads_filtered("src", pad.get_parent_element(),
+                                              pad.get_name(), caps):
+                    print("ERROR : Unable to link the test sources!")
+                    sys.exit(1)
     
     ############################################################################
     
     def configure_pipeline(self):
         """
         Configure all GStreamer elements. The input and output file locations
-        can be altered from here.
+        are taken from the configuration.
         """
-        URI_0 = "file:///home/dma/Downloads/sintel_SD.mp4"
-        URI_1 = "file:///home/dma/Downloads/sita_SD.mp4"
+        if self.test_src:
+            self.src_0.set_property("pattern", "smpte")
+            self.src_1.set_property("pattern", "ball")
+        else:
+            URI_0, URI_1 = self.config["uris"]
+            self.src_0.set_property("uri", URI_0)
+            self.src_0.connect("pad-added", self.on_src_pad_added)
+            self.src_1.set_property("uri", URI_1)
+            self.src_1.connect("pad-added", self.on_src_pad_added)
         
-        self.src_0.set_property("uri", URI_0)
-        self.src_0.connect("pad-added", self.on_src_pad_added)
-        self.src_1.set_property("uri", URI_1)
-        self.src_1.connect("pad-added", self.on_src_pad_added)
         self.pad_0.set_property("alpha", 0.5)
         self.pad_1.set_property("alpha", 0.5)
         self.enc_0.set_property("tune", "zerolatency")
-        self.snk_1.set_property("location", "DMA_2_2.mkv")
+        self.cap_0.set_property("caps", self.canvas_caps())
+        self.snk_1.set_property("location", self.config["output"])
+        
+        if self.compositor:
+            self.configure_compositor()
+        
+        if self.headless:
+            self.snk_0.set_property("sync", False)
+            self.bench = PipelineBenchmark(self.config["name"],
+                                           self.config["buffers"])
+            self.bench.attach(self.mix_0.get_static_pad("src"),
+                              self.enc_0.get_static_pad("src"), self.send_eos)
         
         self.bus_0.add_signal_watch()
         self.bus_0.enable_sync_message_emission()
@@ -138,6 +207,45 @@ class VideoMixer():
         
     ############################################################################
     
+    def canvas_caps(self):
+        """
+        Return the caps of the mixed video. The videomixer renegotiates to
+        whatever the sources produce, whereas the compositor blends onto a
+        canvas of fixed resolution, framerate and format.
+        """
+        if not self.compositor: return Gst.Caps.from_string("video/x-raw")
+        
+        caps = f"video/x-raw,format={self.config['format']}"
+        return Gst.Caps.from_string(f"{caps},width={self.config['width']},"
+                                    f"height={self.config['height']},"
+                                    f"framerate={self.config['framerate']}")
+    
+    ############################################################################
+    
+    def configure_compositor(self):
+        """
+        Let the compositor pads scale each input to the full canvas and spread
+        the blending and conversion over multiple threads (all cores if the
+        configured number of threads is 0). These properties only exist in
+        recent GStreamer versions and are skipped otherwise.
+        """
+        threads = self.config["threads"] or os.cpu_count()
+        
+        if self.mix_0.find_property("max-threads"):
+            self.mix_0.set_property("max-threads", threads)
+        
+        for pad in (self.pad_0, self.pad_1):
+            pad.set_property("xpos", 0)
+            pad.set_property("ypos", 0)
+            pad.set_property("width", self.config["width"])
+            pad.set_property("height", self.config["height"])
+            if pad.find_property("converter-config"):
+                cfg = Gst.Structure.new_from_string("GstVideoConverter, "
+                                                    f"threads=(uint){threads}")
+                pad.set_property("converter-config", cfg)
+    
+    ############################################################################
+    
     def build_ui(self):
         """
         Build a simple user interface using Gtk in which the video and two
@@ -191,9 +299,18 @@ class VideoMixer():
         if ret == Gst.StateChangeReturn.FAILURE:
             print("ERROR : Unable to change to playing state!")
         
-        Gtk.main()
+        if self.headless:
+            self.loop = GLib.MainLoop()
+            self.bench.start()
+            self.loop.run()
+            self.bench.stop()
+        else:
+            Gtk.main()
         
         self.stop()
+        
+        if self.headless:
+            self.bench.report()
     
     ############################################################################
     
@@ -207,20 +324,33 @@ class VideoMixer():
     
     ############################################################################
     
+    def send_eos(self):
+        """
+        End the stream once enough buffers have been measured in headless mode.
+        The EOS event is sent to the sources such that the recording is
+        finalised properly.
+        """
+        if self.pip_0:
+            self.pip_0.send_event(Gst.Event.new_eos())
+        
+        return GLib.SOURCE_REMOVE
+    
+    ############################################################################
+    
     def on_src_pad_added(self, src, new_pad):
         """
-        Dynamically link the source pads to the next pads (videoscale). This is
-        necessary since the demuxer cannot produce information until some data
-        is received and the container is inspected.
+        Dynamically link the source pads to the next pads (videoscale or
+        compositor). This is necessary since the demuxer cannot produce
+        information until some data is received and the container is inspected.
         """
         new_pad_name = new_pad.get_current_caps().get_structure(0).get_name()
         
         if not new_pad_name.startswith("video/x-raw"): return
             
         if src == self.src_0:
-            sink_pad = self.scl_0.get_static_pad("sink")
+            sink_pad = self.in_0
         elif src == self.src_1:
-            sink_pad = self.scl_1.get_static_pad("sink")
+            sink_pad = self.in_1
             
         if sink_pad and not sink_pad.is_linked():
             if new_pad.link(sink_pad) == Gst.PadLinkReturn.OK:
@@ -254,10 +384,12 @@ class VideoMixer():
         elif msg.type == Gst.MessageType.EOS:
             eos = True
             print("INFO : End of stream reached!")
+            if self.headless: self.loop.quit()
         elif msg.type == Gst.MessageType.ERROR:
             err, dbg = msg.parse_error()
             print(f"ERROR : {msg.src.get_name()} {err.message}!")
             print(f"DEBUG INFO: {dbg}")
+            if self.headless: self.loop.quit()
             
     ############################################################################
     
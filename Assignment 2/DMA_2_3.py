@@ -12,12 +12,18 @@ About:      Visualisation of GStreamer video mixing capabilities.
 ################################################################################
 ################################################################################
 
-import sys, gi
+import sys, os, csv, threading, collections, gi
 gi.require_version('Gst', '1.0')
 gi.require_version('Gtk', '3.0')
 gi.require_version('GdkX11', '3.0')
 gi.require_version('GstVideo', '1.0')
-from gi.repository import Gst, Gtk, GLib, GdkX11, GstVideo
+gi.require_version('GdkPixbuf', '2.0')
+from gi.repository import Gst, Gtk, GLib, GdkX11, GstVideo, GdkPixbuf
+from DMA_2_bench import PipelineBenchmark, percentile, process_age
+from DMA_2_stats import PipelineStats
+from DMA_2_qos import QosController
+from DMA_2_live import (LUMA_FORMATS, luma_stride, read_stamp,
+                         stamp_latency)
 
 ################################################################################
 ################################################################################
@@ -70,19 +76,136 @@ class VideoMixer():
         "vertigotv" : "A loopback alpha blending effector with rotating and scaling.",
         "warptv" : "WarpTV does realtime goo'ing of the video input." }
     
+    TEST_PATTERNS = ("smpte", "ball", "snow", "pinwheel", "spokes", "circular",
+                     "checkers-8", "gamut")
+    
+    # URI schemes of live inputs. RTP is received using udpsrc, the others
+    # using uridecodebin.
+    LIVE_SCHEMES = ("rtp", "udp", "srt")
+    
+    INPUT_DEFAULTS = {
+        "uri" : None, # A videotestsrc is used if None.
+        "pattern" : None, # Taken from TEST_PATTERNS if None.
+        "alpha" : 0.5,
+        "xpos" : 0,
+        "ypos" : 0,
+        "zorder" : None, # Order of addition if None.
+        "width" : None, # Canvas width if None, compositor only.
+        "height" : None } # Canvas height if None, compositor only.
+    
+    OVERLAY_FACTORIES = {
+        "logo" : "gdkpixbufoverlay",
+        "text" : "textoverlay", # E.g. a ticker.
+        "clock" : "clockoverlay", # Wall clock time.
+        "time" : "timeoverlay" } # Stream time.
+    
+    OVERLAY_DEFAULTS = {
+        "type" : "logo", # Key in OVERLAY_FACTORIES.
+        "name" : None, # Label in the user interface, the type if None.
+        "location" : "logo.png", # Logos only.
+        "scale" : None, # Logo width relative to the mix, native if None.
+        "text" : "", # Text, or the prefix of the clock and time.
+        "font" : "Sans 16",
+        "xpos" : 20, # Offset of logos, padding of the others.
+        "ypos" : 20,
+        "halign" : "left", # Alignment of the text, clock and time.
+        "valign" : "top",
+        "enabled" : True }
+    
+    # Decoded and scaled logos, shared by all pipelines in this process.
+    PIXBUF_CACHE = {}
+    
+    # Named x264enc settings, see configure_encoder. Settings that are left
+    # out keep the x264enc defaults.
+    ENCODER_PROFILES = {
+        "default" : {"tune" : "zerolatency"},
+        "realtime" : {"tune" : "zerolatency", "speed_preset" : "ultrafast",
+                      "threads" : 0, "bitrate" : 4000, "key_int_max" : 50},
+        "balanced" : {"tune" : "zerolatency", "speed_preset" : "veryfast",
+                      "threads" : 0, "bitrate" : 3000, "key_int_max" : 100},
+        "quality" : {"speed_preset" : "medium", "threads" : 0, "crf" : 20,
+                     "key_int_max" : 250, "rc_lookahead" : 40},
+        "archive" : {"speed_preset" : "slow", "threads" : 0, "crf" : 18,
+                     "key_int_max" : 250, "rc_lookahead" : 60},
+        "lossless" : {"speed_preset" : "ultrafast", "threads" : 0,
+                      "quantizer" : 0} }
+    
+    RENDITION_DEFAULTS = {
+        "width" : None, # Size of the mix if both are None.
+        "height" : None,
+        "profile" : None, # The encoder of the configuration if None.
+        "bitrate" : None, # kbit/s, overrides the profile if not None.
+        "speed_preset" : None,
+        "threads" : None,
+        "output" : None } # Derived from the output location if None.
+    
+    DEFAULT_CONFIG = {
+        "name" : "DMA_2_3",
+        "uris" : ["file:///home/dma/Downloads/sintel_SD.mp4",
+                  "file:///home/dma/Downloads/sita_SD.mp4"],
+        "inputs" : None, # INPUT_DEFAULTS overrides, one per URI if None.
+        "output" : "DMA_2_3.mkv",
+        "logo" : "logo.png", # Overlay image, disabled if None.
+        "overlays" : None, # OVERLAY_DEFAULTS overrides, the logo if None.
+        "renditions" : None, # RENDITION_DEFAULTS overrides, one if None.
+        "encoder" : "default", # Name in ENCODER_PROFILES, or the settings.
+        "effects" : [],
+        "lazy_effects" : True, # Create effects on first use, see effect.
+        "effect_costs" : "effect_costs.csv", # Table of DMA_2_costs.py.
+        "headless" : False,
+        "buffers" : 500, # Headless only, 0 to run until the end of stream.
+        "test_caps" : "video/x-raw,width=720,height=576,framerate=25/1",
+        "backend" : "videomixer",
+        "width" : 720,
+        "height" : 576,
+        "framerate" : "25/1",
+        "format" : "BGRx", # Supported by every effect in EFFECT_NAMES.
+        "output_format" : "I420", # After tee_0, see plan_caps.
+        "latency" : 200, # Jitter buffer latency of live inputs in ms.
+        "rtp_caps" : "application/x-rtp,media=video,clock-rate=90000,"
+                     "encoding-name=H264,payload=96",
+        "threads" : 0,
+        "stats" : 0, # Instrumentation dump interval in seconds, 0 disables.
+        "stats_file" : None, # JSON lines, or CSV if ending in .csv.
+        "qos" : 0, # Degradation controller interval in seconds, 0 disables.
+        "qos_degrade" : 2, # Late intervals before degrading one step.
+        "qos_restore" : 5, # Intervals without lateness before restoring.
+        "tap" : 0, # Frame tap worker threads, 0 disables.
+        "tap_frames" : 4, # Ring buffer size of the frame tap.
+        "display_policy" : "auto", # See configure_queues.
+        "display_buffers" : 2,
+        "record_policy" : "bounded", # See configure_queues.
+        "record_time" : 2.0, # Seconds, 0 for no limit.
+        "record_bytes" : 0 } # 0 for no limit.
+    
     ############################################################################
     
-    def __init__(self):
+    def __init__(self, config = None):
         """
-        A VideoMixer object displays ans stores a mix of two video streams in
-        which the opacity of each stream can be controlled using a slider.
-        Additional effects can also be added, such as a video overlay.
+        A VideoMixer object displays ans stores a mix of video streams in which
+        the opacity of each stream can be controlled using a slider. Additional
+        effects can also be added, such as a video overlay. Inputs can be added
+        and removed while PLAYING, each with its own alpha, position and
+        z-order.
+        The entries of config override those of DEFAULT_CONFIG. In headless
+        mode, no window is built and the display branch ends in a fakesink.
+        The pipeline then runs for a fixed number of buffers, using two
+        videotestsrc inputs if no URIs are given, and reports its throughput.
+        The mixing backend is either the videomixer, fed by a videoscale
+        element per input, or the compositor, which scales its inputs inside
+        its sink pads and blends onto a fixed canvas using multiple threads.
         """
+        self.config = dict(self.DEFAULT_CONFIG, **(config or {}))
+        self.error = None
+        self.headless = self.config["headless"]
+        self.test_src = self.headless and not self.config["uris"]
+        self.compositor = self.config["backend"] == "compositor"
+        self.canvas_scale = 1.0
         Gst.init(None)
-        Gtk.init(None)
+        if not self.headless: Gtk.init(None)
         self.create_elements()
         self.build_pipeline()
-        self.build_ui()
+        if not self.headless: self.build_ui()
         self.configure_pipeline()
         self.start()
     
@@ -92,70 +215,143 @@ class VideoMixer():
         """
         Create all GStreamer elements.
         """
-        self.src_0 = Gst.ElementFactory.make("uridecodebin", "src_0")
-        self.src_1 = Gst.ElementFactory.make("uridecodebin", "src_1")
-        self.scl_0 = Gst.ElementFactory.make("videoscale", "scl_0")
-        self.scl_1 = Gst.ElementFactory.make("videoscale", "scl_1")
-        self.mix_0 = Gst.ElementFactory.make("videomixer", "mix_0")
-        self.pix_0 = Gst.ElementFactory.make("gdkpixbufoverlay", "pix_0")
+        snk = "fakesink" if self.headless else "xvimagesink"
+        
+        self.mix_0 = Gst.ElementFactory.make(self.config["backend"], "mix_0")
+        self.cap_0 = Gst.ElementFactory.make("capsfilter", "cap_0")
         self.tee_0 = Gst.ElementFactory.make("tee", "tee_0")
+        self.vco_2 = Gst.ElementFactory.make("videoconvert", "vco_2")
+        self.cap_2 = Gst.ElementFactory.make("capsfilter", "cap_2")
         self.que_0 = Gst.ElementFactory.make("queue", "que_0")
         self.que_1 = Gst.ElementFactory.make("queue", "que_1")
         self.vco_0 = Gst.ElementFactory.make("videoconvert", "vco_0")
         self.vco_1 = Gst.ElementFactory.make("videoconvert", "vco_1")
         self.enc_0 = Gst.ElementFactory.make("x264enc", "enc_0")
         self.mux_0 = Gst.ElementFactory.make("matroskamux", "mux_0")
-        self.snk_0 = Gst.ElementFactory.make("xvimagesink", "snk_0")
+        self.snk_0 = Gst.ElementFactory.make(snk, "snk_0")
         self.snk_1 = Gst.ElementFactory.make("filesink", "snk_1")
         self.pip_0 = Gst.Pipeline.new("pip_0")
         self.bus_0 = self.pip_0.get_bus()
         
-        self.effects = [Gst.ElementFactory.make(name, f"eff_{i}")
-                        for i, name in enumerate(self.EFFECT_NAMES)]
+        # Scaler back to the canvas size, such that the QoS controller can
+        # lower the resolution of the mix without renegotiating the branches.
+        self.rsz_0 = self.cap_1 = None
+        if self.config["qos"] and self.compositor:
+            self.rsz_0 = Gst.ElementFactory.make("videoscale", "rsz_0")
+            self.cap_1 = Gst.ElementFactory.make("capsfilter", "cap_1")
+            if not self.rsz_0 or not self.cap_1:
+                print("ERROR : Unable to create all elements!")
+                sys.exit(1)
+        
+        self.effects = [None] * len(self.EFFECT_NAMES)
+        if not self.config["lazy_effects"]:
+            self.effects = [self.effect(i) for i in range(len(self.effects))]
         
-        if None in (self.src_0, self.src_1, self.scl_0, self.scl_1, self.mix_0,
-                    self.pix_0, self.tee_0, self.que_0, self.que_1, self.vco_0, 
-                    self.vco_1, self.enc_0, self.mux_0, self.snk_0, self.snk_1,
-                    self.pip_0, *self.effects):
+        if None in (self.mix_0, self.cap_0, self.tee_0, self.vco_2, self.cap_2,
+                    self.que_0, self.que_1, self.vco_0, self.vco_1, self.enc_0,
+                    self.mux_0, self.snk_0, self.snk_1, self.pip_0) or \
+           not self.config["lazy_effects"] and None in self.effects:
             print("ERROR : Unable to create all elements!")
             sys.exit(1)
+    
+    ############################################################################
+    
+    def effect(self, i):
+        """
+        Return the element of effect i, creating it on first use, or None on
+        failure. Creating an effect loads its plugin and allocates its state,
+        so effects are only created once enabled, unless lazy_effects is
+        disabled. All effects are then also added and linked up front, see
+        on_chain_idle.
+        """
+        if self.effects[i] is None:
+            name = self.EFFECT_NAMES[i]
+            self.effects[i] = Gst.ElementFactory.make(name, f"eff_{i}")
+            if self.effects[i] is None:
+                print(f"ERROR : Unable to create effect '{name}'!")
+        
+        return self.effects[i]
+    
+    ############################################################################
+    
+    def effect_costs(self):
+        """
+        Return the measured cost in ms per frame of every effect, and of every
+        pair of effects per effect, from the effect_costs table written by
+        DMA_2_costs.py. The resolution closest to that of the mix is used.
+        Effects that have not been measured are left out.
+        """
+        location = self.config["effect_costs"]
+        if not location or not os.path.exists(location): return {}, {}
+        
+        pixels = self.config["width"] * self.config["height"]
+        closest = {}
+        
+        with open(location, newline = "") as f:
+            for row in csv.DictReader(f):
+                if not row["ns_per_frame"]: continue
+                diff = abs(int(row["width"]) * int(row["height"]) - pixels)
+                cost = int(row["ns_per_frame"]) / 1e6
+                if diff < closest.get(row["effects"], (float("inf"),))[0]:
+                    closest[row["effects"]] = (diff, cost)
+        
+        costs, pairs = {}, {}
+        for effects, (_, cost) in closest.items():
+            names = effects.split("+")
+            if len(names) == 1:
+                costs[names[0]] = cost
+            for name in names if len(names) == 2 else []:
+                other = names[1] if name == names[0] else names[0]
+                pairs.setdefault(name, []).append((other, cost))
+        
+        return costs, pairs
+    
+    ############################################################################
+    
+    def warm_effects(self):
+        """
+        Load the plugins of the effects that have not been created yet, such
+        that enabling one does not stall the user interface. Runs in its own
+        thread once the first frame has been rendered.
+        """
+        for i, name in enumerate(self.EFFECT_NAMES):
+            if self.effects[i] is not None: continue
+            
+            factory = Gst.ElementFactory.find(name)
+            if factory: factory.load()
         
     ############################################################################
     
     def build_pipeline(self):
         """
-        Link all GStreamer elements. The source elements are not yet linked and
-        will be linked dynamically.
+        Link all GStreamer elements and add the initial inputs and overlays.
+        Only the enabled effects and overlays are spliced in between cap_0 and
+        the end of the chain, the conversion vco_2 or the QoS scaler rsz_0.
+        The mix is converted once, by vco_2, for all branches after tee_0.
         """
-        self.pip_0.add(self.src_0, self.src_1, self.scl_0, self.scl_1,
-                       self.mix_0, self.pix_0, self.tee_0, self.que_0, 
-                       self.que_1, self.vco_0, self.vco_1, self.enc_0,
-                       self.mux_0, self.snk_0, self.snk_1, *self.effects)
+        self.pip_0.add(self.mix_0, self.cap_0, self.tee_0, self.vco_2,
+                       self.cap_2, self.que_0, self.que_1, self.vco_0,
+                       self.vco_1, self.enc_0, self.mux_0, self.snk_0,
+                       self.snk_1)
+        self.chain_end = self.vco_2
                        
         # Regular linking.
-        ret = self.mix_0.link(self.effects[0])
-        for i in range(len(self.effects) - 1):
-            ret = ret and self.effects[i].link(self.effects[i + 1])
-        ret = ret and self.effects[-1].link(self.pix_0)
-        ret = ret and self.pix_0.link(self.tee_0)
+        ret = self.mix_0.link(self.cap_0)
+        ret = ret and self.vco_2.link(self.cap_2)
+        ret = ret and self.cap_2.link(self.tee_0)
+        if self.rsz_0:
+            self.pip_0.add(self.rsz_0, self.cap_1)
+            ret = ret and self.rsz_0.link(self.cap_1)
+            ret = ret and self.cap_1.link(self.vco_2)
+            self.chain_end = self.rsz_0
         ret = ret and self.que_0.link(self.vco_0)
         ret = ret and self.vco_0.link(self.snk_0)
-        ret = ret and self.que_1.link(self.vco_1)
-        ret = ret and self.vco_1.link(self.enc_0)
-        ret = ret and self.enc_0.link(self.mux_0)
-        ret = ret and self.mux_0.link(self.snk_1)
         
         if not ret:
             print("ERROR : Unable to link some elements!")
             sys.exit(1)
 
         # Pad-based linking.
-        tmp_0 = self.mix_0.get_pad_template("sink_%u")
-        self.pad_0 = self.mix_0.request_pad(tmp_0, None, None)
-        ret_0 = self.scl_0.get_static_pad("src").link(self.pad_0)
-        tmp_1 = self.mix_0.get_pad_template("sink_%u")
-        self.pad_1 = self.mix_0.request_pad(tmp_1, None, None)
-        ret_1 = self.scl_1.get_static_pad("src").link(self.pad_1)
         tmp_2 = self.tee_0.get_pad_template("src_%u")
         self.pad_2 = self.tee_0.request_pad(tmp_2, None, None)
         ret_2 = self.pad_2.link(self.que_0.get_static_pad("sink"))
@@ -163,36 +359,90 @@ class VideoMixer():
         self.pad_3 = self.tee_0.request_pad(tmp_3, None, None)
         ret_3 = self.pad_3.link(self.que_1.get_static_pad("sink"))
         
-        if any(ret != Gst.PadLinkReturn.OK for ret in (ret_0, ret_1, ret_2,
-                                                       ret_3)):
+        if any(ret != Gst.PadLinkReturn.OK for ret in (ret_2, ret_3)):
             print("ERROR : Unable to link some pads!")
             sys.exit(1)
+        
+        self.build_renditions()
+        
+        # Inputs, in the order of their configuration. If any of them is live,
+        # the test inputs are live as well.
+        self.inputs = []
+        self.n_inputs = 0
+        self.live = any(self.is_live(cfg.get("uri"))
+                        for cfg in self.input_configs())
+        for cfg in self.input_configs():
+            if self.add_input(cfg) is None: sys.exit(1)
+        
+        # Effect chain, in the order in which the effects were enabled.
+        self.chain = []
+        self.chain_lock = threading.Lock()
+        self.active = [self.EFFECT_NAMES.index(name)
+                       for name in self.config["effects"]]
+        if None in (self.effect(i) for i in self.active): sys.exit(1)
+        
+        # Overlays, after the effects.
+        self.overlays = []
+        for cfg in self.overlay_configs():
+            if self.add_overlay(cfg) is None: sys.exit(1)
+        
+        self.splice_effects()
     
     ############################################################################
     
     def configure_pipeline(self):
         """
-        Configure all GStreamer elements. The input and output file locations
-        can be altered from here.
-        """
-        URI_0 = "file:///home/dma/Downloads/sintel_SD.mp4"
-        URI_1 = "file:///home/dma/Downloads/sita_SD.mp4"
-        
-        self.src_0.set_property("uri", URI_0)
-        self.src_0.connect("pad-added", self.on_src_pad_added)
-        self.src_1.set_property("uri", URI_1)
-        self.src_1.connect("pad-added", self.on_src_pad_added)
-        self.pad_0.set_property("alpha", 0.5)
-        self.pad_1.set_property("alpha", 0.5)
-        self.pix_0.set_property("location", "logo.png")
-        self.pix_0.set_property("offset-x", 20)
-        self.pix_0.set_property("offset-y", 20)
-        self.enc_0.set_property("tune", "zerolatency")
-        self.snk_1.set_property("location", "DMA_2_3.mkv")
-        
-        for eff in self.effects:
-            eff.set_passthrough(True)
-            
+        Configure all GStreamer elements. The output file location is taken
+        from the configuration, the inputs are configured in add_input.
+        """
+        self.cap_0.set_property("caps", self.canvas_caps())
+        if self.cap_1: self.cap_1.set_property("caps", self.canvas_caps())
+        self.cap_2.set_property("caps", self.plan_caps())
+        if self.vco_2.find_property("n-threads"):
+            threads = self.config["threads"] or os.cpu_count()
+            self.vco_2.set_property("n-threads", threads)
+        self.cap_0.get_static_pad("src").add_probe(
+            Gst.PadProbeType.EVENT_DOWNSTREAM, self.on_canvas_event)
+        
+        self.configure_renditions()
+        
+        if self.compositor:
+            self.configure_compositor()
+        
+        self.configure_queues()
+        
+        self.snk_0.get_static_pad("sink").add_probe(Gst.PadProbeType.BUFFER,
+                                                    self.on_first_frame)
+        if self.live:
+            self.snk_0.get_static_pad("sink").add_probe(
+                Gst.PadProbeType.BUFFER, self.on_display_buffer)
+        
+        if self.headless:
+            self.snk_0.set_property("sync", False)
+            self.bench = PipelineBenchmark(self.config["name"],
+                                           self.config["buffers"])
+            self.bench.attach(self.mix_0.get_static_pad("src"),
+                              self.enc_0.get_static_pad("src"), self.send_eos)
+        
+        if self.config["qos"]:
+            self.qos = QosController(self, self.config["qos"],
+                                     self.config["qos_degrade"],
+                                     self.config["qos_restore"])
+            self.qos.attach()
+        
+        if self.config["stats"]:
+            self.stats = PipelineStats(self.pip_0, self.config["stats"],
+                                       self.config["stats_file"])
+            self.stats.attach()
+        
+        self.tap = None
+        if self.config["tap"]:
+            # NumPy is only required for the frame tap.
+            from DMA_2_tap import FrameTap
+            self.tap = FrameTap(self.pip_0, self.tee_0, self.config["tap"],
+                                self.config["tap_frames"])
+            if not self.tap.attach(): sys.exit(1)
+        
         self.bus_0.add_signal_watch()
         self.bus_0.enable_sync_message_emission()
         self.bus_0.connect("message", self.on_message)
@@ -200,78 +450,674 @@ class VideoMixer():
         
     ############################################################################
     
+    def canvas_caps(self):
+        """
+        Return the caps of the mixed video, which always have the configured
+        format such that effects can be spliced in without renegotiation. The
+        compositor additionally blends onto a canvas of fixed resolution
+        (scaled by canvas_scale) and framerate, whereas the videomixer
+        renegotiates to whatever the sources produce.
+        """
+        caps = f"video/x-raw,format={self.config['format']}"
+        if not self.compositor: return Gst.Caps.from_string(caps)
+        
+        width = round(self.config["width"] * self.canvas_scale) // 2 * 2
+        height = round(self.config["height"] * self.canvas_scale) // 2 * 2
+        
+        return Gst.Caps.from_string(f"{caps},width={width},height={height},"
+                                    f"framerate={self.config['framerate']}")
+    
+    ############################################################################
+    
+    def plan_caps(self):
+        """
+        Return the caps of the mix after tee_0. The effects need the configured
+        format, whereas x264enc only takes planar YUV, so the mix is converted
+        to output_format (I420 by default) once, before it is split. The
+        branches then negotiate the same caps, their videoconvert elements
+        remain in passthrough and are only kept for sinks that do not accept
+        output_format. The compositor additionally pins the canvas resolution
+        and framerate, not scaled by canvas_scale as rsz_0 restores these.
+        """
+        fmt = self.config["output_format"] or self.config["format"]
+        caps = f"video/x-raw,format={fmt}"
+        if not self.compositor: return Gst.Caps.from_string(caps)
+        
+        return Gst.Caps.from_string(f"{caps},width={self.config['width']},"
+                                    f"height={self.config['height']},"
+                                    f"framerate={self.config['framerate']}")
+    
+    ############################################################################
+    
+    def count_conversions(self):
+        """
+        Return the names of the converters and scalers in the pipeline that
+        actually convert, i.e. whose negotiated caps differ between their sink
+        and src pads, on every branch, including the frame tap. Elements in
+        passthrough or not negotiated are skipped.
+        """
+        names = []
+        
+        for element in self.pip_0.iterate_recurse():
+            factory = element.get_factory()
+            if factory is None or factory.get_name() not in (
+                "videoconvert", "videoscale", "videoconvertscale"): continue
+            
+            sink = element.get_static_pad("sink").get_current_caps()
+            src = element.get_static_pad("src").get_current_caps()
+            if sink and src and not sink.is_equal(src):
+                names.append(element.get_name())
+        
+        return names
+    
+    ############################################################################
+    
+    def set_canvas_scale(self, scale):
+        """
+        Blend onto a canvas scaled by scale, compositor only. The inputs are
+        scaled along and rsz_0 scales the mix back to the canvas size, such
+        that only the mixer and the chain renegotiate.
+        """
+        self.canvas_scale = scale
+        
+        for inp in self.inputs:
+            self.configure_input(inp)
+        self.cap_0.set_property("caps", self.canvas_caps())
+    
+    ############################################################################
+    
+    def configure_compositor(self):
+        """
+        Spread the blending of the compositor over multiple threads (all cores
+        if the configured number of threads is 0). This property only exists in
+        recent GStreamer versions and is skipped otherwise.
+        """
+        threads = self.config["threads"] or os.cpu_count()
+        
+        if self.mix_0.find_property("max-threads"):
+            self.mix_0.set_property("max-threads", threads)
+    
+    ############################################################################
+    
+    def build_renditions(self):
+        """
+        Build a scale, encode and mux branch after tee_0 for every rendition,
+        such that several renditions are recorded from a single mix. The first
+        rendition uses the recording branch (que_1 to snk_1), the others get
+        their own elements. Every branch starts with a queue, so each encoder
+        runs in its own streaming thread.
+        """
+        self.renditions = []
+        
+        for i, cfg in enumerate(self.config["renditions"] or [{}]):
+            cfg = dict(self.RENDITION_DEFAULTS, **cfg)
+            
+            if i == 0:
+                ren = {"que" : self.que_1, "vco" : self.vco_1,
+                       "enc" : self.enc_0, "mux" : self.mux_0,
+                       "snk" : self.snk_1, "pad" : self.pad_3}
+            else:
+                ren = {key : Gst.ElementFactory.make(factory, f"{key}_r{i}")
+                       for key, factory in (("que", "queue"),
+                                            ("vco", "videoconvert"),
+                                            ("enc", "x264enc"),
+                                            ("mux", "matroskamux"),
+                                            ("snk", "filesink"))}
+            
+            if cfg["width"] or cfg["height"]:
+                ren["scl"] = Gst.ElementFactory.make("videoscale", f"scl_r{i}")
+                ren["cap"] = Gst.ElementFactory.make("capsfilter", f"cap_r{i}")
+            
+            if None in ren.values():
+                print(f"ERROR : Unable to create rendition {i}!")
+                sys.exit(1)
+            
+            chain = [ren[key] for key in ("que", "vco", "scl", "cap", "enc",
+                                          "mux", "snk") if key in ren]
+            for element in chain:
+                if element.get_parent() is None: self.pip_0.add(element)
+            
+            ret = all(up.link(down) for up, down in zip(chain, chain[1:]))
+            
+            if i > 0:
+                tmp = self.tee_0.get_pad_template("src_%u")
+                ren["pad"] = self.tee_0.request_pad(tmp, None, None)
+                sink = ren["que"].get_static_pad("sink")
+                ret = ret and ren["pad"].link(sink) == Gst.PadLinkReturn.OK
+            
+            if not ret:
+                print(f"ERROR : Unable to link rendition {i}!")
+                sys.exit(1)
+            
+            ren["config"] = cfg
+            self.renditions.append(ren)
+    
+    ############################################################################
+    
+    def configure_renditions(self):
+        """
+        Configure the scaler, encoder and file sink of every rendition.
+        """
+        for i, ren in enumerate(self.renditions):
+            cfg = ren["config"]
+            
+            settings = self.encoder_settings(cfg["profile"] or
+                                             self.config["encoder"])
+            if cfg["bitrate"] is not None:
+                settings.pop("crf", None)
+                settings.pop("quantizer", None)
+            settings.update({key : cfg[key] for key in ("bitrate",
+                             "speed_preset", "threads") if cfg[key] is not None})
+            self.configure_encoder(ren["enc"], settings)
+            
+            if "cap" in ren:
+                caps = "video/x-raw"
+                if cfg["width"]: caps += f",width={cfg['width']}"
+                if cfg["height"]: caps += f",height={cfg['height']}"
+                ren["cap"].set_property("caps", Gst.Caps.from_string(caps))
+            
+            ren["snk"].set_property("location", cfg["output"] or
+                                    self.rendition_output(i, cfg))
+    
+    ############################################################################
+    
+    def encoder_settings(self, profile):
+        """
+        Return a copy of the settings of an encoder profile, given either by
+        its name in ENCODER_PROFILES or as a dictionary of settings.
+        """
+        if isinstance(profile, dict): return dict(profile)
+        
+        if profile not in self.ENCODER_PROFILES:
+            print(f"ERROR : Unknown encoder profile {profile}!")
+            sys.exit(1)
+        
+        return dict(self.ENCODER_PROFILES[profile])
+    
+    ############################################################################
+    
+    def configure_encoder(self, enc, settings):
+        """
+        Apply encoder settings to an x264enc element. The settings are tune,
+        speed_preset, threads (0 for automatic), key_int_max, rc_lookahead and
+        one rate control: bitrate in kbit/s, crf (constant quality) or
+        quantizer (constant QP, 0 is lossless).
+        """
+        for key, value in settings.items():
+            if key == "crf":
+                enc.set_property("pass", "qual")
+                enc.set_property("quantizer", value)
+            elif key == "quantizer":
+                enc.set_property("pass", "quant")
+                enc.set_property("quantizer", value)
+            else:
+                enc.set_property(key.replace("_", "-"), value)
+    
+    ############################################################################
+    
+    def rendition_output(self, i, cfg):
+        """
+        Derive the file location of a rendition from the output location, e.g.
+        DMA_2_3_720p.mkv. The first rendition is stored at the output location.
+        """
+        output = self.config["output"]
+        
+        if i == 0 or output == os.devnull: return output
+        
+        root, ext = os.path.splitext(output)
+        suffix = f"{cfg['height']}p" if cfg["height"] else f"r{i}"
+        
+        return f"{root}_{suffix}{ext}"
+    
+    ############################################################################
+    
+    def configure_queues(self):
+        """
+        Decouple the display (que_0) and recording (que_1 and the queues of the
+        other renditions) branches such that neither a slow display nor a slow
+        encoder stalls the mix. The display policy is either "leaky", dropping
+        the oldest frames once display_buffers are queued, "default", or "auto",
+        which is "leaky" for live inputs only, as the display paces the mix of
+        file inputs. The record policy, applied to every rendition, is either
+        "bounded", blocking once record_time seconds or record_bytes are queued,
+        "leaky", dropping the oldest frames instead, "never-drop", queueing
+        without limit, or "default". Frames dropped by the leaky queues are
+        counted and reported on the bus.
+        """
+        display = self.config["display_policy"]
+        record = self.config["record_policy"]
+        if display == "auto": display = "leaky" if self.live else "default"
+        
+        if display == "leaky":
+            self.que_0.set_property("leaky", "downstream")
+            self.que_0.set_property("max-size-buffers",
+                                    self.config["display_buffers"])
+            self.que_0.set_property("max-size-bytes", 0)
+            self.que_0.set_property("max-size-time", 0)
+        
+        for que in (ren["que"] for ren in self.renditions):
+            if record in ("bounded", "leaky"):
+                max_time = int(self.config["record_time"] * Gst.SECOND)
+                que.set_property("max-size-buffers", 0)
+                que.set_property("max-size-bytes", self.config["record_bytes"])
+                que.set_property("max-size-time", max_time)
+                if record == "leaky":
+                    que.set_property("leaky", "downstream")
+            elif record == "never-drop":
+                que.set_property("leaky", "no")
+                que.set_property("max-size-buffers", 0)
+                que.set_property("max-size-bytes", 0)
+                que.set_property("max-size-time", 0)
+        
+        # Frames dropped by each leaky queue, as [dropped, reported]. A full
+        # leaky queue signals an overrun right before dropping its oldest frame.
+        leaky = [self.que_0] if display == "leaky" else []
+        if record == "leaky": leaky += [ren["que"] for ren in self.renditions]
+        self.drops = {que : [0, 0] for que in leaky}
+        for que, count in self.drops.items():
+            que.connect("overrun", self.on_queue_overrun, count)
+        
+        if self.drops: GLib.timeout_add_seconds(1, self.on_drop_timeout)
+    
+    ############################################################################
+    
+    def on_queue_overrun(self, que, count):
+        """
+        Count a frame dropped by a full leaky queue.
+        """
+        count[0] += 1
+    
+    ############################################################################
+    
+    def on_drop_timeout(self):
+        """
+        Post a "dma-drops" message on the bus whenever a leaky queue has dropped
+        frames since the last report, holding the total per queue.
+        """
+        if not self.pip_0: return GLib.SOURCE_REMOVE
+        
+        st = Gst.Structure.new_empty("dma-drops")
+        changed = False
+        
+        for que, count in self.drops.items():
+            dropped = count[0]
+            st.set_value(que.get_name(), dropped)
+            changed = changed or dropped != count[1]
+            count[1] = dropped
+        
+        if changed:
+            self.pip_0.post_message(Gst.Message.new_application(self.pip_0, st))
+        
+        return GLib.SOURCE_CONTINUE
+    
+    ############################################################################
+    
+    def input_configs(self):
+        """
+        Return the configuration of the initial inputs. Without an explicit list
+        of inputs, one input is created for each URI, or two test inputs in
+        headless mode if no URIs are given.
+        """
+        if self.config["inputs"] is not None: return self.config["inputs"]
+        if self.test_src: return [{}, {}]
+        
+        return [{"uri" : uri} for uri in self.config["uris"]]
+    
+    ############################################################################
+    
+    def add_input(self, cfg = None):
+        """
+        Add an input to the mix and return it, or None on failure. An input
+        consists of a source (uridecodebin, udpsrc for rtp:// URIs or
+        videotestsrc if no URI is given), a videoscale element for the
+        videomixer backend and its own request pad on the mixer. RTP inputs
+        pass an rtpjitterbuffer, depayloader and decodebin. The entries of cfg
+        override those of INPUT_DEFAULTS. Inputs can be added while PLAYING.
+        """
+        cfg = dict(self.INPUT_DEFAULTS, **(cfg or {}))
+        n = self.n_inputs
+        self.n_inputs += 1
+        uri = cfg["uri"]
+        
+        inp = {"index" : n, "config" : cfg, "elements" : [], "dec" : None,
+               "ingest_latencies" : [], "display_latencies" : [],
+               "stamps" : collections.deque(maxlen = 256), "stamp_misses" : 0}
+        tmp = self.mix_0.get_pad_template("sink_%u")
+        inp["pad"] = self.mix_0.request_pad(tmp, None, None)
+        
+        if uri is None:
+            inp["src"] = Gst.ElementFactory.make("videotestsrc", f"src_{n}")
+            flt = Gst.ElementFactory.make("capsfilter", f"flt_{n}")
+            inp["elements"].append(flt)
+        elif uri.startswith("rtp://"):
+            inp["src"] = Gst.ElementFactory.make("udpsrc", f"src_{n}")
+            jit = Gst.ElementFactory.make("rtpjitterbuffer", f"jit_{n}")
+            dep = Gst.ElementFactory.make("rtph264depay", f"dep_{n}")
+            inp["dec"] = Gst.ElementFactory.make("decodebin", f"dec_{n}")
+            inp["elements"] += [jit, dep, inp["dec"]]
+        else:
+            inp["src"] = Gst.ElementFactory.make("uridecodebin", f"src_{n}")
+            inp["dec"] = inp["src"]
+        
+        if not self.compositor:
+            scl = Gst.ElementFactory.make("videoscale", f"scl_{n}")
+            inp["elements"].append(scl)
+        
+        inp["elements"].insert(0, inp["src"])
+        
+        if None in (inp["pad"], *inp["elements"]):
+            print(f"ERROR : Unable to create input {n}!")
+            return None
+        
+        self.pip_0.add(*inp["elements"])
+        
+        # Link up to the decoder, if any, and from the decoder on. The decoder
+        # is linked dynamically to the sink pad of the input.
+        split = inp["elements"].index(inp["dec"]) + 1 if inp["dec"] else 0
+        head, chain = inp["elements"][:split], inp["elements"][split:]
+        inp["sink"] = chain[0].get_static_pad("sink") if chain else inp["pad"]
+        
+        ret = all(up.link(down) for up, down in zip(head, head[1:]))
+        ret = ret and all(up.link(down) for up, down in zip(chain, chain[1:]))
+        if chain:
+            ret = ret and (chain[-1].get_static_pad("src").link(inp["pad"])
+                           == Gst.PadLinkReturn.OK)
+        
+        if not ret:
+            print(f"ERROR : Unable to link input {n}!")
+            return None
+        
+        if uri is None:
+            pattern = cfg["pattern"]
+            if pattern is None:
+                pattern = self.TEST_PATTERNS[n % len(self.TEST_PATTERNS)]
+            inp["src"].set_property("pattern", pattern)
+            inp["src"].set_property("is-live", self.live)
+            caps = Gst.Caps.from_string(self.config["test_caps"])
+            flt.set_property("caps", caps)
+        elif uri.startswith("rtp://"):
+            host, _, port = uri[len("rtp://"):].rpartition(":")
+            inp["src"].set_property("address", host or "0.0.0.0")
+            inp["src"].set_property("port", int(port))
+            caps = Gst.Caps.from_string(self.config["rtp_caps"])
+            inp["src"].set_property("caps", caps)
+            jit.set_property("latency", self.config["latency"])
+            jit.set_property("drop-on-latency", True)
+        else:
+            inp["src"].set_property("uri", uri)
+            inp["src"].connect("source-setup", self.on_source_setup)
+        
+        if inp["dec"]:
+            inp["dec"].connect("pad-added", self.on_src_pad_added)
+        
+        if self.is_live(uri):
+            inp["sink"].add_probe(Gst.PadProbeType.BUFFER, self.on_live_buffer,
+                                  inp)
+        
+        self.configure_input(inp)
+        self.inputs.append(inp)
+        
+        for element in reversed(inp["elements"]):
+            element.sync_state_with_parent()
+        
+        if getattr(self, "box_1", None): self.add_slider(inp)
+        
+        return inp
+    
+    ############################################################################
+    
+    def overlay_configs(self):
+        """
+        Return the configuration of the overlays. Without an explicit list of
+        overlays, the logo is the only overlay.
+        """
+        if self.config["overlays"] is not None: return self.config["overlays"]
+        if not self.config["logo"]: return []
+        
+        return [{"location" : self.config["logo"]}]
+    
+    ############################################################################
+    
+    def add_overlay(self, cfg = None):
+        """
+        Add an overlay and return it, or None on failure. The entries of cfg
+        override those of OVERLAY_DEFAULTS. Logos are drawn from a pixbuf that
+        is decoded, and scaled for every resolution of the mix, only once.
+        Enabled overlays are spliced into the chain by splice_effects, disabled
+        ones are not part of the pipeline at all.
+        """
+        cfg = dict(self.OVERLAY_DEFAULTS, **(cfg or {}))
+        n = len(self.overlays)
+        factory = self.OVERLAY_FACTORIES.get(cfg["type"])
+        ovl = {"index" : n, "config" : cfg, "element" : None}
+        
+        if factory:
+            ovl["element"] = Gst.ElementFactory.make(factory, f"ovl_{n}")
+        
+        if ovl["element"] is None:
+            print(f"ERROR : Unable to create overlay {n}!")
+            return None
+        
+        element = ovl["element"]
+        
+        if cfg["type"] == "logo":
+            pixbuf = self.overlay_pixbuf(cfg["location"], None)
+            if pixbuf is None: return None
+            element.set_property("pixbuf", pixbuf)
+            element.set_property("offset-x", cfg["xpos"])
+            element.set_property("offset-y", cfg["ypos"])
+        else:
+            element.set_property("text", cfg["text"])
+            element.set_property("font-desc", cfg["font"])
+            element.set_property("halignment", cfg["halign"])
+            element.set_property("valignment", cfg["valign"])
+            element.set_property("xpad", cfg["xpos"])
+            element.set_property("ypad", cfg["ypos"])
+            element.set_property("shaded-background", cfg["type"] == "text")
+        
+        self.overlays.append(ovl)
+        
+        return ovl
+    
+    ############################################################################
+    
+    def overlay_pixbuf(self, location, width):
+        """
+        Return the logo at location scaled to width pixels (keeping its aspect
+        ratio, native size if None), or None on failure. Every logo is decoded
+        and scaled once per width, after which it is taken from PIXBUF_CACHE.
+        """
+        key = (location, width)
+        
+        if key not in self.PIXBUF_CACHE:
+            try:
+                pixbuf = GdkPixbuf.Pixbuf.new_from_file(location)
+            except GLib.Error as e:
+                print(f"ERROR : Unable to load '{location}' : {e.message}!")
+                return None
+            
+            if width:
+                height = max(1, round(pixbuf.get_height() * width /
+                                      pixbuf.get_width()))
+                pixbuf = pixbuf.scale_simple(width, height,
+                                             GdkPixbuf.InterpType.BILINEAR)
+            
+            self.PIXBUF_CACHE[key] = pixbuf
+        
+        return self.PIXBUF_CACHE[key]
+    
+    ############################################################################
+    
+    def is_live(self, uri):
+        """
+        Return whether uri refers to a live input, see LIVE_SCHEMES.
+        """
+        return uri is not None and uri.split("://")[0] in self.LIVE_SCHEMES
+    
+    ############################################################################
+    
+    def configure_input(self, inp, **changes):
+        """
+        Apply the configuration of an input to its mixer pad, after updating it
+        with changes (e.g. alpha, xpos, ypos or zorder). The compositor pads
+        also scale their input and convert it using multiple threads. Sizes and
+        positions follow the scale of the canvas.
+        """
+        cfg = inp["config"]
+        cfg.update(changes)
+        pad = inp["pad"]
+        
+        scale = self.canvas_scale
+        
+        pad.set_property("alpha", cfg["alpha"])
+        pad.set_property("xpos", round(cfg["xpos"] * scale))
+        pad.set_property("ypos", round(cfg["ypos"] * scale))
+        if cfg["zorder"] is not None:
+            pad.set_property("zorder", cfg["zorder"])
+        
+        if self.compositor:
+            threads = self.config["threads"] or os.cpu_count()
+            pad.set_property("width", round(scale * (cfg["width"] or
+                                                     self.config["width"])))
+            pad.set_property("height", round(scale * (cfg["height"] or
+                                                      self.config["height"])))
+            if pad.find_property("converter-config"):
+                conv = Gst.Structure.new_from_string("GstVideoConverter, "
+                                                     f"threads=(uint){threads}")
+                pad.set_property("converter-config", conv)
+    
+    ############################################################################
+    
+    def remove_input(self, inp):
+        """
+        Remove an input from the mix while PLAYING. An EOS event on its mixer
+        pad makes the mixer ignore the input and its source stop pushing, after
+        which its elements are shut down and its pad is released from the main
+        loop.
+        """
+        if inp not in self.inputs: return
+        
+        self.inputs.remove(inp)
+        inp["pad"].send_event(Gst.Event.new_eos())
+        GLib.idle_add(self.release_input, inp)
+        
+        if "row" in inp: inp["row"].destroy()
+    
+    ############################################################################
+    
+    def release_input(self, inp):
+        """
+        Shut down the elements of a removed input and release its mixer pad.
+        """
+        for element in inp["elements"]:
+            element.set_state(Gst.State.NULL)
+            self.pip_0.remove(element)
+        
+        self.mix_0.release_request_pad(inp["pad"])
+        
+        return GLib.SOURCE_REMOVE
+    
+    ############################################################################
+    
     def build_ui(self):
         """
-        Build a simple user interface using Gtk in which the video and two
-        opacity sliders are shown.
+        Build a simple user interface using Gtk in which the video and an
+        opacity slider per input are shown.
         """    
         self.main_window = Gtk.Window.new(Gtk.WindowType.TOPLEVEL)
         self.main_window.connect("delete-event", Gtk.main_quit)
 
         self.video_window = Gtk.DrawingArea.new()
         
-        label_1 = Gtk.Label.new("Alpha 1")
-        adj_1 = Gtk.Adjustment.new(50, 0, 100, 0, 0, 0)
-        self.slider_1 = Gtk.Scale.new(Gtk.Orientation.HORIZONTAL, None)
-        self.slider_1.set_adjustment(adj_1)
-        self.slider_1.set_draw_value(False)
-        self.slider_1.connect("value-changed", self.on_slider_changed)
-        
-        label_2 = Gtk.Label.new("Alpha 2")
-        adj_2 = Gtk.Adjustment.new(50, 0, 100, 0, 0, 0)
-        self.slider_2 = Gtk.Scale.new(Gtk.Orientation.HORIZONTAL, None)
-        self.slider_2.set_adjustment(adj_2)
-        self.slider_2.set_draw_value(False)
-        self.slider_2.connect("value-changed", self.on_slider_changed)
-        
-        label_3 = Gtk.Label.new("Overlay")
-        self.check_3 = Gtk.CheckButton.new_with_label("Enabled")
-        self.check_3.set_active(True)
-        self.check_3.connect("toggled", self.on_checkbox_toggled, None)
+        label_3 = Gtk.Label.new("Overlay(s)")
+        checks_3 = []
+        for ovl in self.overlays:
+            cfg = ovl["config"]
+            check = Gtk.CheckButton.new_with_label(cfg["name"] or cfg["type"])
+            check.set_active(cfg["enabled"])
+            check.connect("toggled", self.on_overlay_toggled, ovl)
+            checks_3.append(check)
         
         label_4 = Gtk.Label.new("Effect(s)")
         self.scroll_4 = Gtk.ScrolledWindow.new()
         self.scroll_4.set_min_content_height(150)
         self.list_4 = Gtk.ListBox.new()
         self.scroll_4.add(self.list_4)        
+        self.checks_4 = []
+        costs, pairs = self.effect_costs()
         for i, effect_name in enumerate(self.EFFECT_NAMES):
             row = Gtk.ListBoxRow()
-            check = Gtk.CheckButton.new_with_label(effect_name)
-            check.set_tooltip_text(self.TOOLTIPS[effect_name])
+            label, tooltip = effect_name, self.TOOLTIPS[effect_name]
+            if effect_name in costs:
+                label += f" ({costs[effect_name]:.2f} ms)"
+                tooltip += f"\nCost: {costs[effect_name]:.2f} ms per frame"
+            for other, cost in pairs.get(effect_name, []):
+                tooltip += f"\nWith {other}: {cost:.2f} ms per frame"
+            check = Gtk.CheckButton.new_with_label(label)
+            check.set_tooltip_text(tooltip)
+            check.set_active(i in self.active)
             check.connect("toggled", self.on_checkbox_toggled, i)
+            self.checks_4.append(check)
             row.add(check)
             self.list_4.add(row)
+        
+        label_5 = Gtk.Label.new("Statistics")
+        self.label_5 = Gtk.Label.new("Waiting for statistics...")
+        self.label_5.set_xalign(0)
     
         box_0 = Gtk.Box(orientation = Gtk.Orientation.VERTICAL, spacing = 0)
-        box_1 = Gtk.Box(orientation = Gtk.Orientation.HORIZONTAL, spacing = 0)
-        box_2 = Gtk.Box(orientation = Gtk.Orientation.HORIZONTAL, spacing = 0)
+        self.box_1 = Gtk.Box(orientation = Gtk.Orientation.VERTICAL,
+                             spacing = 0)
         box_3 = Gtk.Box(orientation = Gtk.Orientation.HORIZONTAL, spacing = 7)
         box_4 = Gtk.Box(orientation = Gtk.Orientation.HORIZONTAL, spacing = 0)
+        box_5 = Gtk.Box(orientation = Gtk.Orientation.HORIZONTAL, spacing = 0)
         
         box_0.pack_start(self.video_window, True, True, 0)
-        box_0.pack_start(box_1, False, True, 0)
-        box_0.pack_start(box_2, False, True, 0)
+        box_0.pack_start(self.box_1, False, True, 0)
         box_0.pack_start(box_3, False, True, 0)
         box_0.pack_start(box_4, False, True, 0)
+        box_0.pack_start(box_5, False, True, 0)
         
-        box_1.pack_start(label_1, False, True, 10)
-        box_1.pack_start(self.slider_1, True, True, 10)
-        
-        box_2.pack_start(label_2, False, True, 10)
-        box_2.pack_start(self.slider_2, True, True, 10)
+        for inp in self.inputs:
+            self.add_slider(inp)
         
         box_3.pack_start(label_3, False, True, 10)
-        box_3.pack_start(self.check_3, True, True, 10)
+        for check in checks_3:
+            box_3.pack_start(check, False, True, 10)
         
         box_4.pack_start(label_4, False, True, 10)
         box_4.pack_start(self.scroll_4, True, True, 10)
         
+        if self.config["stats"]:
+            box_5.pack_start(label_5, False, True, 10)
+            box_5.pack_start(self.label_5, True, True, 10)
+        
         self.main_window.add(box_0)
         self.main_window.set_default_size(800, 600)
         self.main_window.show_all()
     
     ############################################################################
     
+    def add_slider(self, inp):
+        """
+        Add an opacity slider for the given input to the user interface.
+        """
+        label = Gtk.Label.new(f"Alpha {inp['index'] + 1}")
+        adj = Gtk.Adjustment.new(100 * inp["config"]["alpha"], 0, 100, 0, 0, 0)
+        slider = Gtk.Scale.new(Gtk.Orientation.HORIZONTAL, None)
+        slider.set_adjustment(adj)
+        slider.set_draw_value(False)
+        slider.connect("value-changed", self.on_slider_changed, inp)
+        
+        inp["row"] = Gtk.Box(orientation = Gtk.Orientation.HORIZONTAL,
+                             spacing = 0)
+        inp["row"].pack_start(label, False, True, 10)
+        inp["row"].pack_start(slider, True, True, 10)
+        self.box_1.pack_start(inp["row"], False, True, 0)
+        inp["row"].show_all()
+    
+    ############################################################################
+    
     def start(self):
         """
         Start streaming.
@@ -281,9 +1127,18 @@ class VideoMixer():
         if ret == Gst.StateChangeReturn.FAILURE:
             print("ERROR : Unable to change to playing state!")
         
-        Gtk.main()
+        if self.headless:
+            self.loop = GLib.MainLoop()
+            self.bench.start()
+            self.loop.run()
+            self.bench.stop()
+        else:
+            Gtk.main()
         
         self.stop()
+        
+        if self.headless:
+            self.bench.report()
     
     ############################################################################
     
@@ -292,25 +1147,196 @@ class VideoMixer():
         Stop streaming.
         """
         if self.pip_0:
+            conversions = self.count_conversions()
+            print(f"INFO : {len(conversions)} conversions in the negotiated "
+                  f"pipeline : {', '.join(conversions) or 'none'}!")
+            if self.headless: self.bench.conversions = len(conversions)
             self.pip_0.set_state(Gst.State.NULL)
             self.pip_0 = None
+        
+        if self.tap:
+            self.tap.stop()
+            self.tap.report()
+            self.tap = None
+        
+        if self.live: self.report_latency()
+    
+    ############################################################################
+    
+    def send_eos(self):
+        """
+        End the stream once enough buffers have been measured in headless mode.
+        The EOS event is sent to the sources such that the recording is
+        finalised properly.
+        """
+        if self.pip_0:
+            self.pip_0.send_event(Gst.Event.new_eos())
+        
+        return GLib.SOURCE_REMOVE
+    
+    ############################################################################
+    
+    def on_canvas_event(self, pad, info):
+        """
+        Swap in the logos scaled for the resolution of the mix whenever its
+        caps are set, before any frame of that resolution reaches them.
+        """
+        event = info.get_event()
+        if event.type != Gst.EventType.CAPS: return Gst.PadProbeReturn.OK
+        
+        width = event.parse_caps().get_structure(0).get_value("width")
+        
+        for ovl in self.overlays:
+            cfg = ovl["config"]
+            if cfg["type"] != "logo" or not cfg["scale"]: continue
+            
+            pixbuf = self.overlay_pixbuf(cfg["location"],
+                                         max(1, round(cfg["scale"] * width)))
+            if pixbuf: ovl["element"].set_property("pixbuf", pixbuf)
+        
+        return Gst.PadProbeReturn.OK
+    
+    ############################################################################
+    
+    def on_source_setup(self, bin, source):
+        """
+        Apply the latency target to the source of a live uridecodebin input,
+        e.g. srtsrc.
+        """
+        if source.find_property("latency"):
+            source.set_property("latency", self.config["latency"])
+        
+    ############################################################################
+    
+    def on_live_buffer(self, pad, info, inp):
+        """
+        Store the ingest latency of a decoded frame of a live input, i.e. the
+        time since the sender stamped it (see DMA_2_live.py) until it reaches
+        the mixer. Mixing blends, scales and moves the stamp, so it is also
+        kept by running time, for on_display_buffer to look up. The luma
+        layout is taken from the video meta of the buffer, as decoders may pad
+        their strides. Frames without a readable stamp are counted, and the
+        first one of every input is reported.
+        """
+        st = pad.get_current_caps().get_structure(0)
+        if st.get_value("format") not in LUMA_FORMATS:
+            return Gst.PadProbeReturn.OK
+        
+        buf = info.get_buffer()
+        width = st.get_value("width")
+        meta = GstVideo.buffer_get_video_meta(buf)
+        if meta: offset, stride = meta.offset[0], meta.stride[0]
+        else: offset, stride = 0, luma_stride(width)
+        
+        ok, mapinfo = buf.map(Gst.MapFlags.READ)
+        if not ok: return Gst.PadProbeReturn.OK
+        
+        value = read_stamp(mapinfo.data, stride, width, offset)
+        buf.unmap(mapinfo)
+        
+        latency = None if value is None else stamp_latency(value)
+        if latency is not None:
+            inp["ingest_latencies"].append(latency)
+            running_time = self.running_time(pad, buf.pts)
+            if running_time is not None:
+                inp["stamps"].append((running_time, value))
+            return Gst.PadProbeReturn.OK
+        
+        inp["stamp_misses"] += 1
+        if inp["stamp_misses"] == 1:
+            reason = "no stamp" if value is None else "stamp from another host"
+            print(f"INFO : Input {inp['index'] + 1} : unreadable latency "
+                  f"stamp ({reason}, stride {stride}"
+                  f"{'' if meta else ' assumed'})!")
+        
+        return Gst.PadProbeReturn.OK
     
     ############################################################################
     
+    def on_display_buffer(self, pad, info):
+        """
+        Store the glass-to-glass latency of every live input shown in a mixed
+        frame, i.e. the time since the sender stamped the latest frame of the
+        input at or before the running time of the mix, until the display sink
+        renders it. The mix keeps the running time of its inputs, by which the
+        stamps of on_live_buffer are looked up.
+        """
+        buf = info.get_buffer()
+        running_time = self.running_time(pad, buf.pts)
+        if running_time is None: return Gst.PadProbeReturn.OK
+        
+        # A synchronised sink renders the frame once its running time, plus
+        # the latency of the pipeline, is reached on the clock.
+        wait = 0
+        clock = self.snk_0.get_clock()
+        if clock and self.snk_0.get_property("sync"):
+            now = clock.get_time() - self.snk_0.get_base_time()
+            wait = max(running_time + self.snk_0.get_latency() - now, 0)
+        
+        for inp in self.inputs:
+            stamps, value = inp["stamps"], None
+            while stamps and stamps[0][0] <= running_time:
+                value = stamps.popleft()[1]
+            
+            latency = None if value is None else stamp_latency(value)
+            if latency is not None:
+                inp["display_latencies"].append(latency + wait / Gst.MSECOND)
+        
+        return Gst.PadProbeReturn.OK
+    
+    ############################################################################
+    
+    def running_time(self, pad, pts):
+        """
+        Return the running time of a timestamp in the segment of pad, or None
+        if unknown.
+        """
+        event = pad.get_sticky_event(Gst.EventType.SEGMENT, 0)
+        if event is None or pts == Gst.CLOCK_TIME_NONE: return None
+        
+        running_time = event.parse_segment().to_running_time(Gst.Format.TIME,
+                                                              pts)
+        
+        return None if running_time == Gst.CLOCK_TIME_NONE else running_time
+    
+    ############################################################################
+    
+    def report_latency(self):
+        """
+        Print the glass-to-glass and ingest latency distributions of every live
+        input with stamps, and the number of frames of which the stamp was
+        unreadable.
+        """
+        for inp in self.inputs:
+            lat = inp["ingest_latencies"]
+            if inp["stamp_misses"] and lat:
+                print(f"INFO : Input {inp['index'] + 1} : "
+                      f"{inp['stamp_misses']} frames without a readable "
+                      f"latency stamp!")
+            
+            for name, lat in (("glass-to-glass", inp["display_latencies"]),
+                              ("ingest", lat)):
+                if not lat: continue
+                
+                dist = ", ".join(f"p{p} {percentile(lat, p):.1f}"
+                                 for p in (50, 90, 99))
+                print(f"INFO : Input {inp['index'] + 1} : {len(lat)} frames, "
+                      f"{name} latency (ms) {dist}, max {max(lat):.1f}!")
+        
+    ############################################################################
+    
     def on_src_pad_added(self, src, new_pad):
         """
-        Dynamically link the source pads to the next pads (videoscale). This is
-        necessary since the demuxer cannot produce information until some data
-        is received and the container is inspected.
+        Dynamically link the source pads to the next pads (videoscale or
+        compositor). This is necessary since the demuxer cannot produce
+        information until some data is received and the container is inspected.
         """
         new_pad_name = new_pad.get_current_caps().get_structure(0).get_name()
         
         if not new_pad_name.startswith("video/x-raw"): return
             
-        if src == self.src_0:
-            sink_pad = self.scl_0.get_static_pad("sink")
-        elif src == self.src_1:
-            sink_pad = self.scl_1.get_static_pad("sink")
+        sink_pad = next((inp["sink"] for inp in self.inputs
+                         if inp["dec"] == src), None)
             
         if sink_pad and not sink_pad.is_linked():
             if new_pad.link(sink_pad) == Gst.PadLinkReturn.OK:
@@ -320,30 +1346,150 @@ class VideoMixer():
             
     ############################################################################
     
-    def on_slider_changed(self, range):
+    def on_slider_changed(self, range, inp):
         """
-        Update the opacity whenever the slider has changed.
+        Update the opacity of an input whenever its slider has changed.
         """
-        self.pad_0.set_property("alpha", self.slider_1.get_value() / 100)
-        self.pad_1.set_property("alpha", self.slider_2.get_value() / 100)
+        self.configure_input(inp, alpha = range.get_value() / 100)
         
     ############################################################################
         
     def on_checkbox_toggled(self, checkbox, data):
         """
-        Enable/disable effects based on the checkbox state. If data is None, the
-        overlay will be enabled/disabled.
+        Enable/disable the effect with index data based on the checkbox state.
         """
-        if data is None:
-            if checkbox.get_active():
-                self.pix_0.set_property("alpha", 1)
-            else:
-                self.pix_0.set_property("alpha", 0)
-        else:
-            if checkbox.get_active():
-                self.effects[data].set_passthrough(False)
+        if checkbox.get_active() and self.effect(data) is None:
+            checkbox.set_active(False)
+            return
+        
+        with self.chain_lock:
+            if checkbox.get_active() and data not in self.active:
+                self.active.append(data)
+            elif not checkbox.get_active() and data in self.active:
+                self.active.remove(data)
+        self.splice_effects()
+        
+    ############################################################################
+        
+    def set_effect(self, i, enabled):
+        """
+        Enable/disable effect i from code, keeping its checkbox in sync.
+        """
+        if not self.headless:
+            self.checks_4[i].set_active(enabled)
+            return
+        
+        if enabled and self.effect(i) is None: return
+        
+        with self.chain_lock:
+            if enabled and i not in self.active:
+                self.active.append(i)
+            elif not enabled and i in self.active:
+                self.active.remove(i)
+        self.splice_effects()
+        
+    ############################################################################
+        
+    def on_overlay_toggled(self, checkbox, ovl):
+        """
+        Enable/disable an overlay based on the checkbox state. A disabled
+        overlay is removed from the chain rather than made transparent, such
+        that it costs nothing.
+        """
+        with self.chain_lock:
+            ovl["config"]["enabled"] = checkbox.get_active()
+        self.splice_effects()
+        
+    ############################################################################
+    
+    def splice_effects(self):
+        """
+        Relink the effect chain such that it holds exactly the enabled effects,
+        in the order in which they were enabled, followed by the enabled
+        overlays. The relinking itself happens in on_chain_idle, once the src
+        pad of cap_0 is idle.
+        """
+        pad = self.cap_0.get_static_pad("src")
+        pad.add_probe(Gst.PadProbeType.IDLE, self.on_chain_idle)
+        
+    ############################################################################
+    
+    def on_chain_idle(self, pad, info):
+        """
+        Replace the current chain by the enabled effects and overlays while the
+        src pad of cap_0 is blocked. The chain contains no queues, so no buffer can
+        reside in any of the effects at this point and the switch is glitch-free
+        while PLAYING. Since cap_0 pins the format of the chain, no
+        renegotiation is needed either. Removed effects are released from the
+        main loop, as their state cannot be changed from the streaming thread.
+        Without lazy_effects, the chain holds every effect, in passthrough
+        while disabled, as the original pipeline did.
+        """
+        with self.chain_lock:
+            if self.config["lazy_effects"]:
+                new_chain = [self.effects[i] for i in self.active]
             else:
-                self.effects[data].set_passthrough(True)
+                new_chain = list(self.effects)
+                for i, eff in enumerate(self.effects):
+                    eff.set_passthrough(i not in self.active)
+            new_chain += [ovl["element"] for ovl in self.overlays
+                          if ovl["config"]["enabled"]]
+            
+            if new_chain == self.chain and pad.is_linked():
+                return Gst.PadProbeReturn.REMOVE
+            
+            old_links = [self.cap_0, *self.chain, self.chain_end]
+            for up, down in zip(old_links, old_links[1:]):
+                up.unlink(down)
+            
+            for eff in new_chain:
+                if eff.get_parent() is None: self.pip_0.add(eff)
+                eff.sync_state_with_parent()
+            
+            new_links = [self.cap_0, *new_chain, self.chain_end]
+            for up, down in zip(new_links, new_links[1:]):
+                if not up.link(down):
+                    print(f"ERROR : Unable to link '{up.get_name()}' to "
+                          f"'{down.get_name()}'!")
+            
+            for eff in self.chain:
+                if eff not in new_chain: GLib.idle_add(self.release_effect, eff)
+            
+            self.chain = new_chain
+            
+        return Gst.PadProbeReturn.REMOVE
+        
+    ############################################################################
+    
+    def release_effect(self, eff):
+        """
+        Shut down an effect that has been removed from the chain, unless it has
+        been enabled again in the meantime.
+        """
+        with self.chain_lock:
+            if eff not in self.chain and eff.get_parent() is not None:
+                eff.set_state(Gst.State.NULL)
+                eff.get_parent().remove(eff)
+        
+        return GLib.SOURCE_REMOVE
+        
+    ############################################################################
+    
+    def on_first_frame(self, pad, info):
+        """
+        Report the startup time, from process start to the first frame that
+        reaches the display sink. Afterwards, the plugins of the remaining
+        effects are loaded in the background.
+        """
+        startup = process_age()
+        print(f"INFO : First frame rendered after {startup:.3f} s!")
+        
+        if self.headless:
+            self.bench.startup = startup
+        elif self.config["lazy_effects"]:
+            threading.Thread(target = self.warm_effects, daemon = True).start()
+        
+        return Gst.PadProbeReturn.REMOVE
         
     ############################################################################
     
@@ -362,10 +1508,31 @@ class VideoMixer():
         elif msg.type == Gst.MessageType.EOS:
             eos = True
             print("INFO : End of stream reached!")
+            if self.headless: self.loop.quit()
         elif msg.type == Gst.MessageType.ERROR:
             err, dbg = msg.parse_error()
             print(f"ERROR : {msg.src.get_name()} {err.message}!")
             print(f"DEBUG INFO: {dbg}")
+            self.error = f"{msg.src.get_name()}: {err.message}"
+            if self.headless: self.loop.quit()
+        elif msg.type == Gst.MessageType.APPLICATION:
+            st = msg.get_structure()
+            if st.get_name() == "dma-stats":
+                if not self.headless:
+                    text = GLib.markup_escape_text(self.stats.table())
+                    self.label_5.set_markup(f"<tt>{text}</tt>")
+            elif st.get_name() == "dma-drops":
+                drops = ", ".join(f"{st.nth_field_name(i)} "
+                                  f"{st.get_value(st.nth_field_name(i))}"
+                                  for i in range(st.n_fields()))
+                print(f"INFO : Dropped frames : {drops}!")
+            elif st.get_name() == "dma-qos":
+                print(f"INFO : QoS : {st.get_value('action')} "
+                      f"{st.get_value('step')} {st.get_value('detail')}!")
+            elif st.get_name() == "dma-tap":
+                print(f"INFO : Frame tap : {st.get_value('event')} at "
+                      f"{st.get_value('pts'):.2f} s "
+                      f"({st.get_value('value'):.2f})!")
             
     ############################################################################
     
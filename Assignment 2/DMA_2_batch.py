@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+
+"""
+File name:  DMA_2_batch.py
+Author:     Gerbrand De Laender, Damon Verbeyst
+Date:       17/10/2026
+Email:      gerbrand.delaender@ugent.be, damon.verbeyst@ugent.be
+Brief:      E017920A, Design of Multimedia Applications, Assignment
+About:      Offline batch mixing. Every job of a job list is mixed, filtered and
+            transcoded by its own headless VideoMixer pipeline, which runs until
+            the end of stream of its inputs. The jobs are spread over a pool of
+            processes and a timing and failure report is written per job.
+"""
+
+################################################################################
+################################################################################
+
+import os, csv, json, time, pathlib, argparse, contextlib, functools
+import multiprocessing
+from DMA_2_3 import VideoMixer
+
+################################################################################
+################################################################################
+
+REPORT_FIELDS = ("name", "status", "error", "output", "size", "frames", "fps",
+                 "wall_time", "cpu_time")
+
+################################################################################
+
+def to_uri(location):
+    """
+    Return location as a URI, converting plain file paths.
+    """
+    if "://" in location: return location
+
+    return pathlib.Path(location).resolve().as_uri()
+
+################################################################################
+
+def job_name(job):
+    """
+    Return the name of a job, derived from its output if not given.
+    """
+    output = os.path.basename(job["output"])
+
+    return job.get("name") or os.path.splitext(output)[0]
+
+################################################################################
+
+def job_config(job, encoder):
+    """
+    Return the VideoMixer configuration of a job. A job holds the input uris
+    (URIs or file paths), their alphas, the effects, the logo (None disables
+    the overlay) and the output path. Its optional config entry overrides any
+    other VideoMixer setting.
+    """
+    uris = [to_uri(uri) for uri in job["uris"]]
+    alphas = job.get("alphas") or [None] * len(uris)
+    inputs = [{"uri" : uri} if alpha is None else {"uri" : uri,
+                                                    "alpha" : alpha}
+              for uri, alpha in zip(uris, alphas)]
+
+    config = {"name" : job_name(job), "headless" : True, "buffers" : 0,
+              "uris" : uris, "inputs" : inputs, "output" : job["output"],
+              "effects" : job.get("effects", []), "encoder" : encoder,
+              "logo" : job.get("logo", VideoMixer.DEFAULT_CONFIG["logo"])}
+    config.update(job.get("config", {}))
+
+    return config
+
+################################################################################
+
+def run_job(job, encoder, log_dir = None):
+    """
+    Run a single job in its own pipeline until the end of stream and return
+    its report. The output of the pipeline goes to a log file per job if
+    log_dir is given.
+    """
+    res = dict.fromkeys(REPORT_FIELDS, "")
+    res.update({"name" : job_name(job), "status" : "ok",
+                "output" : job.get("output", "")})
+    t_start = time.perf_counter()
+
+    try:
+        # The filesink does not create the directory of the output.
+        os.makedirs(os.path.dirname(res["output"]) or ".", exist_ok = True)
+
+        with contextlib.ExitStack() as stack:
+            if log_dir:
+                log = os.path.join(log_dir, f"{res['name']}.log")
+                f = stack.enter_context(open(log, "w"))
+                stack.enter_context(contextlib.redirect_stdout(f))
+            vm = VideoMixer(job_config(job, encoder))
+
+        bench = vm.bench.results()
+        res.update({key : bench[key] for key in ("frames", "fps",
+                                                 "cpu_time")})
+        if vm.error:
+            res.update({"status" : "failed", "error" : vm.error})
+        elif not os.path.exists(res["output"]):
+            res.update({"status" : "failed", "error" : "no output"})
+        else:
+            res["size"] = os.path.getsize(res["output"]) / 1024 ** 2
+    except SystemExit:
+        res.update({"status" : "failed",
+                    "error" : "unable to build the pipeline"})
+    except Exception as e:
+        res.update({"status" : "failed", "error" : repr(e)})
+
+    res["wall_time"] = time.perf_counter() - t_start
+
+    return res
+
+################################################################################
+
+def run_batch(jobs, workers, encoder, log_dir = None):
+    """
+    Run the jobs across a pool of worker processes and return their reports
+    in order of completion. Every job gets a fresh process, such that a
+    failing pipeline cannot affect the next job.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    run = functools.partial(run_job, encoder = encoder, log_dir = log_dir)
+    results = []
+
+    with ctx.Pool(workers, maxtasksperchild = 1) as pool:
+        for res in pool.imap_unordered(run, jobs):
+            results.append(res)
+            print(f"INFO : [{len(results)}/{len(jobs)}] {res['name']} "
+                  f"{res['status']} after {res['wall_time']:.1f} s"
+                  f"{' : ' + res['error'] if res['error'] else ''}!")
+
+    return results
+
+################################################################################
+
+def main():
+    parser = argparse.ArgumentParser(description = "Batch offline mixing of "
+                                     "a job list across a process pool.")
+    parser.add_argument("jobs", help = "JSON file with a list of jobs")
+    parser.add_argument("--workers", type = int, default = os.cpu_count(),
+                        help = "number of processes, the core count by "
+                        "default")
+    parser.add_argument("--encoder", default = "default",
+                        help = "encoder profile of the jobs")
+    parser.add_argument("--report", default = "batch_report.csv",
+                        help = "location of the CSV report")
+    parser.add_argument("--logs", default = None,
+                        help = "directory for the pipeline log of every job")
+    args = parser.parse_args()
+
+    with open(args.jobs) as f:
+        jobs = json.load(f)
+
+    for i, job in enumerate(jobs):
+        if "uris" not in job or "output" not in job:
+            parser.error(f"job {i} lacks uris or output")
+
+    if args.logs: os.makedirs(args.logs, exist_ok = True)
+
+    t_start = time.perf_counter()
+    results = run_batch(jobs, args.workers, args.encoder, args.logs)
+    wall = time.perf_counter() - t_start
+
+    with open(args.report, "w", newline = "") as f:
+        writer = csv.DictWriter(f, fieldnames = REPORT_FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+
+    failed = sum(res["status"] != "ok" for res in results)
+    print(f"INFO : {len(results) - failed} of {len(results)} jobs succeeded "
+          f"in {wall:.1f} s, see {args.report}!")
+
+################################################################################
+
+################################################################################
+if __name__ == "__main__":
+    main()
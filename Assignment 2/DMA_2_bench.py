@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+
+"""
+File name:  DMA_2_bench.py
+Author:     Gerbrand De Laender, Damon Verbeyst
+Date:       17/10/2026
+Email:      gerbrand.delaender@ugent.be, damon.verbeyst@ugent.be
+Brief:      E017920A, Design of Multimedia Applications, Assignment
+About:      Headless throughput and latency benchmark of the VideoMixer
+            pipelines. Every pipeline variant is run for a fixed number of
+            buffers, after which the sustained frame rate, the per-frame
+            latency percentiles and the consumed CPU time are reported.
+"""
+
+################################################################################
+################################################################################
+
+import os, csv, math, time, resource, argparse, multiprocessing, gi
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst, GLib
+
+################################################################################
+################################################################################
+
+# Fallback reference for process_age.
+T_IMPORT = time.perf_counter()
+
+################################################################################
+
+def percentile(values, p):
+    """
+    Return the p-th percentile (0 - 100) of values using linear interpolation
+    between the closest ranks.
+    """
+    if not values: return float("nan")
+
+    values = sorted(values)
+    k = (len(values) - 1) * p / 100
+    lo, hi = int(k), min(int(k) + 1, len(values) - 1)
+
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+################################################################################
+
+def resident_memory():
+    """
+    Return the resident set size of this process in MiB. The peak resident set
+    size is returned if the current one is not available.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"): return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+################################################################################
+
+def process_age():
+    """
+    Return the time in seconds since this process was started, with a
+    resolution of one clock tick. The time since this module was imported is
+    returned if the process start time is not available.
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            start = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return time.perf_counter() - T_IMPORT
+
+################################################################################
+################################################################################
+
+class PipelineBenchmark():
+
+    ############################################################################
+
+    PERCENTILES = (50, 90, 99)
+
+    ############################################################################
+
+    def __init__(self, name, n_buffers):
+        """
+        A PipelineBenchmark object timestamps every buffer entering (in_pad) and
+        leaving (out_pad) the measured part of a pipeline. Buffers are matched
+        on their presentation timestamp. Once n_buffers have entered, on_done
+        is called from the main loop such that the pipeline can be ended. If
+        n_buffers is 0, every buffer is measured until the end of stream.
+        """
+        self.name = name
+        self.n_buffers = n_buffers
+        self.n_in = 0
+        self.n_out = 0
+        self.t_in = {}
+        self.latencies = []
+        self.t_first = None
+        self.t_last = None
+        self.cpu_time = 0
+        self.wall_time = 0
+        self.memory = 0
+        self.startup = float("nan")
+        self.conversions = None
+        self.on_done = None
+
+    ############################################################################
+
+    def attach(self, in_pad, out_pad, on_done):
+        """
+        Install the buffer probes on in_pad and out_pad.
+        """
+        self.on_done = on_done
+        in_pad.add_probe(Gst.PadProbeType.BUFFER, self.on_in_buffer)
+        out_pad.add_probe(Gst.PadProbeType.BUFFER, self.on_out_buffer)
+
+    ############################################################################
+
+    def start(self):
+        """
+        Start measuring CPU and wall clock time.
+        """
+        self._cpu_start = time.process_time()
+        self._wall_start = time.perf_counter()
+
+    ############################################################################
+
+    def stop(self):
+        """
+        Stop measuring CPU and wall clock time and sample the memory usage,
+        while the pipeline is still allocated.
+        """
+        self.cpu_time = time.process_time() - self._cpu_start
+        self.wall_time = time.perf_counter() - self._wall_start
+        self.memory = resident_memory()
+
+    ############################################################################
+
+    def on_in_buffer(self, pad, info):
+        """
+        Timestamp a buffer entering the measured part of the pipeline.
+        """
+        if self.n_buffers and self.n_in >= self.n_buffers:
+            return Gst.PadProbeReturn.OK
+
+        self.t_in[info.get_buffer().pts] = time.perf_counter()
+        self.n_in += 1
+
+        if self.n_in == self.n_buffers and self.on_done:
+            GLib.idle_add(self.on_done)
+
+        return Gst.PadProbeReturn.OK
+
+    ############################################################################
+
+    def on_out_buffer(self, pad, info):
+        """
+        Timestamp a buffer leaving the measured part of the pipeline and store
+        its latency.
+        """
+        now = time.perf_counter()
+        t_in = self.t_in.pop(info.get_buffer().pts, None)
+
+        if t_in is None: return Gst.PadProbeReturn.OK
+
+        self.latencies.append(now - t_in)
+        self.n_out += 1
+        self.t_last = now
+        if self.t_first is None: self.t_first = now
+
+        return Gst.PadProbeReturn.OK
+
+    ############################################################################
+
+    def results(self):
+        """
+        Return the measured figures as a dictionary. Latencies are expressed in
+        milliseconds, times in seconds and memory in MiB. The startup time, from
+        process start to the first rendered frame, and the number of video
+        conversions are set by the pipeline.
+        """
+        duration = (self.t_last or 0) - (self.t_first or 0)
+        fps = (self.n_out - 1) / duration if duration > 0 else float("nan")
+        lat = [1000 * l for l in self.latencies]
+
+        res = {"name" : self.name, "frames" : self.n_out, "fps" : fps,
+               "cpu_time" : self.cpu_time, "wall_time" : self.wall_time,
+               "memory" : self.memory, "startup" : self.startup,
+               "conversions" : self.conversions}
+        for p in self.PERCENTILES:
+            res[f"lat_p{p}"] = percentile(lat, p)
+        res["lat_max"] = max(lat) if lat else float("nan")
+
+        return res
+
+    ############################################################################
+
+    def report(self):
+        """
+        Print the measured figures.
+        """
+        res = self.results()
+        lat = ", ".join(f"p{p} {res[f'lat_p{p}']:.2f}" for p in self.PERCENTILES)
+        cpu = 100 * res["cpu_time"] / res["wall_time"] if res["wall_time"] else 0
+
+        print(f"INFO : {self.name} : {res['frames']} frames, "
+              f"{res['fps']:.1f} fps sustained!")
+        print(f"INFO : {self.name} : latency (ms) {lat}, "
+              f"max {res['lat_max']:.2f}!")
+        print(f"INFO : {self.name} : CPU time {res['cpu_time']:.2f} s "
+              f"({cpu:.0f} % of {res['wall_time']:.2f} s wall time), "
+              f"{res['memory']:.0f} MiB resident!")
+
+################################################################################
+################################################################################
+
+SD_CAPS = "video/x-raw,width=720,height=576,framerate=25/1"
+HD_CAPS = "video/x-raw,width=1920,height=1080,framerate=25/1"
+
+def grid_inputs(n, width, height):
+    """
+    Return the configuration of n test inputs tiled in a grid on a canvas of
+    the given size.
+    """
+    cols = math.ceil(math.sqrt(n))
+    rows = math.ceil(n / cols)
+    w, h = width // cols, height // rows
+    
+    return [{"alpha" : 1.0, "xpos" : (i % cols) * w, "ypos" : (i // cols) * h,
+             "width" : w, "height" : h} for i in range(n)]
+
+################################################################################
+
+def grid_overlays(n, width, height):
+    """
+    Return the configuration of n logos, alternated with text overlays, tiled
+    in a grid on a canvas of the given size.
+    """
+    cols = math.ceil(math.sqrt(n)) if n else 1
+    w, h = width // cols, height // cols
+
+    return [{"type" : "logo" if i % 2 == 0 else "text", "text" : f"Overlay {i}",
+             "scale" : 0.1, "xpos" : (i % cols) * w, "ypos" : (i // cols) * h}
+            for i in range(n)]
+
+################################################################################
+
+# Pipeline variants as (name, module, configuration).
+VARIANTS = (
+    ("videomixer SD", "DMA_2_2", {"test_caps" : SD_CAPS}),
+    ("compositor SD", "DMA_2_2", {"test_caps" : SD_CAPS,
+                                  "backend" : "compositor",
+                                  "width" : 720, "height" : 576}),
+    ("videomixer 1080p", "DMA_2_2", {"test_caps" : HD_CAPS}),
+    ("compositor 1080p", "DMA_2_2", {"test_caps" : HD_CAPS,
+                                     "backend" : "compositor",
+                                     "width" : 1920, "height" : 1080}),
+    ("mix+overlay", "DMA_2_3", {}),
+    ("mix+agingtv", "DMA_2_3", {"effects" : ["agingtv"]}),
+    ("mix+warptv+kaleidoscope", "DMA_2_3", {"effects" : ["warptv",
+                                                          "kaleidoscope"]}) )
+
+# Input scaling variants, mixing 2 to 16 inputs on a 720p canvas.
+VARIANTS += tuple((f"compositor {n} inputs", "DMA_2_3",
+                   {"backend" : "compositor", "width" : 1280, "height" : 720,
+                    "inputs" : grid_inputs(n, 1280, 720)})
+                  for n in (2, 4, 8, 16))
+
+# Overlay scaling variants, blending 0 to 16 overlays on a 720p canvas.
+VARIANTS += tuple((f"compositor {n} overlays", "DMA_2_3",
+                   {"backend" : "compositor", "width" : 1280, "height" : 720,
+                    "overlays" : grid_overlays(n, 1280, 720)})
+                  for n in (0, 1, 2, 4, 8, 16))
+
+# Startup variants, building the full effect chain up front or creating
+# effects on first use.
+STARTUP_VARIANTS = (("startup eager", "DMA_2_3", {"lazy_effects" : False}),
+                    ("startup lazy", "DMA_2_3", {"lazy_effects" : True}))
+
+# Rendition (ABR) ladder, recorded from a 1080p compositor mix.
+LADDER = ({"height" : 1080, "width" : 1920, "bitrate" : 6000},
+          {"height" : 720, "width" : 1280, "bitrate" : 3000},
+          {"height" : 480, "width" : 854, "bitrate" : 1200})
+LADDER_CONFIG = {"test_caps" : HD_CAPS, "backend" : "compositor",
+                 "width" : 1920, "height" : 1080}
+
+################################################################################
+
+def run_variants(variants, base_config):
+    """
+    Run every variant headless and return a list with the results of each.
+    Every variant gets a fresh process, such that its resident memory does not
+    include the plugins and leftovers of the variants before it. The variants
+    run one after the other, such that they do not compete for the CPU.
+    """
+    ctx = multiprocessing.get_context("spawn")
+
+    with ctx.Pool(1, maxtasksperchild = 1) as pool:
+        return pool.starmap(run_variant, [(v, base_config) for v in variants])
+
+################################################################################
+
+def run_variant(variant, base_config):
+    """
+    Run a single variant headless and return its results.
+    """
+    name, module, config = variant
+    mixer = __import__(module).VideoMixer
+    vm = mixer(dict(base_config, headless = True, name = name, **config))
+
+    return vm.bench.results()
+
+################################################################################
+
+def run_ladder(base_config):
+    """
+    Record LADDER once from a single decode and mix, and once as one process
+    per rendition that each decode and mix on their own. Return the results of
+    both, with the aggregate throughput as the number of encoded frames over
+    all renditions per second of wall time.
+    """
+    config = dict(base_config, **LADDER_CONFIG)
+    root, ext = os.path.splitext(config["output"])
+
+    t_start = time.perf_counter()
+    shared = run_variants([("ladder shared", "DMA_2_3",
+                            {"renditions" : list(LADDER)})], config)[0]
+    wall = time.perf_counter() - t_start
+    shared["fps"] = len(LADDER) * shared["frames"] / wall
+    shared["wall_time"] = wall
+
+    variants = []
+    for rung in LADDER:
+        output = config["output"]
+        if output != os.devnull: output = f"{root}_{rung['height']}p{ext}"
+        variants.append((f"ladder {rung['height']}p", "DMA_2_3",
+                         {"renditions" : [rung], "output" : output}))
+
+    # Spawn rather than fork, GStreamer and GLib do not survive a fork.
+    ctx = multiprocessing.get_context("spawn")
+    t_start = time.perf_counter()
+    with ctx.Pool(len(variants)) as pool:
+        parts = pool.starmap(run_variant, [(v, config) for v in variants])
+    wall = time.perf_counter() - t_start
+
+    separate = {key : sum(part[key] for part in parts)
+                for key in ("frames", "cpu_time", "memory")}
+    separate.update({"name" : "ladder separate", "wall_time" : wall,
+                     "fps" : separate["frames"] / wall})
+
+    for res in (shared, separate):
+        print(f"INFO : {res['name']} : {res['frames']} frames, "
+              f"{res['fps']:.1f} fps aggregate, {res['cpu_time']:.2f} s CPU "
+              f"time, {res['wall_time']:.2f} s wall time, "
+              f"{res['memory']:.0f} MiB resident!")
+
+    return [shared, separate]
+
+################################################################################
+
+def run_startup(base_config, runs):
+    """
+    Run every startup variant runs times, each in a fresh process such that
+    plugin loading is included, and return the results of the run with the
+    median startup time of each.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+
+    for variant in STARTUP_VARIANTS:
+        parts = []
+        for _ in range(runs):
+            with ctx.Pool(1) as pool:
+                parts.append(pool.apply(run_variant, (variant, base_config)))
+
+        parts.sort(key = lambda res: res["startup"])
+        res = parts[len(parts) // 2]
+        results.append(res)
+
+        print(f"INFO : {res['name']} : first frame after "
+              f"{1000 * res['startup']:.0f} ms (median of {runs}), "
+              f"{res['memory']:.0f} MiB resident!")
+
+    return results
+
+################################################################################
+
+def main():
+    parser = argparse.ArgumentParser(description = "Headless VideoMixer "
+                                     "throughput and latency benchmark.")
+    parser.add_argument("--buffers", type = int, default = 500,
+                        help = "number of mixed buffers per variant")
+    parser.add_argument("--uri", action = "append", dest = "uris",
+                        help = "input URI (twice), videotestsrc if omitted")
+    parser.add_argument("--caps", default = None,
+                        help = "caps of the videotestsrc inputs, unless the "
+                        "variant fixes them")
+    parser.add_argument("--output", default = os.devnull,
+                        help = "location of the recording")
+    parser.add_argument("--variant", action = "append",
+                        help = "only run the named variant(s)")
+    parser.add_argument("--ladder", action = "store_true",
+                        help = "compare recording the rendition ladder from "
+                        "one mix against one process per rendition")
+    parser.add_argument("--startup", type = int, default = 0, metavar = "RUNS",
+                        help = "compare the startup time with effects created "
+                        "up front or on first use, over RUNS processes each")
+    parser.add_argument("--csv", default = None,
+                        help = "append the results to this CSV file")
+    args = parser.parse_args()
+
+    if args.uris is not None and len(args.uris) != 2:
+        parser.error("exactly two --uri arguments are required")
+
+    base_config = {"buffers" : args.buffers, "uris" : args.uris,
+                   "output" : args.output}
+    if args.caps: base_config["test_caps"] = args.caps
+
+    if args.startup:
+        results = run_startup(base_config, args.startup)
+    elif args.ladder:
+        results = run_ladder(base_config)
+    else:
+        variants = [v for v in VARIANTS
+                    if not args.variant or v[0] in args.variant]
+        results = run_variants(variants, base_config)
+
+    if args.csv and results:
+        new = not os.path.exists(args.csv)
+        with open(args.csv, "a", newline = "") as f:
+            writer = csv.DictWriter(f, fieldnames = list(results[0]))
+            if new: writer.writeheader()
+            writer.writerows(results)
+
+################################################################################
+
+################################################################################
+if __name__ == "__main__":
+    main()
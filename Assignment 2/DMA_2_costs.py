@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+
+"""
+File name:  DMA_2_costs.py
+Author:     Gerbrand De Laender, Damon Verbeyst
+Date:       17/10/2026
+Email:      gerbrand.delaender@ugent.be, damon.verbeyst@ugent.be
+Brief:      E017920A, Design of Multimedia Applications, Assignment
+About:      Cost benchmark of the VideoMixer effects. Every effect, and a
+            selection of pairs, processes a videotestsrc at several resolutions
+            in a process of its own. The processing time per frame and the peak
+            memory are stored in a table, which the effect list of the
+            VideoMixer shows.
+"""
+
+################################################################################
+################################################################################
+
+import csv, resource, argparse, multiprocessing, gi
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst, GLib
+from DMA_2_bench import PipelineBenchmark
+from DMA_2_3 import VideoMixer
+
+################################################################################
+################################################################################
+
+FIELDS = ("effects", "width", "height", "frames", "ns_per_frame",
+          "peak_memory")
+
+RESOLUTIONS = ((720, 576), (1280, 720), (1920, 1080))
+
+# Combinations that are commonly enabled together.
+PAIRS = (("vertigotv", "warptv"), ("warptv", "kaleidoscope"),
+         ("vertigotv", "kaleidoscope"), ("agingtv", "edgetv"),
+         ("dicetv", "rippletv"))
+
+################################################################################
+
+def measure(effects, width, height, n_buffers):
+    """
+    Run a videotestsrc through the effects and return the median processing
+    time per frame (empty if no frame came through) and the peak memory of
+    this process. Runs in a fresh process, such that the peak memory belongs
+    to this measurement only.
+    """
+    Gst.init(None)
+    pipeline = Gst.parse_launch(
+        f"videotestsrc pattern=ball num-buffers={n_buffers} ! "
+        f"video/x-raw,format={VideoMixer.DEFAULT_CONFIG['format']},"
+        f"width={width},height={height},framerate=25/1 ! " +
+        " ! ".join(f"{name} name=eff_{i}" for i, name in enumerate(effects)) +
+        " ! fakesink sync=false")
+
+    first = pipeline.get_by_name("eff_0")
+    last = pipeline.get_by_name(f"eff_{len(effects) - 1}")
+    bench = PipelineBenchmark("+".join(effects), n_buffers)
+    bench.attach(first.get_static_pad("sink"), last.get_static_pad("src"),
+                 None)
+
+    loop = GLib.MainLoop()
+    bus = pipeline.get_bus()
+    bus.add_signal_watch()
+    bus.connect("message::eos", lambda bus, msg: loop.quit())
+    bus.connect("message::error", lambda bus, msg: loop.quit())
+
+    pipeline.set_state(Gst.State.PLAYING)
+    loop.run()
+    pipeline.set_state(Gst.State.NULL)
+
+    res = bench.results()
+
+    return {"effects" : res["name"], "width" : width, "height" : height,
+            "frames" : res["frames"],
+            "ns_per_frame" : round(res["lat_p50"] * 1e6) if res["frames"]
+                             else "",
+            "peak_memory" : resource.getrusage(
+                resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+################################################################################
+
+def measure_job(job):
+    """
+    Unpack a job for measure.
+    """
+    return measure(*job)
+
+################################################################################
+
+def run_costs(combinations, resolutions, n_buffers):
+    """
+    Measure every combination of effects at every resolution and return the
+    results. The measurements run one after the other, such that they do not
+    compete for the CPU.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    jobs = [(effects, w, h, n_buffers) for effects in combinations
+            for w, h in resolutions]
+    results = []
+
+    with ctx.Pool(1, maxtasksperchild = 1) as pool:
+        for res in pool.imap(measure_job, jobs):
+            results.append(res)
+            name = f"{res['effects']} at {res['width']}x{res['height']}"
+            if res["ns_per_frame"] == "":
+                print(f"ERROR : {name} : no frames processed!")
+                continue
+            print(f"INFO : {name} : {res['ns_per_frame'] / 1e6:.2f} ms per "
+                  f"frame, {res['peak_memory']:.0f} MiB peak!")
+
+    return results
+
+################################################################################
+
+def main():
+    parser = argparse.ArgumentParser(description = "Cost benchmark of the "
+                                     "VideoMixer effects.")
+    parser.add_argument("--buffers", type = int, default = 200,
+                        help = "number of frames per measurement")
+    parser.add_argument("--effect", action = "append",
+                        help = "only measure the named effect(s), no pairs")
+    parser.add_argument("--output", default = VideoMixer.DEFAULT_CONFIG[
+                        "effect_costs"], help = "location of the CSV table")
+    args = parser.parse_args()
+
+    for name in args.effect or []:
+        if name not in VideoMixer.EFFECT_NAMES:
+            parser.error(f"unknown effect {name}")
+
+    if args.effect:
+        combinations = [(name,) for name in args.effect]
+    else:
+        combinations = [(name,) for name in VideoMixer.EFFECT_NAMES]
+        combinations += list(PAIRS)
+
+    results = run_costs(combinations, RESOLUTIONS, args.buffers)
+
+    with open(args.output, "w", newline = "") as f:
+        writer = csv.DictWriter(f, fieldnames = FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+
+################################################################################
+
+################################################################################
+if __name__ == "__main__":
+    main()
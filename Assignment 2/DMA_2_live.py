@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+
+"""
+File name:  DMA_2_live.py
+Author:     Gerbrand De Laender, Damon Verbeyst
+Date:       17/10/2026
+Email:      gerbrand.delaender@ugent.be, damon.verbeyst@ugent.be
+Brief:      E017920A, Design of Multimedia Applications, Assignment
+About:      Latency stamps for live ingest. The sender paints its capture time
+            as a row of black and white blocks into the luma of every frame,
+            which the VideoMixer reads back at the mixer input, after
+            decoding, and looks up by running time at the display. Both run
+            on the same host, such that they share the monotonic clock. Run as a script, a stamped RTP or SRT test sender
+            is started on loopback.
+"""
+
+################################################################################
+################################################################################
+
+import sys, time, threading, argparse, gi
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst, GLib
+
+################################################################################
+################################################################################
+
+STAMP_MARKER = 0xB2 # Distinguishes stamped frames from regular video.
+STAMP_BITS = 8 + 32 # Marker and capture time in microseconds, modulo 2^32.
+STAMP_BLOCK = 16 # Size in pixels of the block holding a single bit.
+BLACK, WHITE = 16, 235
+
+# Formats of which the first plane holds 8-bit luma.
+LUMA_FORMATS = ("I420", "YV12", "NV12", "NV21", "Y42B", "Y444", "GRAY8")
+
+################################################################################
+
+def now_us():
+    """
+    Return the monotonic clock in microseconds, modulo 2^32.
+    """
+    return time.monotonic_ns() // 1000 % 2 ** 32
+
+################################################################################
+
+def luma_stride(width):
+    """
+    Return the default stride of the luma plane for a frame width, i.e. that
+    of buffers without video meta.
+    """
+    return (width + 3) // 4 * 4
+
+################################################################################
+
+def write_stamp(data, stride, value):
+    """
+    Paint the marker and value in the top left corner of the luma plane held
+    by the writable buffer data.
+    """
+    word = STAMP_MARKER << 32 | value
+    row = bytearray()
+
+    for i in reversed(range(STAMP_BITS)):
+        row += bytes([WHITE if word >> i & 1 else BLACK]) * STAMP_BLOCK
+
+    for y in range(STAMP_BLOCK):
+        data[y * stride:y * stride + len(row)] = row
+
+################################################################################
+
+def read_stamp(data, stride, width, offset = 0):
+    """
+    Return the value stamped in the luma plane held by data, starting at
+    offset, or None if the frame is not stamped. The centre of every block is
+    sampled, which survives lossy coding of the flat blocks.
+    """
+    if width < STAMP_BITS * STAMP_BLOCK: return None
+
+    centre = offset + STAMP_BLOCK // 2 * stride + STAMP_BLOCK // 2
+    word = 0
+
+    for i in range(STAMP_BITS):
+        word = word << 1 | (data[centre + i * STAMP_BLOCK] > 128)
+
+    if word >> 32 != STAMP_MARKER: return None
+
+    return word & 0xFFFFFFFF
+
+################################################################################
+
+def stamp_latency(value):
+    """
+    Return the time in ms since a stamp was painted, or None if it lies in
+    the future (i.e. it was painted on another host).
+    """
+    age = (now_us() - value) % 2 ** 32
+
+    return age / 1000 if age < 2 ** 31 else None
+
+################################################################################
+################################################################################
+
+class StampedSender():
+
+    ############################################################################
+
+    def __init__(self, uri, width, height, framerate, bitrate):
+        """
+        A StampedSender object streams live H.264 video with latency stamps to
+        uri, either rtp://host:port (RTP over UDP) or srt://host:port (MPEG-TS
+        over SRT, listening for the VideoMixer to connect).
+        """
+        self.width = width
+        self.height = height
+        self.framerate = framerate
+        self.frame = 0
+
+        scheme, _, address = uri.partition("://")
+        host, _, port = address.rpartition(":")
+        if scheme == "rtp":
+            sink = (f"rtph264pay config-interval=1 pt=96 ! "
+                    f"udpsink host={host} port={port} sync=false")
+        elif scheme == "srt":
+            sink = (f"mpegtsmux ! srtsink uri=srt://:{port}?mode=listener "
+                    f"wait-for-connection=false sync=false")
+        else:
+            print(f"ERROR : Unsupported URI '{uri}'!")
+            sys.exit(1)
+
+        Gst.init(None)
+        self.pipeline = Gst.parse_launch(
+            f"appsrc name=src is-live=true format=time do-timestamp=true "
+            f"caps=video/x-raw,format=I420,width={width},height={height},"
+            f"framerate={framerate}/1 ! "
+            f"x264enc tune=zerolatency speed-preset=ultrafast "
+            f"bitrate={bitrate} key-int-max={framerate} ! {sink}")
+        self.src = self.pipeline.get_by_name("src")
+
+        # Mid-grey luma and neutral chroma.
+        self.blank = bytes([128]) * (luma_stride(width) * height +
+                                     2 * luma_stride(width // 2) *
+                                     (height // 2))
+
+    ############################################################################
+
+    def run(self):
+        """
+        Push stamped frames at the frame rate until interrupted.
+        """
+        self.pipeline.set_state(Gst.State.PLAYING)
+        loop = GLib.MainLoop()
+        threading.Thread(target = self.push, args = (loop,),
+                         daemon = True).start()
+
+        try:
+            loop.run()
+        except KeyboardInterrupt:
+            pass
+
+        self.pipeline.set_state(Gst.State.NULL)
+
+    ############################################################################
+
+    def push(self, loop):
+        """
+        Paint the capture time into every frame just before pushing it, with a
+        bar moving across the frame to show the stream is live.
+        """
+        stride = luma_stride(self.width)
+        period = 1 / self.framerate
+        t_next = time.monotonic()
+
+        while True:
+            data = bytearray(self.blank)
+            x = self.frame * 8 % self.width
+            for y in range(STAMP_BLOCK * 2, self.height):
+                data[y * stride + x:y * stride + min(x + 8, self.width)] = \
+                    bytes([WHITE]) * min(8, self.width - x)
+            write_stamp(data, stride, now_us())
+
+            buf = Gst.Buffer.new_wrapped(bytes(data))
+            ret = self.src.emit("push-buffer", buf)
+            if ret != Gst.FlowReturn.OK:
+                loop.quit()
+                return
+
+            self.frame += 1
+            t_next += period
+            time.sleep(max(0, t_next - time.monotonic()))
+
+################################################################################
+################################################################################
+
+def main():
+    parser = argparse.ArgumentParser(description = "Live test sender with "
+                                     "latency stamps for the VideoMixer.")
+    parser.add_argument("uri", nargs = "?", default = "rtp://127.0.0.1:5000",
+                        help = "rtp://host:port or srt://host:port")
+    parser.add_argument("--width", type = int, default = 720)
+    parser.add_argument("--height", type = int, default = 576)
+    parser.add_argument("--framerate", type = int, default = 25)
+    parser.add_argument("--bitrate", type = int, default = 4000,
+                        help = "kbit/s")
+    args = parser.parse_args()
+
+    StampedSender(args.uri, args.width, args.height, args.framerate,
+                  args.bitrate).run()
+
+################################################################################
+
+################################################################################
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+
+"""
+File name:  DMA_2_qos.py
+Author:     Gerbrand De Laender, Damon Verbeyst
+Date:       17/10/2026
+Email:      gerbrand.delaender@ugent.be, damon.verbeyst@ugent.be
+Brief:      E017920A, Design of Multimedia Applications, Assignment
+About:      Adaptive degradation of the VideoMixer. QoS messages of the sinks
+            tell when the pipeline falls behind real time, upon which the mix
+            is degraded one step at a time, in a fixed order. Steps are undone
+            once there is headroom again.
+"""
+
+################################################################################
+################################################################################
+
+import time, threading, gi
+gi.require_version('Gst', '1.0')
+gi.require_version('GstBase', '1.0')
+from gi.repository import Gst, GstBase, GLib
+
+################################################################################
+################################################################################
+
+class QosController():
+
+    ############################################################################
+
+    # Canvas scales of the compositor, from full to lowest resolution.
+    SCALES = (1.0, 0.75, 0.5)
+
+    # Weight of a new sample in the running average of the effect costs.
+    COST_WEIGHT = 0.1
+
+    ############################################################################
+
+    def __init__(self, mixer, interval, degrade_after, restore_after):
+        """
+        A QosController object degrades mixer whenever it has been late for
+        degrade_after consecutive intervals (in seconds), and restores the
+        latest step after restore_after consecutive intervals without being
+        late. The steps are, in order: disabling the most expensive active
+        effect (repeated while effects are active) and lowering the resolution
+        of the compositor canvas. The encoders are left alone: x264enc only
+        accepts a new speed-preset in READY, which restarts the stream with new
+        codec data that matroskamux refuses, and a lower bitrate hardly lowers
+        its CPU cost. Every decision is posted on the bus as a "dma-qos"
+        application message.
+        """
+        self.mixer = mixer
+        self.pipeline = mixer.pip_0
+        self.interval = interval
+        self.degrade_after = degrade_after
+        self.restore_after = restore_after
+        self.lock = threading.Lock()
+        self.late = 0
+        self.n_late = 0
+        self.n_ok = 0
+        self.steps = []
+        self.costs = {}
+        self.t_in = {}
+
+    ############################################################################
+
+    def attach(self):
+        """
+        Start watching the bus and evaluating every interval.
+        """
+        bus = self.pipeline.get_bus()
+        bus.connect("message", self.on_message)
+        GLib.timeout_add(int(1000 * self.interval), self.on_timeout)
+
+    ############################################################################
+
+    def on_message(self, bus, msg):
+        """
+        Count QoS messages of the sinks that render buffers late, i.e. behind
+        the clock. Frames dropped by the leaky display queue are not counted:
+        a mix of file inputs runs ahead of the clock at the pace of the
+        encoder, such that the queue drops frames with headroom to spare.
+        Latency changes are redistributed over the pipeline.
+        """
+        if msg.type == Gst.MessageType.QOS:
+            jitter, _, _ = msg.parse_qos_values()
+            if jitter > 0 and isinstance(msg.src, GstBase.BaseSink):
+                with self.lock: self.late += 1
+        elif msg.type == Gst.MessageType.LATENCY:
+            self.pipeline.recalculate_latency()
+            ok, live, lo, hi = self.pipeline.query_latency()
+            if ok:
+                self.post("latency", "pipeline", f"{lo / Gst.MSECOND:.1f} ms")
+
+    ############################################################################
+
+    def on_timeout(self):
+        """
+        Degrade or restore one step once the pipeline has been late, or not,
+        for long enough.
+        """
+        if self.pipeline.get_state(0)[1] == Gst.State.NULL:
+            return GLib.SOURCE_REMOVE
+
+        self.instrument()
+
+        with self.lock:
+            late, self.late = self.late, 0
+
+        if late:
+            self.n_late, self.n_ok = self.n_late + 1, 0
+        else:
+            self.n_late, self.n_ok = 0, self.n_ok + 1
+
+        if self.n_late >= self.degrade_after:
+            self.n_late = 0
+            self.degrade()
+        elif self.n_ok >= self.restore_after and self.steps:
+            self.n_ok = 0
+            self.restore()
+
+        return GLib.SOURCE_CONTINUE
+
+    ############################################################################
+
+    def instrument(self):
+        """
+        Time the active effects, such that the most expensive one is known.
+        """
+        for i in self.mixer.active:
+            eff = self.mixer.effects[i]
+            if eff is None or eff in self.costs: continue
+
+            self.costs[eff] = 0
+            eff.get_static_pad("sink").add_probe(Gst.PadProbeType.BUFFER,
+                                                 self.on_effect_in, eff)
+            eff.get_static_pad("src").add_probe(Gst.PadProbeType.BUFFER,
+                                                self.on_effect_out, eff)
+
+    ############################################################################
+
+    def on_effect_in(self, pad, info, eff):
+        """
+        Timestamp a buffer entering an effect.
+        """
+        self.t_in[eff] = time.perf_counter()
+
+        return Gst.PadProbeReturn.OK
+
+    ############################################################################
+
+    def on_effect_out(self, pad, info, eff):
+        """
+        Update the running average of the processing time of an effect.
+        """
+        t_in = self.t_in.pop(eff, None)
+        if t_in is not None:
+            cost = time.perf_counter() - t_in
+            self.costs[eff] += self.COST_WEIGHT * (cost - self.costs[eff])
+
+        return Gst.PadProbeReturn.OK
+
+    ############################################################################
+
+    def degrade(self):
+        """
+        Apply the first applicable degradation step.
+        """
+        mixer = self.mixer
+
+        if mixer.active:
+            i = max(mixer.active,
+                    key = lambda i: self.costs.get(mixer.effects[i], 0))
+            mixer.set_effect(i, False)
+            self.steps.append(("effect", i))
+            cost = 1000 * self.costs.get(mixer.effects[i], 0)
+            self.post("degrade", "effect",
+                      f"{mixer.EFFECT_NAMES[i]} ({cost:.2f} ms)")
+            return
+
+        scale = mixer.canvas_scale
+        lower = [s for s in self.SCALES if s < scale]
+        if mixer.compositor and mixer.rsz_0 and lower:
+            mixer.set_canvas_scale(lower[0])
+            self.steps.append(("resolution", scale))
+            self.post("degrade", "resolution", f"{lower[0]:.2f}")
+            return
+
+        self.post("exhausted", "none", "")
+
+    ############################################################################
+
+    def restore(self):
+        """
+        Undo the latest degradation step.
+        """
+        step, undo = self.steps.pop()
+        mixer = self.mixer
+
+        if step == "effect":
+            mixer.set_effect(undo, True)
+            self.post("restore", step, mixer.EFFECT_NAMES[undo])
+        elif step == "resolution":
+            mixer.set_canvas_scale(undo)
+            self.post("restore", step, f"{undo:.2f}")
+
+    ############################################################################
+
+    def post(self, action, step, detail):
+        """
+        Post a "dma-qos" application message describing a decision.
+        """
+        st = Gst.Structure.new_empty("dma-qos")
+        st.set_value("action", action)
+        st.set_value("step", step)
+        st.set_value("detail", detail)
+        self.pipeline.post_message(Gst.Message.new_application(self.pipeline,
+                                                               st))
+
+################################################################################
+################################################################################
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+
+"""
+File name:  DMA_2_stats.py
+Author:     Gerbrand De Laender, Damon Verbeyst
+Date:       17/10/2026
+Email:      gerbrand.delaender@ugent.be, damon.verbeyst@ugent.be
+Brief:      E017920A, Design of Multimedia Applications, Assignment
+About:      Per-element instrumentation of the VideoMixer pipeline. Buffer
+            rates, processing latencies and queue fill levels are collected
+            using pad probes, dumped periodically as JSON or CSV and published
+            on the pipeline bus.
+"""
+
+################################################################################
+################################################################################
+
+import csv, json, time, threading, gi
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst, GLib
+from DMA_2_bench import percentile
+
+################################################################################
+################################################################################
+
+class PipelineStats():
+
+    ############################################################################
+
+    FIELDS = ("time", "element", "fps", "lat_mean", "lat_p95", "lat_max",
+              "level_buffers", "level_time")
+
+    # Pending timestamps per element, bounded for elements that drop buffers.
+    MAX_PENDING = 256
+
+    ############################################################################
+
+    def __init__(self, pipeline, interval, location = None):
+        """
+        A PipelineStats object installs buffer probes on every pad of every
+        element in pipeline, including elements and pads added later on. Every
+        interval seconds, the figures are dumped to location (CSV if it ends in
+        .csv, JSON lines otherwise) and a "dma-stats" application message is
+        posted on the bus of pipeline.
+        """
+        self.pipeline = pipeline
+        self.interval = interval
+        self.location = location
+        self.lock = threading.Lock()
+        self.records = {}
+        self.snapshot = []
+        self.t_start = self.t_last = time.perf_counter()
+
+    ############################################################################
+
+    def attach(self):
+        """
+        Instrument the current elements and start the periodic dump. The output
+        file, if any, is truncated.
+        """
+        for element in self.pipeline.iterate_elements():
+            self.instrument(element)
+
+        self.pipeline.connect("element-added", self.on_element_added)
+        GLib.timeout_add(int(1000 * self.interval), self.on_timeout)
+
+        if self.location:
+            with open(self.location, "w", newline = "") as f:
+                if self.location.endswith(".csv"):
+                    csv.DictWriter(f, fieldnames = self.FIELDS).writeheader()
+
+    ############################################################################
+
+    def instrument(self, element):
+        """
+        Install the buffer probes on all pads of an element, once.
+        """
+        name = element.get_name()
+        rec = self.records.get(name)
+
+        if rec is not None and rec["element"] == element: return
+
+        rec = {"element" : element, "in" : 0, "out" : 0, "lat" : [],
+               "t_in" : {}}
+        self.records[name] = rec
+
+        for pad in element.pads:
+            self.instrument_pad(pad, rec)
+        element.connect("pad-added", self.on_pad_added, rec)
+
+    ############################################################################
+
+    def instrument_pad(self, pad, rec):
+        """
+        Install a buffer probe on a single pad.
+        """
+        if pad.get_direction() == Gst.PadDirection.SINK:
+            pad.add_probe(Gst.PadProbeType.BUFFER, self.on_sink_buffer, rec)
+        else:
+            pad.add_probe(Gst.PadProbeType.BUFFER, self.on_src_buffer, rec)
+
+    ############################################################################
+
+    def on_element_added(self, bin, element):
+        """
+        Instrument elements that are added while running, e.g. effects.
+        """
+        self.instrument(element)
+
+    ############################################################################
+
+    def on_pad_added(self, element, pad, rec):
+        """
+        Instrument pads that are added while running, e.g. request pads.
+        """
+        self.instrument_pad(pad, rec)
+
+    ############################################################################
+
+    def on_sink_buffer(self, pad, info, rec):
+        """
+        Timestamp a buffer entering an element.
+        """
+        with self.lock:
+            rec["in"] += 1
+            if len(rec["t_in"]) > self.MAX_PENDING: rec["t_in"].clear()
+            rec["t_in"][info.get_buffer().pts] = time.perf_counter()
+
+        return Gst.PadProbeReturn.OK
+
+    ############################################################################
+
+    def on_src_buffer(self, pad, info, rec):
+        """
+        Timestamp a buffer leaving an element. The processing latency is the
+        time since the buffer with the same timestamp entered the element.
+        """
+        now = time.perf_counter()
+
+        with self.lock:
+            rec["out"] += 1
+            t_in = rec["t_in"].pop(info.get_buffer().pts, None)
+            if t_in is not None: rec["lat"].append(now - t_in)
+
+        return Gst.PadProbeReturn.OK
+
+    ############################################################################
+
+    def collect(self):
+        """
+        Return the figures of every element since the previous call. The rate
+        is expressed per src pad (per sink pad for sinks), latencies in ms.
+        """
+        now = time.perf_counter()
+        dt, self.t_last = now - self.t_last, now
+        rows = []
+
+        for name, rec in sorted(self.records.items()):
+            element = rec["element"]
+            if element.get_parent() is None: continue
+
+            with self.lock:
+                n_in, n_out, lat = rec["in"], rec["out"], rec["lat"]
+                rec["in"], rec["out"], rec["lat"] = 0, 0, []
+
+            n_src, n_sink = len(element.srcpads), len(element.sinkpads)
+            rate = n_out / n_src if n_src else n_in / max(n_sink, 1)
+            lat = [1000 * l for l in lat]
+
+            row = dict.fromkeys(self.FIELDS)
+            row.update({"time" : round(now - self.t_start, 3),
+                        "element" : name, "fps" : rate / dt if dt else 0})
+            if lat:
+                row["lat_mean"] = sum(lat) / len(lat)
+                row["lat_p95"] = percentile(lat, 95)
+                row["lat_max"] = max(lat)
+            if element.get_factory().get_name() == "queue":
+                row["level_buffers"] = element.get_property(
+                    "current-level-buffers")
+                row["level_time"] = element.get_property(
+                    "current-level-time") / Gst.MSECOND
+
+            rows.append(row)
+
+        return rows
+
+    ############################################################################
+
+    def on_timeout(self):
+        """
+        Dump the figures and publish them on the bus, until the pipeline has
+        been stopped.
+        """
+        if self.pipeline.get_state(0)[1] == Gst.State.NULL:
+            return GLib.SOURCE_REMOVE
+
+        self.snapshot = self.collect()
+        self.write(self.snapshot)
+
+        st = Gst.Structure.new_empty("dma-stats")
+        for row in self.snapshot:
+            st.set_value(f"{row['element']}-fps", float(row["fps"]))
+            if row["lat_mean"] is not None:
+                st.set_value(f"{row['element']}-latency", row["lat_mean"])
+        self.pipeline.post_message(Gst.Message.new_application(self.pipeline,
+                                                               st))
+
+        return GLib.SOURCE_CONTINUE
+
+    ############################################################################
+
+    def write(self, rows):
+        """
+        Append the figures to the output file, if any.
+        """
+        if not self.location: return
+
+        with open(self.location, "a", newline = "") as f:
+            if self.location.endswith(".csv"):
+                csv.DictWriter(f, fieldnames = self.FIELDS).writerows(rows)
+            else:
+                f.write(json.dumps(rows) + "\n")
+
+    ############################################################################
+
+    def table(self):
+        """
+        Return the latest figures as a fixed-width text table.
+        """
+        lines = [f"{'element':<10}{'fps':>8}{'lat ms':>9}{'max ms':>9}"
+                 f"{'queue':>16}"]
+
+        for row in self.snapshot:
+            lat = "" if row["lat_mean"] is None else f"{row['lat_mean']:.2f}"
+            top = "" if row["lat_max"] is None else f"{row['lat_max']:.2f}"
+            que = "" if row["level_buffers"] is None else \
+                  f"{row['level_buffers']} / {row['level_time']:.0f} ms"
+            lines.append(f"{row['element']:<10}{row['fps']:>8.1f}{lat:>9}"
+                         f"{top:>9}{que:>16}")
+
+        return "\n".join(lines)
+
+################################################################################
+################################################################################
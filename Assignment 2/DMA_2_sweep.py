@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+
+"""
+File name:  DMA_2_sweep.py
+Author:     Gerbrand De Laender, Damon Verbeyst
+Date:       17/10/2026
+Email:      gerbrand.delaender@ugent.be, damon.verbeyst@ugent.be
+Brief:      E017920A, Design of Multimedia Applications, Assignment
+About:      Speed/quality sweep of the x264 encoder profiles of the VideoMixer.
+            A fixed clip is mixed and encoded under every profile, after which
+            the encoding frame rate, the output size and the PSNR and SSIM with
+            respect to a lossless recording of the same mix are reported.
+"""
+
+################################################################################
+################################################################################
+
+import os, sys, csv, argparse, numpy as np, gi
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst
+from DMA_2_bench import run_variants
+from DMA_2_3 import VideoMixer
+
+################################################################################
+################################################################################
+
+PULL_TIMEOUT = 10 * Gst.SECOND # Longest wait for a decoded frame.
+
+################################################################################
+
+def decode_luma(location):
+    """
+    Decode a recording and yield the luma plane of every frame as a uint8
+    array. Raise a RuntimeError if decoding fails or stalls.
+    """
+    pipeline = Gst.parse_launch("filesrc name=src ! decodebin ! videoconvert "
+                                "! video/x-raw,format=GRAY8 ! "
+                                "appsink name=sink sync=false")
+    pipeline.get_by_name("src").set_property("location", location)
+    sink = pipeline.get_by_name("sink")
+    bus = pipeline.get_bus()
+    pipeline.set_state(Gst.State.PLAYING)
+
+    try:
+        while True:
+            # An error never reaches the appsink, so the bus is checked.
+            sample = sink.emit("try-pull-sample", PULL_TIMEOUT)
+            msg = bus.pop_filtered(Gst.MessageType.ERROR)
+            if msg:
+                err, _ = msg.parse_error()
+                raise RuntimeError(f"Unable to decode {location} : "
+                                   f"{err.message}")
+            if sample is None:
+                if sink.get_property("eos"): break
+                raise RuntimeError(f"No frame decoded from {location} in "
+                                   f"{PULL_TIMEOUT // Gst.SECOND} s")
+
+            buf = sample.get_buffer()
+            st = sample.get_caps().get_structure(0)
+            width, height = st.get_value("width"), st.get_value("height")
+
+            ok, info = buf.map(Gst.MapFlags.READ)
+            if not ok: continue
+            stride = info.size // height
+            luma = np.ndarray((height, width), dtype = np.uint8,
+                              buffer = info.data, strides = (stride, 1)).copy()
+            buf.unmap(info)
+
+            yield luma
+    finally:
+        pipeline.set_state(Gst.State.NULL)
+
+################################################################################
+
+def psnr(ref, img):
+    """
+    Return the PSNR in dB of img with respect to ref, inf if identical.
+    """
+    mse = np.mean((ref.astype(np.float64) - img.astype(np.float64)) ** 2)
+
+    return 10 * np.log10(255 ** 2 / mse) if mse else float("inf")
+
+################################################################################
+
+def box_mean(x, size):
+    """
+    Return the mean of x over every size by size window, using an integral
+    image.
+    """
+    s = np.pad(x, ((1, 0), (1, 0))).cumsum(0).cumsum(1)
+
+    return (s[size:, size:] - s[:-size, size:] - s[size:, :-size] +
+            s[:-size, :-size]) / size ** 2
+
+################################################################################
+
+def ssim(ref, img, size = 8):
+    """
+    Return the mean SSIM of img with respect to ref over sliding size by size
+    windows.
+    """
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    x, y = ref.astype(np.float64), img.astype(np.float64)
+
+    mx, my = box_mean(x, size), box_mean(y, size)
+    vx = box_mean(x * x, size) - mx * mx
+    vy = box_mean(y * y, size) - my * my
+    cxy = box_mean(x * y, size) - mx * my
+
+    s = ((2 * mx * my + c1) * (2 * cxy + c2)) / \
+        ((mx * mx + my * my + c1) * (vx + vy + c2))
+
+    return float(s.mean())
+
+################################################################################
+
+def compare(reference, location):
+    """
+    Return the mean PSNR and SSIM of a recording with respect to the
+    reference, over the frames both contain.
+    """
+    scores = [(psnr(ref, img), ssim(ref, img)) for ref, img in
+              zip(decode_luma(reference), decode_luma(location))
+              if ref.shape == img.shape]
+
+    if not scores: return float("nan"), float("nan")
+
+    finite = [p for p, _ in scores if np.isfinite(p)]
+    mean_psnr = sum(finite) / len(finite) if finite else float("inf")
+
+    return mean_psnr, sum(s for _, s in scores) / len(scores)
+
+################################################################################
+
+def sweep(profiles, base_config, directory):
+    """
+    Mix and encode the clip under the lossless profile, as reference, and
+    under every profile, each in a fresh process (see run_variants). Return a
+    list with the results of each profile.
+    """
+    os.makedirs(directory, exist_ok = True)
+    reference = os.path.join(directory, "reference.mkv")
+    outputs = [os.path.join(directory, f"{profile}.mkv")
+               for profile in profiles]
+
+    variants = [("reference", "DMA_2_3", {"encoder" : "lossless",
+                                          "output" : reference})]
+    variants += [(profile, "DMA_2_3", {"encoder" : profile, "output" : output})
+                 for profile, output in zip(profiles, outputs)]
+    results = run_variants(variants, base_config)[1:]
+
+    for profile, output, res in zip(profiles, outputs, results):
+        res["size"] = os.path.getsize(output) / 1024 ** 2
+        res["psnr"], res["ssim"] = compare(reference, output)
+
+        print(f"INFO : {profile} : {res['fps']:.1f} fps, "
+              f"{res['size']:.2f} MiB, PSNR {res['psnr']:.2f} dB, "
+              f"SSIM {res['ssim']:.4f}!")
+
+    return results
+
+################################################################################
+
+def main():
+    parser = argparse.ArgumentParser(description = "Speed/quality sweep of "
+                                     "the VideoMixer encoder profiles.")
+    parser.add_argument("--buffers", type = int, default = 500,
+                        help = "number of mixed buffers per profile")
+    parser.add_argument("--uri", action = "append", dest = "uris",
+                        help = "input URI of the clip, repeat for more "
+                        "inputs, videotestsrc if omitted")
+    parser.add_argument("--profile", action = "append",
+                        help = "only sweep the named profile(s)")
+    parser.add_argument("--dir", default = "sweep",
+                        help = "directory of the recordings")
+    parser.add_argument("--csv", default = None,
+                        help = "append the results to this CSV file")
+    args = parser.parse_args()
+
+    profiles = args.profile or [p for p in VideoMixer.ENCODER_PROFILES
+                                if p != "lossless"]
+    for profile in profiles:
+        if profile not in VideoMixer.ENCODER_PROFILES:
+            parser.error(f"unknown profile {profile}")
+
+    Gst.init(None)
+    base_config = {"buffers" : args.buffers, "uris" : args.uris}
+    try:
+        results = sweep(profiles, base_config, args.dir)
+    except RuntimeError as e:
+        print(f"ERROR : {e}!")
+        sys.exit(1)
+
+    if args.csv and results:
+        new = not os.path.exists(args.csv)
+        with open(args.csv, "a", newline = "") as f:
+            writer = csv.DictWriter(f, fieldnames = list(results[0]))
+            if new: writer.writeheader()
+            writer.writerows(results)
+
+################################################################################
+
+################################################################################
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+
+"""
+File name:  DMA_2_tap.py
+Author:     Gerbrand De Laender, Damon Verbeyst
+Date:       17/10/2026
+Email:      gerbrand.delaender@ugent.be, damon.verbeyst@ugent.be
+Brief:      E017920A, Design of Multimedia Applications, Assignment
+About:      Frame tap for per-frame analytics on the mixed video. An appsink
+            branch after the tee maps the luma plane of every buffer into a
+            NumPy array without copying and hands it to a pool of worker
+            threads through a bounded ring buffer, dropping frames rather than
+            stalling the pipeline.
+"""
+
+################################################################################
+################################################################################
+
+import time, threading, collections, numpy as np, gi
+gi.require_version('Gst', '1.0')
+gi.require_version('GstVideo', '1.0')
+from gi.repository import Gst, GstVideo
+from DMA_2_live import LUMA_FORMATS, luma_stride
+
+################################################################################
+################################################################################
+
+class FrameTap():
+
+    ############################################################################
+
+    # Mean luma below which a frame is considered black (limited range, in
+    # which black is 16).
+    BLACK_LEVEL = 30
+    # Fraction of the luma histogram that must change for a scene cut.
+    CUT_LEVEL = 0.5
+
+    ############################################################################
+
+    def __init__(self, pipeline, tee, workers, frames):
+        """
+        A FrameTap object adds a queue, videoconvert and appsink branch to tee
+        in pipeline. The appsink accepts every format of which the first plane
+        holds the luma, such as the I420 of the mix after the tee, so the
+        videoconvert remains in passthrough and only the luma plane is handed
+        out. Mapped frames are kept in a ring buffer of at most frames
+        entries, which are analysed by worker threads. NumPy releases the GIL
+        while computing, so threads suffice and the frames are never copied
+        into another process. If the ring buffer is full, the oldest frame is
+        dropped. Black frames and scene cuts are posted on the bus of pipeline
+        as "dma-tap" application messages.
+        """
+        self.pipeline = pipeline
+        self.tee = tee
+        self.n_workers = workers
+        self.ring = collections.deque()
+        self.size = frames
+        self.cond = threading.Condition()
+        self.running = False
+        self.threads = []
+        self.offered = 0
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self.histogram = None
+        self.last_pts = -1
+        self.t_start = None
+
+    ############################################################################
+
+    def attach(self):
+        """
+        Build and link the tap branch and start the workers.
+        """
+        self.que = Gst.ElementFactory.make("queue", "que_t")
+        self.vco = Gst.ElementFactory.make("videoconvert", "vco_t")
+        self.snk = Gst.ElementFactory.make("appsink", "snk_t")
+
+        if not self.que or not self.vco or not self.snk:
+            print("ERROR : Unable to create the frame tap!")
+            return False
+
+        # The tap never holds back the pipeline, the appsink drops as well.
+        self.que.set_property("leaky", "downstream")
+        self.que.set_property("max-size-buffers", 1)
+        self.que.set_property("max-size-bytes", 0)
+        self.que.set_property("max-size-time", 0)
+        formats = ", ".join(LUMA_FORMATS)
+        self.snk.set_property("caps", Gst.Caps.from_string(
+            f"video/x-raw,format={{ {formats} }}"))
+        self.snk.set_property("emit-signals", True)
+        self.snk.set_property("max-buffers", 1)
+        self.snk.set_property("drop", True)
+        self.snk.set_property("sync", False)
+        self.snk.connect("new-sample", self.on_new_sample)
+        self.que.get_static_pad("sink").add_probe(Gst.PadProbeType.BUFFER,
+                                                  self.on_offered)
+
+        for element in (self.que, self.vco, self.snk):
+            self.pipeline.add(element)
+
+        tmp = self.tee.get_pad_template("src_%u")
+        self.pad = self.tee.request_pad(tmp, None, None)
+
+        ret = self.que.link(self.vco) and self.vco.link(self.snk)
+        ret = ret and self.pad.link(self.que.get_static_pad("sink")) == \
+              Gst.PadLinkReturn.OK
+
+        if not ret:
+            print("ERROR : Unable to link the frame tap!")
+            return False
+
+        self.running = True
+        self.t_start = time.perf_counter()
+        for i in range(self.n_workers):
+            thread = threading.Thread(target = self.work, daemon = True,
+                                      name = f"tap_{i}")
+            thread.start()
+            self.threads.append(thread)
+
+        return True
+
+    ############################################################################
+
+    def stop(self):
+        """
+        Stop the workers and release the frames that were not analysed.
+        """
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+
+        for thread in self.threads:
+            thread.join()
+
+        while self.ring:
+            self.release(self.ring.popleft())
+
+    ############################################################################
+
+    def on_offered(self, pad, info):
+        """
+        Count the frames offered to the tap, including those dropped before
+        reaching the appsink.
+        """
+        self.offered += 1
+
+        return Gst.PadProbeReturn.OK
+
+    ############################################################################
+
+    def on_new_sample(self, sink):
+        """
+        Map the buffer of a new sample and queue its luma plane for the
+        workers. The array refers to the mapped memory, which remains mapped
+        until the frame is released. The layout of the plane is taken from the
+        video meta of the buffer, the default layout is assumed without.
+        """
+        sample = sink.emit("pull-sample")
+        if sample is None: return Gst.FlowReturn.OK
+
+        buf = sample.get_buffer()
+        st = sample.get_caps().get_structure(0)
+        width, height = st.get_value("width"), st.get_value("height")
+
+        meta = GstVideo.buffer_get_video_meta(buf)
+        if meta: offset, stride = meta.offset[0], meta.stride[0]
+        else: offset, stride = 0, luma_stride(width)
+
+        ok, info = buf.map(Gst.MapFlags.READ)
+        if not ok: return Gst.FlowReturn.OK
+
+        frame = np.ndarray((height, width), dtype = np.uint8,
+                           buffer = info.data, offset = offset,
+                           strides = (stride, 1))
+
+        with self.cond:
+            self.received += 1
+            if len(self.ring) >= self.size:
+                self.release(self.ring.popleft())
+                self.dropped += 1
+            self.ring.append((buf, info, frame))
+            self.cond.notify()
+
+        return Gst.FlowReturn.OK
+
+    ############################################################################
+
+    def release(self, item):
+        """
+        Unmap the memory of a frame.
+        """
+        buf, info, _ = item
+        buf.unmap(info)
+
+    ############################################################################
+
+    def work(self):
+        """
+        Analyse frames from the ring buffer until stopped.
+        """
+        while True:
+            with self.cond:
+                while self.running and not self.ring:
+                    self.cond.wait()
+                if not self.running: return
+                item = self.ring.popleft()
+
+            try:
+                self.analyse(item[0].pts, item[2])
+            finally:
+                self.release(item)
+
+    ############################################################################
+
+    def analyse(self, pts, luma):
+        """
+        Compute the histogram of the luma plane of a frame and detect black
+        frames and scene cuts. A scene cut is a large change of the histogram
+        with respect to the latest frame analysed before, the workers may
+        finish out of order.
+        """
+        hist = np.bincount(luma.ravel(), minlength = 256)
+        hist = hist / luma.size
+        mean = float(luma.mean())
+
+        with self.cond:
+            self.processed += 1
+            prev, self.histogram = self.histogram, hist
+            if pts < self.last_pts: prev = None
+            self.last_pts = max(self.last_pts, pts)
+
+        if mean < self.BLACK_LEVEL:
+            self.post("black-frame", pts, mean)
+        if prev is not None:
+            change = float(np.abs(hist - prev).sum()) / 2
+            if change > self.CUT_LEVEL: self.post("scene-cut", pts, change)
+
+    ############################################################################
+
+    def post(self, event, pts, value):
+        """
+        Post a "dma-tap" application message for an event.
+        """
+        st = Gst.Structure.new_empty("dma-tap")
+        st.set_value("event", event)
+        st.set_value("pts", pts / Gst.SECOND)
+        st.set_value("value", value)
+        self.pipeline.post_message(Gst.Message.new_application(self.pipeline,
+                                                               st))
+
+    ############################################################################
+
+    def counters(self):
+        """
+        Return the offered, received, processed and dropped frames and the
+        analysed frames per second. Frames that are offered but not received
+        were dropped by the leaky queue or the appsink, the dropped frames were
+        pushed out of the ring buffer.
+        """
+        elapsed = time.perf_counter() - self.t_start if self.t_start else 0
+
+        with self.cond:
+            return {"offered" : self.offered, "received" : self.received,
+                    "processed" : self.processed, "dropped" : self.dropped,
+                    "fps" : self.processed / elapsed if elapsed else 0}
+
+    ############################################################################
+
+    def report(self):
+        """
+        Print the counters.
+        """
+        c = self.counters()
+
+        print(f"INFO : Frame tap : {c['received']} of {c['offered']} frames "
+              f"received, "
+              f"{c['processed']} analysed ({c['fps']:.1f} fps), "
+              f"{c['dropped']} dropped!")
+
+################################################################################
+################################################################################
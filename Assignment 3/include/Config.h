@@ -9,8 +9,12 @@
 #define DO_MC true
 #define DO_INTRA true
 
+#define PARTITION_COST 10000 // Cost factor of partitioning a macroblock, determined empirically.
+
 #define MV_TO_CSV true // Writes the motion vectors to a CSV file that can be visualised.
 #define CSV_NAME "xxx\\data\\flower_50\\vectors.csv"
+#define MV_TO_BIN true // Writes the motion vectors, partitions and costs to a binary file, see tools/MVFormat.py.
+#define BIN_NAME "xxx\\data\\flower_50\\vectors.mv"
 #define RES_NAME "xxx\\data\\results.txt"
 
 #define CALC_DIFF(x, y) ( x - y ) * ( x - y )
@@ -7,6 +7,7 @@
 #include <fstream>
 
 #include "Frame.h"
+#include "Config.h"
 
 ///////////////////////////////////////////////////////////////////////////////////////////////////
 ///////////////////////////////////////////////////////////////////////////////////////////////////
@@ -14,8 +15,10 @@
 class Encoder
 {
 public:
-	int Encode(char *inputfile, int width, int height, int qp, int i_interval, char *outputfile);
+	int Encode(char *inputfile, int width, int height, int qp, int i_interval, char *outputfile, long partition_cost = PARTITION_COST, const char *vectorfile = 0, const char *reconfile = 0);
 private:
+	void WriteFrame(std::ofstream &file, Frame *frame);
+
 	std::ofstream results;
 };
 
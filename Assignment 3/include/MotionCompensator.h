@@ -5,7 +5,9 @@
 ///////////////////////////////////////////////////////////////////////////////////////////////////
 
 #include "Frame.h"
+#include "Config.h"
 #include <stdio.h>
+#include <stdint.h>
 #include <fstream>
 
 ///////////////////////////////////////////////////////////////////////////////////////////////////
@@ -14,7 +16,7 @@
 class MotionCompensator
 {
 public:
-	MotionCompensator(int search_width, int search_height);
+	MotionCompensator(int search_width, int search_height, int i_interval = 0, long partition_cost = PARTITION_COST, const char* vectorfile = 0);
 	~MotionCompensator();
 
 	void setReferenceFrame(Frame* frame);
@@ -26,6 +28,8 @@ protected:
 	int ref_width, ref_height;
 
 	int search_width, search_height;
+	int i_interval;
+	long partition_cost;
 
 	pixel getRefPixelLuma(int x, int y);
 	pixel getRefPixelCb(int x, int y);
@@ -35,11 +39,17 @@ protected:
 
 private:
 	std::ofstream out;
+	std::ofstream bin;
+	long n_records;
 	const static int _i[], _j[], _i_max[], _j_max[];
 	
 	long getSSE(Macroblock* mb, int mv_x, int mv_y, int part);
 	long fastSearch8x8(Macroblock* mb);
 	long fastSearch16x16(Macroblock* mb);
+
+	template <typename T> void writeValue(T value);
+	void writeHeader();
+	void writeRecord(Macroblock* mb, long sse);
 };
 
 ///////////////////////////////////////////////////////////////////////////////////////////////////
@@ -14,7 +14,8 @@
  *	Creates a pipeline comprising intra prediction, motion compensation, DCT transformation,
  *	quantisation and finally entropy coding.
  *	
- *	Usage of the encoder is <inputfile> <input_width> <input_height> <qp> <I-interval> <outputfile>.
+ *	Usage of the encoder is <inputfile> <input_width> <input_height> <qp> <I-interval> <outputfile>
+ *	[<cost> [<vectorfile> [<reconfile>]]].
  *
  *	<inputfile>			: Uncompressed YUV video file.
  *	<input_width>		: Width of a frame in pixels.
@@ -24,6 +25,10 @@
  *										compensation will be used w.r.t. the previous P-frame. Higher intervals
  *										usually provide better compression
  *	<outputfile>		: Name for the encoded output file.
+ *	<cost>					: Optional cost factor of partitioning a macroblock, PARTITION_COST by default.
+ *	<vectorfile>		: Optional name for the binary motion vector file, BIN_NAME by default.
+ *	<reconfile>			: Optional name for the reconstructed YUV video file, i.e. the frames as
+ *										decoded, which are also the reference frames of the motion compensation.
  *
  */
 
@@ -35,6 +40,7 @@
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
+#include <vector>
 
 #include "YUVFileInput.h"
 #include "BitFileOutput.h"
@@ -56,14 +62,17 @@
 ///////////////////////////////////////////////////////////////////////////////////////////////////
 ///////////////////////////////////////////////////////////////////////////////////////////////////
 
-int Encoder::Encode(char *inputfile, int width, int height, int qp, int i_interval, char *outputfile)
+int Encoder::Encode(char *inputfile, int width, int height, int qp, int i_interval, char *outputfile, long partition_cost, const char *vectorfile, const char *reconfile)
 {
 	YUVFileInput in(inputfile, width/16, height/16);
 	BitFileOutput out(outputfile);
 
+	std::ofstream recon;
+	if (reconfile) recon.open(reconfile, std::ofstream::trunc | std::ofstream::binary);
+
 	EntropyCoder entropy_coder(&out);
 	DCTTransform dct;
-	MotionCompensator mc(SEARCH_WIDTH, SEARCH_HEIGHT);
+	MotionCompensator mc(SEARCH_WIDTH, SEARCH_HEIGHT, i_interval, partition_cost, vectorfile);
 	IntraPredictor ip;
 	
 	printf("File:\t%s\nWidth:\t%d\nHeight:\t%d\nQP:\t%d\nI-interval:\t%d\nSearch window: \t%dx%d\n\n", inputfile, width, height, qp, i_interval, SEARCH_WIDTH, SEARCH_HEIGHT);
@@ -148,6 +157,8 @@ int Encoder::Encode(char *inputfile, int width, int height, int qp, int i_interv
 
 		printf("%8ld %4d %4d %4d %4d\n", used_bits, mode0, mode1, mode2, mode3);
 
+		if (recon.is_open()) WriteFrame(recon, current_frame);
+
 		// Set reference frame to current frame
 		delete mc.getReferenceFrame();
 		mc.setReferenceFrame(current_frame);
@@ -167,18 +178,47 @@ int Encoder::Encode(char *inputfile, int width, int height, int qp, int i_interv
 
 ///////////////////////////////////////////////////////////////////////////////////////////////////
 
+//
+//	Appends the reconstructed frame to file as YUV420p, a row of each plane at a time.
+//
+
+void Encoder::WriteFrame(std::ofstream &file, Frame *frame)
+{
+	int mb_width = frame->getWidth(), mb_height = frame->getHeight();
+
+	for (int plane = 0; plane < 3; plane++) {
+		int size = plane ? 8 : 16; // Size of a macroblock in the plane.
+		std::vector<char> row(size * mb_width);
+
+		for (int y = 0; y < size * mb_height; y++) {
+			for (int x = 0; x < size * mb_width; x++) {
+				Macroblock *mb = frame->getMacroblock((y / size) * mb_width + x / size);
+				Plane p = plane == 0 ? mb->luma : plane == 1 ? mb->cb : mb->cr;
+				row[x] = (char) p[y % size][x % size];
+			}
+			file.write(row.data(), row.size());
+		}
+	}
+}
+
+///////////////////////////////////////////////////////////////////////////////////////////////////
+
 int main(int argc, char* argv[])
 {
 	Encoder enc;
 
-	if (argc != 7)
+	if (argc < 7 || argc > 10)
 	{
-		printf("\nUSAGE:   %s <inputfile> <input_width> <input_height> <qp> <I-interval> <outputfile>\n", argv[0]);
+		printf("\nUSAGE:   %s <inputfile> <input_width> <input_height> <qp> <I-interval> <outputfile> [<cost> [<vectorfile> [<reconfile>]]]\n", argv[0]);
 		printf("            <input_width> and <input_height> are expressed in pixels\n");
 		return 1;
 	}
 	
-	enc.Encode(argv[1], atoi(argv[2]), atoi(argv[3]),atoi(argv[4]),atoi(argv[5]),argv[6]);
+	long partition_cost = argc > 7 ? atol(argv[7]) : PARTITION_COST;
+	const char *vectorfile = argc > 8 ? argv[8] : 0;
+	const char *reconfile = argc > 9 ? argv[9] : 0;
+
+	enc.Encode(argv[1], atoi(argv[2]), atoi(argv[3]),atoi(argv[4]),atoi(argv[5]),argv[6], partition_cost, vectorfile, reconfile);
 
 	return 0;
 }
@@ -41,6 +41,11 @@
 ///////////////////////////////////////////////////////////////////////////////////////////////////
 ///////////////////////////////////////////////////////////////////////////////////////////////////
 
+// Layout of the binary motion vector file, see tools/MVFormat.py.
+const char MV_MAGIC[4] = {'D', 'M', 'M', 'V'};
+const uint16_t MV_VERSION = 1;
+const int MV_HEADER_SIZE = 32;
+
 // Used to construct the loop variables and bounds when using partitioning.
 const int MotionCompensator::_i[5] = {0, 8, 0, 8, 0};
 const int MotionCompensator::_j[5] = {0, 0, 8, 8, 0};
@@ -52,11 +57,14 @@ const int MotionCompensator::_j_max[5] = {8, 8, 16, 16, 16};
 
 //
 //	Allocates a search buffer containing all pixel values within the search window, specified by
-//	search_width and search_height.
+//	search_width and search_height. The I-interval is stored with the binary motion vectors, 0 if
+//	unknown. Partitioning a macroblock costs partition_cost. If vectorfile is given, the binary
+//	motion vectors are written there instead of BIN_NAME, and no CSV file is written, such that
+//	concurrent encoders do not share an output file.
 //
 
-MotionCompensator::MotionCompensator(int search_width, int search_height)
-	: search_width(search_width), search_height(search_height), reference_frame(0), ref_height(0), ref_width(0)
+MotionCompensator::MotionCompensator(int search_width, int search_height, int i_interval, long partition_cost, const char* vectorfile)
+	: reference_frame(0), ref_width(0), ref_height(0), search_width(search_width), search_height(search_height), i_interval(i_interval), partition_cost(partition_cost), n_records(0)
 {
 	search_width += 16;
 	search_height += 16;
@@ -67,17 +75,26 @@ MotionCompensator::MotionCompensator(int search_width, int search_height)
 		search_buffer[i] = new pixel[search_height];
 	}
 
-	if(MV_TO_CSV) out.open(CSV_NAME, std::ofstream::trunc);
+	if(MV_TO_CSV && !vectorfile) out.open(CSV_NAME, std::ofstream::trunc);
+	if (MV_TO_BIN) {
+		bin.open(vectorfile ? vectorfile : BIN_NAME, std::ofstream::trunc | std::ofstream::binary);
+		writeHeader(); // Placeholder, completed once the number of frames is known.
+	}
 }
 
 ///////////////////////////////////////////////////////////////////////////////////////////////////
 
 //
-//	Deallocates the search buffer.
+//	Deallocates the search buffer and completes the header of the binary motion vector file.
 //
 
 MotionCompensator::~MotionCompensator()
 {
+	if (MV_TO_BIN && bin.is_open()) {
+		bin.seekp(0);
+		writeHeader();
+	}
+
 	for (int i = 0; i < this->search_width + 16; i++) {
 		delete[] search_buffer[i];
 	}
@@ -133,7 +150,7 @@ void MotionCompensator::motionCompensate(Macroblock* mb)
 	long sum_min_sse = fastSearch8x8(mb);
 	
 	// Cost is determined empirically.
-	if (sum_min_sse + 10000 < min_sse) {
+	if (sum_min_sse + partition_cost < min_sse) {
 		mb->partitions = true;
 	}
 	else {
@@ -158,7 +175,8 @@ void MotionCompensator::motionCompensate(Macroblock* mb)
 		}
 	}
 
-	if (MV_TO_CSV) out << mb->mv[0].x << ", " << mb->mv[0].y << "\n";
+	if (MV_TO_CSV && out.is_open()) out << mb->mv[0].x << ", " << mb->mv[0].y << "\n";
+	if (MV_TO_BIN) writeRecord(mb, mb->partitions ? sum_min_sse : min_sse);
 }
 
 ///////////////////////////////////////////////////////////////////////////////////////////////////
@@ -305,4 +323,64 @@ long MotionCompensator::fastSearch16x16(Macroblock* mb)
 }
 
 ///////////////////////////////////////////////////////////////////////////////////////////////////
-///////////////////////////////////////////////////////////////////////////////////////////////////
\ No newline at end of file
+
+//
+//	Writes a value to the binary motion vector file, in the byte order of the host (little endian
+//	on all supported platforms).
+//
+
+template <typename T>
+void MotionCompensator::writeValue(T value)
+{
+	bin.write(reinterpret_cast<const char*>(&value), sizeof(T));
+}
+
+///////////////////////////////////////////////////////////////////////////////////////////////////
+
+//
+//	Writes the 32 byte header of the binary motion vector file: magic, version, macroblock size,
+//	frame width and height in pixels, macroblocks along the width and height, number of frames
+//	with motion vectors (the P-frames only), search window, I-interval and 6 reserved bytes.
+//
+
+void MotionCompensator::writeHeader()
+{
+	int n_mbs = ref_width * ref_height;
+
+	bin.write(MV_MAGIC, sizeof(MV_MAGIC));
+	writeValue<uint16_t>(MV_VERSION);
+	writeValue<uint16_t>(16);
+	writeValue<uint16_t>(16 * ref_width);
+	writeValue<uint16_t>(16 * ref_height);
+	writeValue<uint16_t>(ref_width);
+	writeValue<uint16_t>(ref_height);
+	writeValue<uint32_t>(n_mbs ? n_records / n_mbs : 0);
+	writeValue<uint16_t>(search_width);
+	writeValue<uint16_t>(search_height);
+	writeValue<uint16_t>(i_interval);
+	while (bin.tellp() < MV_HEADER_SIZE) writeValue<uint8_t>(0); // Reserved.
+}
+
+///////////////////////////////////////////////////////////////////////////////////////////////////
+
+//
+//	Writes the 24 byte record of a macroblock to the binary motion vector file: partition flag,
+//	3 reserved bytes, the 4 motion vectors (equal if not partitioned) and the SSE of the chosen
+//	(partitioned or not) match.
+//
+
+void MotionCompensator::writeRecord(Macroblock* mb, long sse)
+{
+	writeValue<uint8_t>(mb->partitions);
+	writeValue<uint8_t>(0);
+	writeValue<uint16_t>(0);
+	for (int part = 0; part < 4; part++) {
+		writeValue<int16_t>(mb->mv[part].x);
+		writeValue<int16_t>(mb->mv[part].y);
+	}
+	writeValue<uint32_t>(sse);
+	n_records++;
+}
+
+///////////////////////////////////////////////////////////////////////////////////////////////////
+///////////////////////////////////////////////////////////////////////////////////////////////////
@@ -0,0 +1,287 @@
+"""
+File name:  EncoderSweep.py
+Author:     Gerbrand De Laender, Damon Verbeyst
+Date:       17/10/2026
+Email:      gerbrand.delaender@ugent.be, damon.verbeyst@ugent.be
+Brief:      E017920A, Assignment, encoder parameter sweep
+About:      Encodes every dataset for a grid of QPs, I-intervals and
+            partitioning cost factors, and decodes it if a Decoder is given.
+            The PSNR is that of the frames reconstructed by the Encoder, which
+            the Decoder reproduces. The jobs run concurrently in a pool of
+            processes, each in a temporary directory of its own. Compressed
+            size, encoding and decoding time and PSNR are collected in a
+            single CSV file, from which the plots of data/screens are
+            regenerated.
+"""
+
+################################################################################
+################################################################################
+
+import os, csv, time, argparse, tempfile, subprocess, multiprocessing
+from Quality import compare, average
+
+################################################################################
+################################################################################
+
+FIELDS = ("dataset", "study", "qp", "interval", "cost", "status", "error",
+          "size", "encode_time", "decode_status", "decode_error",
+          "decode_time", "y_psnr", "u_psnr", "v_psnr")
+
+TOOLS = os.path.dirname(os.path.abspath(__file__))
+SCREENS = os.path.join(TOOLS, os.pardir, "data", "screens")
+
+# Output directories of the CMake build, per generator and configuration.
+BUILDS = (("build", "Release"), ("build", "Debug"), ("build",))
+
+# Defaults of the grid, as in data/results. The cost of the size study is
+# PARTITION_COST in Config.h.
+QPS = tuple(range(2, 51, 2))
+INTERVALS = tuple(range(1, 10))
+COSTS = tuple(range(0, 20000, 100))
+COST_INTERVALS = (2, 3, 4)
+COST, COST_QP = 10000, 2
+
+################################################################################
+
+def dataset_name(location):
+    """
+    Return the name of a dataset, e.g. flower_50 for flower_50.yuv.
+    """
+    return os.path.splitext(os.path.basename(location))[0]
+
+################################################################################
+
+def find_encoder():
+    """
+    Return the Encoder executable of the CMake build, None if not built.
+    """
+    for build in BUILDS:
+        for name in ("Encoder.exe", "Encoder"):
+            location = os.path.join(TOOLS, os.pardir, *build, name)
+            if os.path.isfile(location): return os.path.normpath(location)
+
+    return None
+
+################################################################################
+
+def build_jobs(datasets, qps, intervals, costs, cost_qp, cost_intervals):
+    """
+    Return the jobs of the size study (every QP and I-interval at the default
+    cost) and of the cost study (every cost and I-interval in cost_intervals
+    at a fixed QP) for every dataset. A job that belongs to both studies only
+    runs once.
+    """
+    jobs = {}
+
+    for dataset in datasets:
+        for qp in qps:
+            for interval in intervals:
+                key = (dataset, qp, interval, COST)
+                jobs[key] = dict(zip(("dataset", "qp", "interval", "cost"),
+                                     key), study = "size")
+        for interval in cost_intervals:
+            for cost in costs:
+                key = (dataset, cost_qp, interval, cost)
+                study = "size+cost" if key in jobs else "cost"
+                jobs[key] = dict(zip(("dataset", "qp", "interval", "cost"),
+                                     key), study = study)
+
+    return list(jobs.values())
+
+################################################################################
+
+def run_job(job, encoder, decoder, width, height):
+    """
+    Encode a dataset in a temporary directory, which is also the working
+    directory of the executables, and return the row of the job. The size is
+    given in bits, as in data/results, and the PSNR is computed from the
+    reconstruction of the Encoder. Unless decoder is None, the result is
+    decoded as well, a failure of which does not fail the job but is recorded
+    separately.
+    """
+    row = dict.fromkeys(FIELDS, "")
+    row.update(job, dataset = dataset_name(job["dataset"]), status = "ok")
+
+    with tempfile.TemporaryDirectory(prefix = "sweep_") as tmp:
+        encoded = os.path.join(tmp, "encoded.bin")
+        decoded = os.path.join(tmp, "decoded.yuv")
+        vectors = os.path.join(tmp, "vectors.mv")
+        reconstructed = os.path.join(tmp, "reconstructed.yuv")
+
+        try:
+            t_start = time.perf_counter()
+            subprocess.run([encoder, os.path.abspath(job["dataset"]),
+                            str(width), str(height), str(job["qp"]),
+                            str(job["interval"]), encoded, str(job["cost"]),
+                            vectors, reconstructed], cwd = tmp, check = True,
+                           stdout = subprocess.DEVNULL)
+            row["encode_time"] = time.perf_counter() - t_start
+            row["size"] = 8 * os.path.getsize(encoded)
+
+            mean = average(compare(job["dataset"], reconstructed, width,
+                                   height))
+            row.update({key : mean[key] for key in ("y_psnr", "u_psnr",
+                                                    "v_psnr")})
+        except (OSError, ValueError, subprocess.CalledProcessError) as e:
+            row.update(status = "failed", error = str(e))
+            return row
+
+        if decoder is None: return row
+        row["decode_status"] = "ok"
+
+        try:
+            t_start = time.perf_counter()
+            subprocess.run([decoder, encoded, decoded], cwd = tmp,
+                           check = True, stdout = subprocess.DEVNULL)
+            row["decode_time"] = time.perf_counter() - t_start
+        except (OSError, subprocess.CalledProcessError) as e:
+            row.update(decode_status = "failed", decode_error = str(e))
+
+    return row
+
+################################################################################
+
+def run_job_args(args):
+    """
+    Unpack the arguments of run_job.
+    """
+    return run_job(*args)
+
+################################################################################
+
+def run_sweep(jobs, encoder, decoder, width, height, workers):
+    """
+    Run the jobs across a pool of worker processes and return their rows in
+    order of completion.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    args = [(job, encoder, decoder, width, height) for job in jobs]
+    rows = []
+
+    with ctx.Pool(workers) as pool:
+        for row in pool.imap_unordered(run_job_args, args):
+            rows.append(row)
+            error = row["error"] or row["decode_error"]
+            decode = " decode " + row["decode_status"] \
+                     if row["decode_status"] else ""
+            print(f"INFO : [{len(rows)}/{len(jobs)}] {row['dataset']} QP "
+                  f"{row['qp']} interval {row['interval']} cost {row['cost']} "
+                  f"{row['status']}{decode}{' : ' + error if error else ''}!")
+
+    return rows
+
+################################################################################
+
+def plot(rows, directory, width, height):
+    """
+    Regenerate the plots of the compressed size against the QP and of the
+    compressed size above its minimum against the cost factor, with a line
+    per I-interval, for every dataset.
+    """
+    # Matplotlib is only required for the plots.
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    os.makedirs(directory, exist_ok = True)
+    rows = [row for row in rows if row["size"] != ""]
+
+    for dataset in sorted({row["dataset"] for row in rows}):
+        name = dataset.split("_")[0].capitalize()
+
+        for study, x, ylabel in (("size", "qp", "Compressed size (in bits)"),
+                                 ("cost", "cost", "Compressed size above the "
+                                  "cost's minimum (in bits)")):
+            mine = [row for row in rows if row["dataset"] == dataset and
+                    study in row["study"]]
+            if not mine: continue
+
+            fig, ax = plt.subplots(figsize = (8, 6))
+            for interval in sorted({row["interval"] for row in mine}):
+                points = sorted((row[x], row["size"]) for row in mine
+                                if row["interval"] == interval)
+                xs, ys = zip(*points)
+                if study == "cost": ys = [y - min(ys) for y in ys]
+                ax.plot(xs, ys, label = f"I = {interval}")
+
+            ax.set(title = f"{dataset}.yuv ({width}x{height})",
+                   xlabel = "QP" if study == "size" else "Cost factor",
+                   ylabel = ylabel)
+            ax.set_ylim(bottom = 0)
+            ax.grid(True)
+            ax.legend(loc = "upper center", bbox_to_anchor = (0.5, -0.1),
+                      ncol = 9, frameon = False)
+            fig.tight_layout()
+            fig.savefig(os.path.join(directory,
+                                     f"{study.capitalize()}{name}.png"))
+            plt.close(fig)
+
+################################################################################
+
+def main():
+    parser = argparse.ArgumentParser(description = "Parameter sweep of the "
+                                     "Encoder and Decoder.")
+    parser.add_argument("datasets", nargs = "+",
+                        help = "uncompressed YUV420p files")
+    parser.add_argument("--encoder", default = None,
+                        help = "Encoder executable, found in the CMake build "
+                        "directory if omitted")
+    parser.add_argument("--decoder", default = None,
+                        help = "Decoder executable, e.g. tools/Decoder.exe, "
+                        "the jobs are not decoded if omitted")
+    parser.add_argument("--width", type = int, default = 352)
+    parser.add_argument("--height", type = int, default = 288)
+    parser.add_argument("--qp", type = int, nargs = "+", default = QPS)
+    parser.add_argument("--interval", type = int, nargs = "+",
+                        default = INTERVALS)
+    parser.add_argument("--cost", type = int, nargs = "+", default = COSTS)
+    parser.add_argument("--cost-qp", type = int, default = COST_QP,
+                        help = "QP of the cost study")
+    parser.add_argument("--cost-interval", type = int, nargs = "+",
+                        default = COST_INTERVALS,
+                        help = "I-intervals of the cost study")
+    parser.add_argument("--workers", type = int, default = os.cpu_count())
+    parser.add_argument("--csv", default = "sweep.csv",
+                        help = "location of the results")
+    parser.add_argument("--screens", default = SCREENS,
+                        help = "directory of the plots, none if empty")
+    args = parser.parse_args()
+
+    for dataset in args.datasets:
+        if not os.path.isfile(dataset):
+            parser.error(f"no such dataset {dataset}")
+
+    encoder = args.encoder or find_encoder()
+    if encoder is None:
+        parser.error("no Encoder in the build directory, pass --encoder")
+
+    jobs = build_jobs(args.datasets, args.qp, args.interval, args.cost,
+                      args.cost_qp, args.cost_interval)
+
+    t_start = time.perf_counter()
+    rows = run_sweep(jobs, encoder, args.decoder, args.width,
+                     args.height, args.workers)
+    wall = time.perf_counter() - t_start
+
+    rows.sort(key = lambda row: (row["dataset"], row["qp"], row["interval"],
+                                 row["cost"]))
+    with open(args.csv, "w", newline = "") as f:
+        writer = csv.DictWriter(f, fieldnames = FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    failed = sum(row["status"] != "ok" for row in rows)
+    print(f"INFO : {len(rows) - failed} of {len(rows)} jobs succeeded in "
+          f"{wall:.1f} s, see {args.csv}!")
+    if args.decoder:
+        decoded = sum(row["decode_status"] == "ok" for row in rows)
+        print(f"INFO : {decoded} of {len(rows) - failed} encoded jobs "
+              f"decoded!")
+
+    if args.screens: plot(rows, args.screens, args.width, args.height)
+
+################################################################################
+
+################################################################################
+if __name__ == "__main__":
+    main()
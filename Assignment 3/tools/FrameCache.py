@@ -0,0 +1,144 @@
+"""
+File name:  FrameCache.py
+Author:     Gerbrand De Laender, Damon Verbeyst
+Date:       17/10/2026
+Email:      gerbrand.delaender@ugent.be, damon.verbeyst@ugent.be
+Brief:      E017920A, Assignment, frame cache
+About:      Least recently used cache of decoded frames with a memory budget.
+            A background thread prefetches the frames on either side of the
+            current position, such that scrubbing through a sequence rarely
+            waits for a frame to be read from disk.
+"""
+
+################################################################################
+################################################################################
+
+import threading, collections
+import numpy as np
+
+################################################################################
+################################################################################
+
+class FrameCache():
+
+    ############################################################################
+
+    def __init__(self, load, n_frames, budget, radius):
+        """
+        A FrameCache object holds frames, returned by load(n) for frame
+        numbers 0 to n_frames - 1, as ready-to-display uint8 arrays. Frames
+        are evicted, least recently used first, once they take more than
+        budget bytes. After every get, the radius frames before and after are
+        prefetched in the background, nearest first, as far as the budget
+        holds them.
+        """
+        self.load = load
+        self.n_frames = n_frames
+        self.budget = budget
+        self.radius = radius
+        self.frames = collections.OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.pending = []
+        self.cond = threading.Condition()
+        self.current = 0
+        self.thread = threading.Thread(target = self.prefetch, daemon = True)
+        self.thread.start()
+
+    ############################################################################
+
+    def decode(self, n):
+        """
+        Load frame n and convert it to uint8, a quarter of the memory of the
+        float32 arrays returned by e.g. imread.
+        """
+        frame = np.asarray(self.load(n))
+        if frame.dtype != np.uint8:
+            frame = (np.clip(frame, 0, 1) * 255 + 0.5).astype(np.uint8)
+
+        return frame
+
+    ############################################################################
+
+    def get(self, n):
+        """
+        Return frame n, loading it if it is not cached, and schedule the
+        prefetch around it.
+        """
+        with self.cond:
+            frame = self.frames.get(n)
+            if frame is not None:
+                self.frames.move_to_end(n)
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if frame is None:
+            frame = self.decode(n)
+            with self.cond:
+                self.insert(n, frame)
+
+        # Never prefetch more frames than fit, which would evict the frames
+        # prefetched just before.
+        radius = min(self.radius, (self.budget // frame.nbytes - 1) // 2)
+
+        with self.cond:
+            self.current = n
+            self.pending = [m for d in range(1, radius + 1)
+                            for m in (n + d, n - d) if 0 <= m < self.n_frames]
+            self.cond.notify()
+
+        return frame
+
+    ############################################################################
+
+    def insert(self, n, frame):
+        """
+        Cache frame n and evict the least recently used frames that exceed
+        the budget, except for the current one. Called with the lock held.
+        """
+        if n in self.frames: return
+
+        self.frames[n] = frame
+        self.size += frame.nbytes
+
+        for m in list(self.frames):
+            if self.size <= self.budget: break
+            if m in (self.current, n): continue
+            self.size -= self.frames.pop(m).nbytes
+
+    ############################################################################
+
+    def prefetch(self):
+        """
+        Load the pending frames that are not cached yet, and mark those that
+        are as recently used, such that the window around the current frame is
+        evicted last.
+        """
+        while True:
+            with self.cond:
+                while not self.pending:
+                    self.cond.wait()
+                n = self.pending.pop(0)
+                if n in self.frames:
+                    self.frames.move_to_end(n)
+                    continue
+
+            frame = self.decode(n)
+
+            with self.cond:
+                self.insert(n, frame)
+
+    ############################################################################
+
+    def hit_rate(self):
+        """
+        Return the fraction of gets served from the cache.
+        """
+        total = self.hits + self.misses
+
+        return self.hits / total if total else float("nan")
+
+################################################################################
+################################################################################
@@ -0,0 +1,228 @@
+"""
+File name:  MVAnalyser.py
+Author:     Gerbrand De Laender, Damon Verbeyst
+Date:       17/10/2026
+Email:      gerbrand.delaender@ugent.be, damon.verbeyst@ugent.be
+Brief:      E017920A, Assignment, motion estimation analysis
+About:      Compares the motion vectors of the fast search of the
+            MotionCompensator against an exhaustive search over the same
+            window. The SSE of every 16x16 macroblock and 8x8 partition at
+            every displacement is computed at once, through sliding window
+            views on the reference luma. Per frame, the share of suboptimal
+            vectors and the SSE lost by the fast search are reported. The
+            reference frames are those reconstructed by the encoder (or
+            decoded), which it searched, as verified against the SSE in the
+            records.
+"""
+
+################################################################################
+################################################################################
+
+import sys, csv, argparse
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from MVFormat import load, i_interval, partition_vectors, UNKNOWN_SSE
+from YUVReader import YUVReader
+
+################################################################################
+################################################################################
+
+FIELDS = ("frame", "mb_mismatch", "part_mismatch", "enc_partitioned",
+          "full_partitioned", "sse_encoder", "sse_full", "sse_gap")
+
+PARTITION_COST = 10000 # Determined empirically, as in MotionCompensator.cpp.
+
+################################################################################
+
+def full_search(cur, ref, search):
+    """
+    Return the SSE of every 8x8 partition of the luma plane cur at every
+    displacement within the search window (width, height) in ref, as an array
+    of shape (height + 1, width + 1, rows, columns) of partitions. Displacement
+    (dx, dy) is found at [dy + height // 2, dx + width // 2]. Like the encoder,
+    pixels outside of ref repeat its edges.
+    """
+    rx, ry = search[0] // 2, search[1] // 2
+    h, w = cur.shape
+
+    ref = np.pad(ref.astype(np.int32), ((ry, ry), (rx, rx)), mode = "edge")
+    cur = cur.astype(np.int32)
+
+    # All displaced copies of ref, without copying, handled a row of
+    # displacements at a time to bound the memory.
+    views = sliding_window_view(ref, (h, w))
+    sse = np.empty((2 * ry + 1, 2 * rx + 1, h // 8, w // 8), dtype = np.int64)
+
+    for i, row in enumerate(views):
+        diff = row - cur
+        diff *= diff
+        diff = diff.reshape(2 * rx + 1, h // 8, 8, w // 8, 8)
+        sse[i] = diff.sum(axis = (2, 4))
+
+    return sse
+
+################################################################################
+
+def lookup(sse, mv, search):
+    """
+    Return the SSE in sse, as returned by full_search, of every block at its
+    motion vector in mv, of shape (rows, columns, 2).
+    """
+    rx, ry = search[0] // 2, search[1] // 2
+    iy, ix = np.indices(mv.shape[:2])
+    dx = np.clip(mv[..., 0] + rx, 0, 2 * rx)
+    dy = np.clip(mv[..., 1] + ry, 0, 2 * ry)
+
+    return sse[dy, dx, iy, ix]
+
+################################################################################
+
+def per_mb(sse):
+    """
+    Return the sum over the four 8x8 partitions of every macroblock.
+    """
+    p_y, p_x = sse.shape[-2:]
+
+    return sse.reshape(sse.shape[:-2] + (p_y // 2, 2, p_x // 2, 2)).sum(
+        axis = (-3, -1))
+
+################################################################################
+
+def rate(mask, selection):
+    """
+    Return the fraction of mask that is set within selection, nan if empty.
+    """
+    return float(mask[selection].mean()) if selection.any() else float("nan")
+
+################################################################################
+
+def encoder_sse(records, sse_8x8, search):
+    """
+    Return the SSE in sse_8x8, as returned by full_search, of every 8x8
+    partition and 16x16 macroblock at the vectors of the encoder, and that of
+    every macroblock as partitioned by the encoder.
+    """
+    enc_16x16 = lookup(per_mb(sse_8x8), records["mv"][:, :, 0], search)
+    enc_8x8 = lookup(sse_8x8, partition_vectors(records), search)
+    split = records["partitions"].astype(bool)
+
+    return enc_8x8, enc_16x16, np.where(split, per_mb(enc_8x8), enc_16x16)
+
+################################################################################
+
+def sse_mismatch(records, sse_8x8, search):
+    """
+    Return the number of macroblocks of which the SSE stored by the encoder
+    differs from the one found in sse_8x8, ignoring unknown SSEs.
+    """
+    enc = encoder_sse(records, sse_8x8, search)[2]
+    known = records["sse"] != UNKNOWN_SSE
+
+    return int((enc[known] != records["sse"][known]).sum())
+
+################################################################################
+
+def analyse(records, sse_8x8, search, cost = PARTITION_COST):
+    """
+    Compare a frame of encoder records against the exhaustive search results
+    sse_8x8 of full_search and return a row of FIELDS. A vector is counted as
+    a mismatch if its SSE exceeds the minimum, such that equally good vectors
+    are not. Both the encoder and the exhaustive search partition a macroblock
+    if that lowers its SSE by more than cost. The SSE gap is the relative
+    excess SSE of the encoder.
+    """
+    sse_16x16 = per_mb(sse_8x8)
+
+    enc_8x8, enc_16x16, enc_mb = encoder_sse(records, sse_8x8, search)
+    best_16x16 = sse_16x16.min(axis = (0, 1))
+    best_8x8 = sse_8x8.min(axis = (0, 1))
+
+    split = records["partitions"].astype(bool)
+    split_8x8 = split.repeat(2, 0).repeat(2, 1)
+    full_split = per_mb(best_8x8) + cost < best_16x16
+
+    sse_encoder = int(enc_mb.sum())
+    sse_full = int(np.where(full_split, per_mb(best_8x8), best_16x16).sum())
+
+    return {"mb_mismatch" : rate(enc_16x16 > best_16x16, ~split),
+            "part_mismatch" : rate(enc_8x8 > best_8x8, split_8x8),
+            "enc_partitioned" : float(split.mean()),
+            "full_partitioned" : float(full_split.mean()),
+            "sse_encoder" : sse_encoder, "sse_full" : sse_full,
+            "sse_gap" : sse_encoder / sse_full - 1 if sse_full else 0.0}
+
+################################################################################
+
+def main():
+    parser = argparse.ArgumentParser(description = "Compare the encoder "
+                                     "motion vectors against an exhaustive "
+                                     "search.")
+    parser.add_argument("vectors", help = "binary motion vector file")
+    parser.add_argument("sequence", help = "YUV420p file given to the Encoder")
+    parser.add_argument("--reference", required = True,
+                        help = "YUV420p file reconstructed by the Encoder "
+                        "(its reconfile) or decoded from its output, whose "
+                        "frames it searched")
+    parser.add_argument("--interval", type = int, default = None,
+                        help = "I-interval of the Encoder, taken from the "
+                        "vectors if stored there, 2 otherwise")
+    parser.add_argument("--cost", type = int, default = PARTITION_COST,
+                        help = "partitioning cost factor")
+    parser.add_argument("--csv", default = None,
+                        help = "write the results per frame here")
+    args = parser.parse_args()
+
+    try:
+        header, records = load(args.vectors)
+        size = (header["width"], header["height"])
+        seq = YUVReader(args.sequence, *size)
+        ref = YUVReader(args.reference, *size)
+    except (OSError, ValueError) as e:
+        print(f"ERROR : {e}!")
+        sys.exit(1)
+
+    # Every frame that is not an I-frame is motion compensated against the
+    # frame before it, in the order of the records.
+    interval = args.interval or i_interval(header)
+    p_frames = [n for n in range(min(len(seq), len(ref))) if n % interval]
+    search = (header["search_x"], header["search_y"])
+    rows = []
+
+    for n, frame in zip(p_frames, records):
+        sse = full_search(seq.planes(n)[0], ref.planes(n - 1)[0], search)
+
+        # The exhaustive search only applies if it reproduces the encoder.
+        mismatch = sse_mismatch(frame, sse, search)
+        if mismatch:
+            print(f"ERROR : Frame {n} : the SSE of {mismatch} macroblocks "
+                  f"differs from the encoder (wrong reference or "
+                  f"I-interval)!")
+            sys.exit(1)
+
+        row = dict(frame = n, **analyse(frame, sse, search, args.cost))
+        rows.append(row)
+        print(f"INFO : Frame {n} : {100 * row['mb_mismatch']:.1f} % of the "
+              f"macroblocks and {100 * row['part_mismatch']:.1f} % of the "
+              f"partitions suboptimal, SSE {100 * row['sse_gap']:+.2f} %!")
+
+    if not rows:
+        print("ERROR : No motion compensated frames to analyse!")
+        sys.exit(1)
+
+    sse_encoder = sum(row["sse_encoder"] for row in rows)
+    sse_full = sum(row["sse_full"] for row in rows)
+    gap = sse_encoder / sse_full - 1 if sse_full else 0.0
+    print(f"INFO : {len(rows)} frames, SSE of the fast search "
+          f"{100 * gap:+.2f} % with respect to the exhaustive search!")
+
+    if args.csv:
+        with open(args.csv, "w", newline = "") as f:
+            writer = csv.DictWriter(f, fieldnames = FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+
+################################################################################
+
+################################################################################
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+File name:  MVExport.py
+Author:     Gerbrand De Laender, Damon Verbeyst
+Date:       17/10/2026
+Email:      gerbrand.delaender@ugent.be, damon.verbeyst@ugent.be
+Brief:      E017920A, Assignment, motion vector export
+About:      Headless export of the motion vector visualisation of a whole
+            sequence, as numbered PNG files or as a single video (through
+            ffmpeg). The frames are rendered with the Agg backend by a pool of
+            processes, each of which memory-maps the vectors and the sequence
+            itself, such that no frame data passes between processes for PNGs.
+"""
+
+################################################################################
+################################################################################
+
+import os, sys, glob, time, shutil, argparse, subprocess, multiprocessing
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.image import imread, imsave
+from MVFormat import load, i_interval, frame_vectors
+from YUVReader import YUVReader
+
+################################################################################
+################################################################################
+
+VIDEO_EXTENSIONS = (".mp4", ".mkv", ".avi", ".mov")
+
+################################################################################
+################################################################################
+
+class OverlayRenderer():
+
+    ############################################################################
+
+    def __init__(self, vectors, sequence, frames, interval, scale):
+        """
+        An OverlayRenderer object draws the motion vectors of the file vectors
+        on top of the frames of sequence, a YUV420p file, or of the frameNNN.png
+        files in the directory frames. The vectors belong to the P-frames
+        of a sequence encoded with I-interval interval, the one stored with
+        the vectors if None. The output is scale times the size of the
+        frames.
+        """
+        self.header, self.records = load(vectors)
+        self.interval = interval or i_interval(self.header)
+        width, height = self.header["width"], self.header["height"]
+
+        if sequence:
+            self.reader = YUVReader(sequence, width, height)
+            self.n_frames = len(self.reader)
+        else:
+            self.reader = None
+            self.frames = frames
+            self.n_frames = len(glob.glob(os.path.join(frames, "frame*.png")))
+
+        # The figure covers the frame exactly, in pixels of the output.
+        self.fig = Figure(figsize = (scale * width / 100, scale * height / 100),
+                          dpi = 100)
+        self.canvas = FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_axes([0, 0, 1, 1])
+        self.ax.axis("off")
+
+        x_dim, y_dim = self.header["mb_x"], self.header["mb_y"]
+        X, Y = np.meshgrid(np.arange(0.5, x_dim + 0.5, 1),
+                           np.arange(y_dim - 0.5, -0.5, -1))
+        X_8x8, Y_8x8 = np.meshgrid(np.arange(0.25, x_dim, 0.5),
+                                   np.arange(y_dim - 0.25, 0, -0.5))
+
+        # The artists are created once and updated in place.
+        U, V, U_8x8, V_8x8 = self.vectors(0)
+        self.image = self.ax.imshow(self.frame(0),
+                                    extent = [0, x_dim, 0, y_dim])
+        self.quiver = self.ax.quiver(X, Y, U, V, units = "xy", scale = 10,
+                                     color = "red")
+        self.quiver_8x8 = self.ax.quiver(X_8x8, Y_8x8, U_8x8, V_8x8,
+                                         units = "xy", scale = 10,
+                                         color = "yellow")
+        self.ax.set_xlim(0, x_dim)
+        self.ax.set_ylim(0, y_dim)
+
+    ############################################################################
+
+    def frame(self, n):
+        """
+        Return frame n as an RGB array.
+        """
+        if self.reader: return self.reader.rgb(n)
+
+        return imread(os.path.join(self.frames, f"frame{n + 1:03}.png"))
+
+    ############################################################################
+
+    def vectors(self, n):
+        """
+        Return the vectors shown on frame n, scaled as in the MVVisualiser,
+        none on I-frames.
+        """
+        return [10 / 16 * mv for mv in frame_vectors(self.records, n,
+                                                      self.interval)]
+
+    ############################################################################
+
+    def render(self, n):
+        """
+        Render frame n and return the RGB array of the output.
+        """
+        U, V, U_8x8, V_8x8 = self.vectors(n)
+        self.image.set_data(self.frame(n))
+        self.quiver.set_UVC(U, V)
+        self.quiver_8x8.set_UVC(U_8x8, V_8x8)
+        self.canvas.draw()
+
+        return np.asarray(self.canvas.buffer_rgba())[..., :3]
+
+################################################################################
+################################################################################
+
+# Renderer of the current worker process, see init_worker.
+renderer = None
+
+################################################################################
+
+def init_worker(*args):
+    """
+    Create the renderer of a worker process, which maps the inputs once.
+    """
+    global renderer
+    renderer = OverlayRenderer(*args)
+
+################################################################################
+
+def export_png(job):
+    """
+    Render frame n and store it in directory, return n.
+    """
+    n, directory = job
+    imsave(os.path.join(directory, f"frame{n + 1:03}.png"), renderer.render(n))
+
+    return n
+
+################################################################################
+
+def export_raw(n):
+    """
+    Render frame n and return its RGB bytes.
+    """
+    return renderer.render(n).tobytes()
+
+################################################################################
+
+def main():
+    parser = argparse.ArgumentParser(description = "Export the motion vector "
+                                     "visualisation of a sequence.")
+    parser.add_argument("vectors", help = "binary motion vector file")
+    parser.add_argument("output", help = "directory of the PNG files, or a "
+                        f"video file ({', '.join(VIDEO_EXTENSIONS)})")
+    source = parser.add_mutually_exclusive_group(required = True)
+    source.add_argument("--sequence", help = "raw YUV420p file")
+    source.add_argument("--frames", help = "directory of frameNNN.png files")
+    parser.add_argument("--interval", type = int, default = None,
+                        help = "I-interval of the Encoder, taken from the "
+                        "vectors if stored there, 2 otherwise")
+    parser.add_argument("--scale", type = int, default = 2,
+                        help = "output size relative to the frames")
+    parser.add_argument("--fps", type = int, default = 30,
+                        help = "frame rate of the video")
+    parser.add_argument("--workers", type = int, default = os.cpu_count())
+    args = parser.parse_args()
+
+    video = args.output.lower().endswith(VIDEO_EXTENSIONS)
+    if video and not shutil.which("ffmpeg"):
+        print("ERROR : ffmpeg is required to export a video!")
+        sys.exit(1)
+
+    # The inputs are checked, and the output size taken, from a renderer in
+    # this process.
+    init = (args.vectors, args.sequence, args.frames, args.interval,
+            args.scale)
+    try:
+        probe = OverlayRenderer(*init)
+    except (OSError, ValueError) as e:
+        print(f"ERROR : {e}!")
+        sys.exit(1)
+    n_frames = probe.n_frames
+    height, width, _ = probe.render(0).shape
+
+    ctx = multiprocessing.get_context("spawn")
+    t_start = time.perf_counter()
+
+    with ctx.Pool(args.workers, init_worker, init) as pool:
+        if not video:
+            os.makedirs(args.output, exist_ok = True)
+            jobs = [(n, args.output) for n in range(n_frames)]
+            for _ in pool.imap_unordered(export_png, jobs, chunksize = 4):
+                pass
+        else:
+            ffmpeg = subprocess.Popen(["ffmpeg", "-y", "-loglevel", "error",
+                                       "-f", "rawvideo", "-pix_fmt", "rgb24",
+                                       "-video_size", f"{width}x{height}",
+                                       "-framerate", str(args.fps), "-i", "-",
+                                       "-pix_fmt", "yuv420p", args.output],
+                                      stdin = subprocess.PIPE)
+            # Frames are returned in order, while rendered in parallel.
+            for data in pool.imap(export_raw, range(n_frames), chunksize = 4):
+                ffmpeg.stdin.write(data)
+            ffmpeg.stdin.close()
+            if ffmpeg.wait():
+                print("ERROR : ffmpeg failed to write the video!")
+                sys.exit(1)
+
+    wall = time.perf_counter() - t_start
+    print(f"INFO : {n_frames} frames exported to {args.output} in "
+          f"{wall:.1f} s ({n_frames / wall:.1f} fps, {args.workers} "
+          f"workers)!")
+
+################################################################################
+
+################################################################################
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+File name:  MVFormat.py
+Author:     Gerbrand De Laender, Damon Verbeyst
+Date:       17/10/2026
+Email:      gerbrand.delaender@ugent.be, damon.verbeyst@ugent.be
+Brief:      E017920A, Assignment, motion vector file format
+About:      Binary motion vector format written by the MotionCompensator
+            (MV_TO_BIN in Config.h). A 32 byte header is followed by a 24 byte
+            record per macroblock, frame by frame and row by row, holding the
+            partition flag, the four 8x8 motion vectors and the SSE of the
+            match. Files are memory-mapped, so long sequences load instantly.
+            Run as a script, the older CSV files are converted.
+"""
+
+################################################################################
+################################################################################
+
+import os, sys, glob, argparse
+import numpy as np
+
+################################################################################
+################################################################################
+
+MAGIC = b"DMMV"
+VERSION = 1
+
+# Only P-frames hold motion vectors, so n_frames counts the P-frames of the
+# sequence. Frame n of the sequence is a P-frame if n % interval, where an
+# interval of 0 is unknown (e.g. converted from CSV).
+HEADER = np.dtype([("magic", "S4"), ("version", "<u2"), ("mb_size", "<u2"),
+                   ("width", "<u2"), ("height", "<u2"), ("mb_x", "<u2"),
+                   ("mb_y", "<u2"), ("n_frames", "<u4"), ("search_x", "<u2"),
+                   ("search_y", "<u2"), ("interval", "<u2"),
+                   ("reserved", "u1", 6)])
+
+# Partitions are numbered [0|1] over [2|3], mv holds (dx, dy) per partition.
+RECORD = np.dtype([("partitions", "u1"), ("reserved", "u1", 3),
+                   ("mv", "<i2", (4, 2)), ("sse", "<u4")])
+
+UNKNOWN_SSE = 0xFFFFFFFF # Cost of records converted from CSV.
+
+################################################################################
+
+def load(location):
+    """
+    Memory-map a motion vector file and return its header, as a dictionary,
+    and its records, as a read-only array of shape (n_frames, mb_y, mb_x).
+    Raises ValueError if the file is not a valid motion vector file.
+    """
+    header = np.fromfile(location, dtype = HEADER, count = 1)
+    if len(header) == 0 or header["magic"][0] != MAGIC:
+        raise ValueError(f"{location} is not a motion vector file")
+
+    header = {name : header[name][0].item() for name in HEADER.names
+              if name not in ("magic", "reserved")}
+    if header["version"] != VERSION:
+        raise ValueError(f"{location} has unsupported version "
+                         f"{header['version']}")
+
+    shape = (header["n_frames"], header["mb_y"], header["mb_x"])
+    size = HEADER.itemsize + RECORD.itemsize * int(np.prod(shape))
+    if os.path.getsize(location) < size:
+        raise ValueError(f"{location} is truncated")
+
+    if not header["n_frames"]:
+        return header, np.zeros(shape, dtype = RECORD)
+
+    return header, np.memmap(location, dtype = RECORD, mode = "r",
+                             offset = HEADER.itemsize, shape = shape)
+
+################################################################################
+
+def save(location, records, width, height, search = (32, 32), interval = 0):
+    """
+    Write records, of shape (n_frames, mb_y, mb_x), to a motion vector file
+    for frames of width by height pixels, encoded with I-interval interval
+    (0 if unknown).
+    """
+    n_frames, mb_y, mb_x = records.shape
+
+    header = np.zeros(1, dtype = HEADER)
+    for name, value in zip(HEADER.names, (MAGIC, VERSION, 16, width, height,
+                                          mb_x, mb_y, n_frames, search[0],
+                                          search[1], interval)):
+        header[name] = value
+
+    with open(location, "wb") as f:
+        header.tofile(f)
+        np.ascontiguousarray(records, dtype = RECORD).tofile(f)
+
+################################################################################
+
+def from_csv(location, width, height):
+    """
+    Read a CSV file of "dx, dy" rows, one per macroblock, and return its
+    records. The CSV holds no partitions nor costs, so every partition gets
+    the vector of its macroblock and the cost is UNKNOWN_SSE.
+    """
+    mb_x, mb_y = width // 16, height // 16
+    data = np.loadtxt(location, delimiter = ",", dtype = np.int16, ndmin = 2)
+
+    if len(data) % (mb_x * mb_y):
+        raise ValueError(f"{location} does not hold whole frames of "
+                         f"{mb_x}x{mb_y} macroblocks")
+
+    records = np.zeros((len(data) // (mb_x * mb_y), mb_y, mb_x),
+                       dtype = RECORD)
+    records["mv"] = data.reshape(records.shape + (1, 2))
+    records["sse"] = UNKNOWN_SSE
+
+    return records
+
+################################################################################
+
+def i_interval(header, default = 2):
+    """
+    Return the I-interval stored in header, or default if it is unknown.
+    """
+    return header["interval"] or default
+
+################################################################################
+
+def partition_vectors(records):
+    """
+    Return the motion vectors of records per 8x8 partition, as an array of
+    shape (..., 2 * mb_y, 2 * mb_x, 2).
+    """
+    mv = records["mv"].reshape(records.shape + (2, 2, 2))
+    mv = np.moveaxis(mv, -3, -4)
+
+    return mv.reshape(mv.shape[:-5] + (2 * mv.shape[-5], 2 * mv.shape[-3], 2))
+
+################################################################################
+
+def split_vectors(records):
+    """
+    Return the motion vectors of a frame of records as masked (dx, dy) arrays,
+    for the macroblocks (of shape (mb_y, mb_x)) and for the 8x8 partitions (of
+    shape (2 * mb_y, 2 * mb_x)). Partitioned macroblocks are masked in the
+    former, the partitions of the other macroblocks in the latter.
+    """
+    split = records["partitions"].astype(bool)
+    split_8x8 = split.repeat(2, 0).repeat(2, 1)
+    mv = records["mv"][:, :, 0]
+    mv_8x8 = partition_vectors(records)
+
+    return (np.ma.masked_where(split, mv[..., 0]),
+            np.ma.masked_where(split, mv[..., 1]),
+            np.ma.masked_where(~split_8x8, mv_8x8[..., 0]),
+            np.ma.masked_where(~split_8x8, mv_8x8[..., 1]))
+
+################################################################################
+
+def record_index(n, interval):
+    """
+    Return the index in the records of frame n of a sequence encoded with
+    I-interval interval, or None if frame n is an I-frame.
+    """
+    return n - n // interval - 1 if n % interval else None
+
+################################################################################
+
+def frame_vectors(records, n, interval):
+    """
+    Return the motion vectors of frame n as split_vectors does, entirely
+    masked if frame n is an I-frame or has no records.
+    """
+    k = record_index(n, interval)
+    if k is not None and k < len(records): return split_vectors(records[k])
+
+    mb_y, mb_x = records.shape[1:]
+    return [np.ma.masked_all(shape) for shape in ((mb_y, mb_x),) * 2 +
+            ((2 * mb_y, 2 * mb_x),) * 2]
+
+################################################################################
+
+def main():
+    parser = argparse.ArgumentParser(description = "Convert CSV motion vector "
+                                     "files to the binary format.")
+    parser.add_argument("csv", nargs = "+",
+                        help = "CSV file(s), wildcards are expanded")
+    parser.add_argument("--width", type = int, default = 352)
+    parser.add_argument("--height", type = int, default = 288)
+    parser.add_argument("--interval", type = int, default = 0,
+                        help = "I-interval of the Encoder, 0 if unknown")
+    args = parser.parse_args()
+
+    locations = [match for pattern in args.csv
+                 for match in sorted(glob.glob(pattern)) or [pattern]]
+
+    for location in locations:
+        output = os.path.splitext(location)[0] + ".mv"
+        try:
+            records = from_csv(location, args.width, args.height)
+        except (OSError, ValueError) as e:
+            print(f"ERROR : {e}!")
+            sys.exit(1)
+
+        save(output, records, args.width, args.height,
+             interval = args.interval)
+        print(f"INFO : {location} : {len(records)} frames written to "
+              f"{output}!")
+
+################################################################################
+
+################################################################################
+if __name__ == "__main__":
+    main()
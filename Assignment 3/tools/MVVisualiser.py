@@ -4,43 +4,159 @@ Author:     Gerbrand De Laender
 Date:       23/04/2020
 Email:      gerbrand.delaender@ugent.be
 Brief:      E017920A, Assignment, motion vector visualisation
-About:      Script that visualises a series of motion vectors, stored as a CSV
-            file on top of their respective frames. A slider allows to change
-            the current frame and their motion vectors.
+About:      Script that visualises a series of motion vectors, stored in the
+            binary format of MVFormat.py, on top of their respective frames,
+            read from a raw YUV420p file or from extracted PNG files.
+            Partitioned macroblocks show the vectors of their four 8x8
+            partitions. A slider allows to change the current frame and their
+            motion vectors, the play button (or space) plays the sequence at
+            the target frame rate. The frame and vectors are updated in place
+            and blitted. Frames are cached and prefetched around the slider,
+            the hit rate and time per slider step are reported on closing.
 """
 
 ################################################################################
 ################################################################################
 
+import time, collections
 import matplotlib.pyplot as plt
 import numpy as np
-from matplotlib.widgets import Slider
+from matplotlib.widgets import Slider, Button
+from MVFormat import load, i_interval, frame_vectors
+from FrameCache import FrameCache
+from YUVReader import YUVReader
 
 ################################################################################
 ################################################################################
 
+def vectors(n):
+   # Only the P-frames have vectors, none are shown on I-frames.
+   return [10 / 16 * mv for mv in frame_vectors(records, int(n), interval)]
+
+################################################################################
+
 def update_frame(n):
-   ax_1.clear()
-   U = 10 / 16 * data[dim * int(n / i_interval) : dim * (int(n / i_interval) + 1), 0]
-   V = 10 / 16 * data[dim * int(n / i_interval) : dim * (int(n / i_interval) + 1), 1]
-   frame = plt.imread(f"{directory}frame{int(n + 1):03}.png")
-   ax_1.imshow(frame, extent = [0, x_dim, 0, y_dim])
-   ax_1.quiver(X, Y, U, V, units = "xy", scale = 10, color = "red")
+   t_start = time.perf_counter()
+   U, V, U_8x8, V_8x8 = vectors(n)
+   image.set_data(cache.get(int(n)))
+   quiver.set_UVC(U, V)
+   quiver_8x8.set_UVC(U_8x8, V_8x8)
+   blit()
+   steps.append(time.perf_counter() - t_start)
+
+################################################################################
+
+def blit():
+   # Only the animated artists and the slider are redrawn on top of the
+   # background, which is captured after every full draw.
+   if background is None: return
+   fig.canvas.restore_region(background)
+   for artist in artists: ax_1.draw_artist(artist)
+   ax_2.redraw_in_frame()
+   fig.canvas.blit(fig.bbox)
+   fig.canvas.flush_events()
+
+################################################################################
+
+def on_draw(event):
+   global background
+   background = fig.canvas.copy_from_bbox(fig.bbox)
+   for artist in artists: ax_1.draw_artist(artist)
+
+################################################################################
+
+def toggle_play(event = None):
+   global playing
+   playing = not playing
+   button.label.set_text("Pause" if playing else "Play")
+   ticks.clear()
+   fps_text.set_text("")
+   if playing: timer.start()
+   else: timer.stop()
+   fig.canvas.draw_idle()
+
+################################################################################
+
+def on_key(event):
+   if event.key == " ": toggle_play()
+
+################################################################################
+
+def on_tick():
+   ticks.append(time.perf_counter())
+   if len(ticks) > 1:
+      fps = (len(ticks) - 1) / (ticks[-1] - ticks[0])
+      fps_text.set_text(f"{fps:.1f} / {target_fps} fps")
+   slider.set_val((int(slider.val) + 1) % n_frames)
+
+################################################################################
+
+def report(event):
+   step = 1000 * np.median(steps) if steps else float("nan")
+   print(f"INFO : Frame cache hit rate {100 * cache.hit_rate():.1f} %, "
+         f"{len(cache.frames)} frames cached, {step:.1f} ms per slider step "
+         f"(median of {len(steps)})!")
 
 ################################################################################
 
 directory = "xxx\\data\\foreman_50\\"
-n_frames, i_interval = 50, 2
-x_dim, y_dim, dim = 22, 18, 22 * 18
+sequence = None # Raw YUV420p file, e.g. the Encoder input, instead of PNGs.
+n_frames, interval = 50, None # I-interval, taken from the vectors if None.
+cache_budget, prefetch = 256 * 1024 ** 2, 8 # Bytes, frames on either side.
+target_fps = 25 # Playback frame rate.
+
+# Vectors of the MotionCompensator (MV_TO_BIN), or converted from the older
+# CSV files using MVFormat.py.
+header, records = load(f"{directory}vectors.mv")
+interval = interval or i_interval(header)
+x_dim, y_dim = header["mb_x"], header["mb_y"]
 
 X, Y = np.meshgrid(np.arange(0.5, x_dim + 0.5, 1), np.arange(y_dim - 0.5, -0.5, -1))
-data = np.genfromtxt(f"{directory}vectors.csv", delimiter = ',')
+X_8x8, Y_8x8 = np.meshgrid(np.arange(0.25, x_dim, 0.5), np.arange(y_dim - 0.25, 0, -0.5))
+
+# Frames are read from the memory-mapped sequence, of the size stored with
+# the vectors, or from the frameNNN.png files extracted by ffmpeg.
+if sequence:
+   reader = YUVReader(sequence, header["width"], header["height"])
+   n_frames, load_frame = len(reader), reader.rgb
+else:
+   load_frame = lambda n: plt.imread(f"{directory}frame{n + 1:03}.png")
+
+# Every frame is decoded once, the frames around the slider are prefetched.
+cache = FrameCache(load_frame, n_frames, cache_budget, prefetch)
+steps = []
+
+fig = plt.figure()
+ax_1 = fig.add_subplot(111)
+ax_2 = plt.axes([0.25, 0.01, 0.65, 0.03])
+ax_3 = plt.axes([0.05, 0.005, 0.1, 0.04])
 
-ax_1 = plt.figure().add_subplot(111)
-ax_2 = plt.axes([0.1, 0.01, 0.8, 0.03])
-slider = Slider(ax_2, "Frame", 0, n_frames - 1, 0, valstep = 1)
+# The artists are created once and updated in place.
+U, V, U_8x8, V_8x8 = vectors(0)
+image = ax_1.imshow(cache.get(0), extent = [0, x_dim, 0, y_dim], animated = True)
+quiver = ax_1.quiver(X, Y, U, V, units = "xy", scale = 10, color = "red",
+                     animated = True)
+quiver_8x8 = ax_1.quiver(X_8x8, Y_8x8, U_8x8, V_8x8, units = "xy", scale = 10,
+                         color = "yellow", animated = True)
+fps_text = ax_1.text(0.99, 0.99, "", transform = ax_1.transAxes, ha = "right",
+                     va = "top", color = "white", animated = True)
+artists = (image, quiver, quiver_8x8, fps_text)
+background = None
+
+slider = Slider(ax_2, "Frame", 0, n_frames - 1, valinit = 0, valstep = 1)
+slider.drawon = False # Blitted in update_frame instead of a full redraw.
 slider.on_changed(update_frame)
-update_frame(0)
+
+playing = False
+ticks = collections.deque(maxlen = target_fps) # Times of the last frames.
+button = Button(ax_3, "Play")
+button.on_clicked(toggle_play)
+timer = fig.canvas.new_timer(interval = int(1000 / target_fps))
+timer.add_callback(on_tick)
+
+fig.canvas.mpl_connect("draw_event", on_draw)
+fig.canvas.mpl_connect("key_press_event", on_key)
+fig.canvas.mpl_connect("close_event", report)
 
 plt.show()
 
@@ -0,0 +1,185 @@
+"""
+File name:  Quality.py
+Author:     Gerbrand De Laender, Damon Verbeyst
+Date:       17/10/2026
+Email:      gerbrand.delaender@ugent.be, damon.verbeyst@ugent.be
+Brief:      E017920A, Assignment, objective quality
+About:      PSNR and SSIM of the Y, U and V planes of a YUV420p sequence with
+            respect to a reference, per frame and on average. Both sequences
+            are memory-mapped and processed in batches of frames, such that
+            the memory use does not grow with the length of the sequences.
+            Batches may be spread over several processes.
+"""
+
+################################################################################
+################################################################################
+
+import os, sys, csv, argparse, multiprocessing
+import numpy as np
+from YUVReader import YUVReader
+
+################################################################################
+################################################################################
+
+PLANES = ("y", "u", "v")
+FIELDS = ("frame", *(f"{p}_psnr" for p in PLANES),
+          *(f"{p}_ssim" for p in PLANES))
+
+SSIM_WINDOW = 8 # Size of the sliding SSIM window, in samples.
+
+################################################################################
+
+def psnr(ref, img):
+    """
+    Return the PSNR in dB of every frame of img with respect to ref, both of
+    shape (frames, height, width), inf for identical frames.
+    """
+    diff = ref.astype(np.int32) - img.astype(np.int32)
+    mse = np.mean(diff * diff, axis = (1, 2))
+
+    with np.errstate(divide = "ignore"):
+        return 10 * np.log10(255 ** 2 / mse)
+
+################################################################################
+
+def box_mean(x, size):
+    """
+    Return the mean of x over every size by size window of its last two axes,
+    using an integral image.
+    """
+    s = np.pad(x, ((0, 0), (1, 0), (1, 0))).cumsum(1).cumsum(2)
+
+    return (s[:, size:, size:] - s[:, :-size, size:] - s[:, size:, :-size] +
+            s[:, :-size, :-size]) / size ** 2
+
+################################################################################
+
+def ssim(ref, img, size = SSIM_WINDOW):
+    """
+    Return the mean SSIM of every frame of img with respect to ref, both of
+    shape (frames, height, width), over sliding size by size windows.
+    """
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    x, y = ref.astype(np.float64), img.astype(np.float64)
+
+    mx, my = box_mean(x, size), box_mean(y, size)
+    vx = box_mean(x * x, size) - mx * mx
+    vy = box_mean(y * y, size) - my * my
+    cxy = box_mean(x * y, size) - mx * my
+
+    s = ((2 * mx * my + c1) * (2 * cxy + c2)) / \
+        ((mx * mx + my * my + c1) * (vx + vy + c2))
+
+    return s.mean(axis = (1, 2))
+
+################################################################################
+
+# Sequences of the current worker process, see init_worker.
+readers = None
+
+################################################################################
+
+def init_worker(reference, distorted, width, height):
+    """
+    Memory-map both sequences once per worker process.
+    """
+    global readers
+    readers = (YUVReader(reference, width, height),
+               YUVReader(distorted, width, height))
+
+################################################################################
+
+def measure_batch(batch):
+    """
+    Return the rows of the frames start to stop, given as batch.
+    """
+    start, stop = batch
+    ref, img = (reader.planes(slice(start, stop)) for reader in readers)
+
+    scores = [psnr(r, i) for r, i in zip(ref, img)]
+    scores += [ssim(r, i) for r, i in zip(ref, img)]
+
+    return [dict(zip(FIELDS, (n, *(float(score[k]) for score in scores))))
+            for k, n in enumerate(range(start, stop))]
+
+################################################################################
+
+def average(rows):
+    """
+    Return the average row over rows. Frames with an infinite PSNR (identical
+    frames) are left out of the average PSNR, unless all frames are.
+    """
+    mean = {"frame" : "mean"}
+
+    for field in FIELDS[1:]:
+        values = np.array([row[field] for row in rows])
+        finite = values[np.isfinite(values)]
+        mean[field] = float(finite.mean()) if len(finite) else \
+                      float(values.mean())
+
+    return mean
+
+################################################################################
+
+def compare(reference, distorted, width, height, batch = 16, workers = 1):
+    """
+    Compare the frames that both sequences hold, in batches of frames, and
+    return the row of every frame. Batches are spread over workers processes.
+    """
+    n_frames = min(len(YUVReader(reference, width, height)),
+                   len(YUVReader(distorted, width, height)))
+    batches = [(start, min(start + batch, n_frames))
+               for start in range(0, n_frames, batch)]
+    args = (reference, distorted, width, height)
+
+    if workers <= 1:
+        init_worker(*args)
+        return [row for b in batches for row in measure_batch(b)]
+
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(workers, init_worker, args) as pool:
+        return [row for rows in pool.imap(measure_batch, batches)
+                for row in rows]
+
+################################################################################
+
+def main():
+    parser = argparse.ArgumentParser(description = "PSNR and SSIM of a "
+                                     "YUV420p sequence.")
+    parser.add_argument("reference", help = "uncompressed YUV420p file")
+    parser.add_argument("distorted", help = "e.g. the decoded YUV420p file")
+    parser.add_argument("--width", type = int, default = 352)
+    parser.add_argument("--height", type = int, default = 288)
+    parser.add_argument("--batch", type = int, default = 16,
+                        help = "frames processed at once")
+    parser.add_argument("--workers", type = int, default = 1,
+                        help = "number of processes, 0 for the core count")
+    parser.add_argument("--csv", default = None,
+                        help = "write the per-frame and average scores here")
+    args = parser.parse_args()
+
+    try:
+        rows = compare(args.reference, args.distorted, args.width, args.height,
+                       max(args.batch, 1), args.workers or os.cpu_count())
+    except (OSError, ValueError) as e:
+        print(f"ERROR : {e}!")
+        sys.exit(1)
+
+    mean = average(rows)
+    print(f"INFO : {len(rows)} frames, PSNR (dB) " +
+          ", ".join(f"{p.upper()} {mean[f'{p}_psnr']:.2f}" for p in PLANES) +
+          ", SSIM " +
+          ", ".join(f"{p.upper()} {mean[f'{p}_ssim']:.4f}" for p in PLANES) +
+          "!")
+
+    if args.csv:
+        with open(args.csv, "w", newline = "") as f:
+            writer = csv.DictWriter(f, fieldnames = FIELDS)
+            writer.writeheader()
+            writer.writerows(rows + [mean])
+
+################################################################################
+
+################################################################################
+if __name__ == "__main__":
+    main()
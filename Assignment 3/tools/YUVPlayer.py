@@ -0,0 +1,292 @@
+"""
+File name:  YUVPlayer.py
+Author:     Gerbrand De Laender, Damon Verbeyst
+Date:       17/10/2026
+Email:      gerbrand.delaender@ugent.be, damon.verbeyst@ugent.be
+Brief:      E017920A, Assignment, raw video player
+About:      Cross-platform player of raw YUV420p files, built on the same
+            matplotlib widgets as the MVVisualiser. The sequences are
+            memory-mapped and every displayed frame is converted to RGB into
+            a preallocated buffer (YUVReader.py). Given a decoded sequence as
+            well, the original is shown side by side with either the decoded
+            frame or the luma difference of both. Playback follows the wall
+            clock, dropping frames that cannot be shown in time, and the
+            achieved frame rate is shown and reported on closing.
+"""
+
+################################################################################
+################################################################################
+
+import sys, time, argparse, collections
+import numpy as np
+from YUVReader import YUVReader, to_rgb
+
+################################################################################
+################################################################################
+
+class YUVPlayer():
+
+    ############################################################################
+
+    def __init__(self, original, decoded = None, diff_range = 32):
+        """
+        A YUVPlayer object converts the frames of original, a YUVReader, and
+        those of decoded (optional, of the same size) into buffers that are
+        allocated once. The luma difference is clipped to +-diff_range.
+        """
+        self.original = original
+        self.decoded = decoded
+        self.diff_range = diff_range
+        self.n_frames = len(original) if decoded is None else \
+                        min(len(original), len(decoded))
+
+        h, w = original.height, original.width
+        self.rgb = np.empty((h, w, 3), dtype = np.uint8)
+        self.rgb_decoded = np.empty((h, w, 3), dtype = np.uint8)
+        self.diff = np.empty((h, w), dtype = np.int16)
+
+    ############################################################################
+
+    def convert(self, n, show_diff = False):
+        """
+        Convert frame n and return the luma PSNR in dB of the decoded frame,
+        None without decoded sequence. The decoded frame is only converted to
+        RGB if show_diff is not set.
+        """
+        y, u, v = self.original.planes(n)
+        to_rgb(y, u, v, out = self.rgb)
+        if self.decoded is None: return None
+
+        y_dec, u_dec, v_dec = self.decoded.planes(n)
+        np.subtract(y_dec, y, out = self.diff, dtype = np.int16)
+        if not show_diff: to_rgb(y_dec, u_dec, v_dec, out = self.rgb_decoded)
+
+        mse = np.mean(np.square(self.diff, dtype = np.int32))
+        return 10 * np.log10(255 ** 2 / mse) if mse else float("inf")
+
+    ############################################################################
+
+    def benchmark(self, show_diff = False):
+        """
+        Convert every frame once, as fast as possible, and return the
+        achieved frame rate.
+        """
+        t_start = time.perf_counter()
+        for n in range(self.n_frames): self.convert(n, show_diff)
+
+        return self.n_frames / (time.perf_counter() - t_start)
+
+    ############################################################################
+
+    def show(self, fps, show_diff = False):
+        """
+        Open the player window, playing at fps frames per second.
+        """
+        import matplotlib.pyplot as plt
+        from matplotlib.widgets import Slider, Button
+
+        self.fps = fps
+        self.show_diff = show_diff and self.decoded is not None
+        self.playing = False
+        self.current = 0
+        self.rendered, self.dropped = 0, 0
+        self.ticks = collections.deque(maxlen = fps) # Times of the last frames.
+        self.steps = []
+        self.background = None
+
+        panels = 2 if self.decoded is not None else 1
+        self.fig, axes = plt.subplots(1, panels, squeeze = False,
+                                      figsize = (5 * panels, 4.5))
+        axes = axes[0]
+        for ax in axes: ax.axis("off")
+        self.fig.subplots_adjust(left = 0.01, right = 0.99, top = 0.92,
+                                 bottom = 0.1, wspace = 0.02)
+        self.ax_slider = plt.axes([0.25, 0.01, 0.65, 0.03])
+        ax_button = plt.axes([0.05, 0.005, 0.1, 0.04])
+
+        # The artists are created once and updated in place.
+        psnr = self.convert(0, self.show_diff)
+        self.image = axes[0].imshow(self.rgb, animated = True)
+        self.artists = [self.image]
+        axes[0].set_title("Original")
+
+        if self.decoded is not None:
+            self.image_decoded = axes[1].imshow(self.rgb_decoded,
+                                                animated = True)
+            self.image_diff = axes[1].imshow(self.diff, cmap = "seismic",
+                                             vmin = -self.diff_range,
+                                             vmax = self.diff_range,
+                                             animated = True)
+            self.title = axes[1].set_title("", animated = True)
+            self.artists += [self.image_decoded, self.image_diff, self.title]
+            self.set_view()
+            self.set_psnr(psnr)
+
+        self.fps_text = axes[0].text(0.99, 0.99, "",
+                                     transform = axes[0].transAxes,
+                                     ha = "right", va = "top",
+                                     color = "white", animated = True)
+        self.artists.append(self.fps_text)
+
+        self.slider = Slider(self.ax_slider, "Frame", 0, self.n_frames - 1,
+                             valinit = 0, valstep = 1)
+        self.slider.drawon = False # Blitted in update_frame instead.
+        self.slider.on_changed(self.update_frame)
+
+        self.button = Button(ax_button, "Play")
+        self.button.on_clicked(self.toggle_play)
+
+        # The timer only wakes the player, the frame shown follows the clock.
+        self.timer = self.fig.canvas.new_timer(interval = int(1000 / fps))
+        self.timer.add_callback(self.on_tick)
+
+        self.fig.canvas.mpl_connect("draw_event", self.on_draw)
+        self.fig.canvas.mpl_connect("key_press_event", self.on_key)
+        self.fig.canvas.mpl_connect("close_event", self.report)
+
+        plt.show()
+
+    ############################################################################
+
+    def set_view(self):
+        """
+        Show either the decoded frame or the difference in the second panel.
+        """
+        self.image_decoded.set_visible(not self.show_diff)
+        self.image_diff.set_visible(self.show_diff)
+
+    ############################################################################
+
+    def set_psnr(self, psnr):
+        view = "Difference (Y)" if self.show_diff else "Decoded"
+        self.title.set_text(f"{view}, Y PSNR {psnr:.2f} dB")
+
+    ############################################################################
+
+    def update_frame(self, n):
+        t_start = time.perf_counter()
+        self.current = int(n)
+        psnr = self.convert(self.current, self.show_diff)
+
+        self.image.set_data(self.rgb)
+        if self.decoded is not None:
+            if self.show_diff: self.image_diff.set_data(self.diff)
+            else: self.image_decoded.set_data(self.rgb_decoded)
+            self.set_psnr(psnr)
+
+        self.blit()
+        self.steps.append(time.perf_counter() - t_start)
+
+    ############################################################################
+
+    def blit(self):
+        # Only the animated artists and the slider are redrawn on top of the
+        # background, which is captured after every full draw.
+        if self.background is None: return
+        canvas = self.fig.canvas
+        canvas.restore_region(self.background)
+        for artist in self.artists: artist.axes.draw_artist(artist)
+        self.ax_slider.redraw_in_frame()
+        canvas.blit(self.fig.bbox)
+        canvas.flush_events()
+
+    ############################################################################
+
+    def on_draw(self, event):
+        self.background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        for artist in self.artists: artist.axes.draw_artist(artist)
+
+    ############################################################################
+
+    def toggle_play(self, event = None):
+        self.playing = not self.playing
+        self.button.label.set_text("Pause" if self.playing else "Play")
+        self.ticks.clear()
+        self.fps_text.set_text("")
+
+        if self.playing:
+            self.t_play, self.n_play = time.perf_counter(), self.current
+            self.timer.start()
+        else: self.timer.stop()
+
+        self.fig.canvas.draw_idle()
+
+    ############################################################################
+
+    def on_key(self, event):
+        if event.key == " ": self.toggle_play()
+        elif event.key == "d" and self.decoded is not None:
+            self.show_diff = not self.show_diff
+            self.set_view()
+            self.update_frame(self.current)
+
+    ############################################################################
+
+    def on_tick(self):
+        # The frame due at this time, frames that could not be shown in time
+        # are dropped to keep up with the wall clock.
+        due = int((time.perf_counter() - self.t_play) * self.fps)
+        n = (self.n_play + due) % self.n_frames
+        if n == self.current: return
+
+        self.dropped += (n - self.current) % self.n_frames - 1
+        self.rendered += 1
+        self.ticks.append(time.perf_counter())
+        if len(self.ticks) > 1:
+            fps = (len(self.ticks) - 1) / (self.ticks[-1] - self.ticks[0])
+            self.fps_text.set_text(f"{fps:.1f} / {self.fps} fps")
+
+        self.slider.set_val(n)
+
+    ############################################################################
+
+    def report(self, event):
+        step = 1000 * np.median(self.steps) if self.steps else float("nan")
+        print(f"INFO : {self.rendered} frames played, {self.dropped} dropped, "
+              f"{step:.1f} ms per frame (median of {len(self.steps)})!")
+
+################################################################################
+################################################################################
+
+def main():
+    parser = argparse.ArgumentParser(description = "Play a YUV420p sequence.")
+    parser.add_argument("original", help = "uncompressed YUV420p file")
+    parser.add_argument("decoded", nargs = "?", default = None,
+                        help = "decoded YUV420p file, shown next to the "
+                        "original")
+    parser.add_argument("--width", type = int, default = 352)
+    parser.add_argument("--height", type = int, default = 288)
+    parser.add_argument("--fps", type = int, default = 30,
+                        help = "playback frame rate")
+    parser.add_argument("--diff", action = "store_true",
+                        help = "start with the difference view (key d)")
+    parser.add_argument("--diff-range", type = int, default = 32,
+                        help = "luma difference at full colour")
+    parser.add_argument("--benchmark", action = "store_true",
+                        help = "convert every frame without a window and "
+                        "report the frame rate")
+    args = parser.parse_args()
+
+    try:
+        original = YUVReader(args.original, args.width, args.height)
+        decoded = YUVReader(args.decoded, args.width, args.height) \
+                  if args.decoded else None
+    except (OSError, ValueError) as e:
+        print(f"ERROR : {e}!")
+        sys.exit(1)
+
+    player = YUVPlayer(original, decoded, args.diff_range)
+
+    if args.benchmark:
+        fps = player.benchmark(args.diff)
+        verdict = "keeps up with" if fps >= args.fps else "falls behind"
+        print(f"INFO : {player.n_frames} frames of {args.width}x{args.height} "
+              f"converted at {fps:.1f} fps, {verdict} {args.fps} fps!")
+    else:
+        player.show(max(args.fps, 1), args.diff)
+
+################################################################################
+
+################################################################################
+if __name__ == "__main__":
+    main()
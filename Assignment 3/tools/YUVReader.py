@@ -0,0 +1,111 @@
+"""
+File name:  YUVReader.py
+Author:     Gerbrand De Laender, Damon Verbeyst
+Date:       17/10/2026
+Email:      gerbrand.delaender@ugent.be, damon.verbeyst@ugent.be
+Brief:      E017920A, Assignment, raw video input
+About:      Reader of raw YUV420p files, as consumed by the Encoder. The file is
+            memory-mapped, so a frame is only read from disk once its planes
+            are accessed. Frames are converted to RGB (BT.601, limited range)
+            using vectorised NumPy, upsampling the chroma by broadcasting.
+"""
+
+################################################################################
+################################################################################
+
+import os
+import numpy as np
+
+################################################################################
+################################################################################
+
+# Contribution of Cb and Cr to R, G and B.
+COEFFICIENTS = ((0, 1.596), (-0.392, -0.813), (2.017, 0))
+
+################################################################################
+
+def to_rgb(y, u, v, out = None):
+    """
+    Convert the planes of a YUV420p frame to an RGB uint8 array of shape
+    (height, width, 3), written to out (contiguous) if given. Every chroma
+    sample is applied to the 2x2 luma samples it covers.
+    """
+    h, w = y.shape
+    if out is None: out = np.empty((h, w, 3), dtype = np.uint8)
+
+    # Luma as 2x2 blocks, over which the chroma is broadcast. Adding 0.5
+    # rounds when casting to uint8.
+    luma = 1.164 * (y.astype(np.float32) - 16) + 0.5
+    luma = luma.reshape(h // 2, 2, w // 2, 2)
+    cb = u.astype(np.float32) - 128
+    cr = v.astype(np.float32) - 128
+    rgb = out.reshape(h // 2, 2, w // 2, 2, 3)
+
+    for c, (k_cb, k_cr) in enumerate(COEFFICIENTS):
+        chroma = (k_cb * cb + k_cr * cr)[:, None, :, None]
+        rgb[..., c] = np.clip(luma + chroma, 0, 255)
+
+    return out
+
+################################################################################
+################################################################################
+
+class YUVReader():
+
+    ############################################################################
+
+    def __init__(self, location, width, height):
+        """
+        A YUVReader object memory-maps the YUV420p file at location, holding
+        frames of width by height pixels (both even). Raises ValueError if the
+        file does not hold a single frame.
+        """
+        if width % 2 or height % 2:
+            raise ValueError(f"YUV420p needs an even size, not "
+                             f"{width}x{height}")
+
+        self.location = location
+        self.width = width
+        self.height = height
+        self.frame_size = width * height * 3 // 2
+        self.n_frames = os.path.getsize(location) // self.frame_size
+
+        if not self.n_frames:
+            raise ValueError(f"{location} holds no {width}x{height} frame")
+
+        self.data = np.memmap(location, dtype = np.uint8, mode = "r",
+                              shape = (self.n_frames, self.frame_size))
+
+    ############################################################################
+
+    def __len__(self):
+        return self.n_frames
+
+    ############################################################################
+
+    def planes(self, n):
+        """
+        Return the Y, U and V planes of frame n as read-only views on the file.
+        If n is a slice, the planes of those frames are stacked along the
+        first axis.
+        """
+        w, h = self.width, self.height
+        frame = self.data[n]
+        lead = frame.shape[:-1]
+
+        y = frame[..., :w * h].reshape(lead + (h, w))
+        u = frame[..., w * h:w * h * 5 // 4].reshape(lead + (h // 2, w // 2))
+        v = frame[..., w * h * 5 // 4:].reshape(lead + (h // 2, w // 2))
+
+        return y, u, v
+
+    ############################################################################
+
+    def rgb(self, n, out = None):
+        """
+        Return frame n converted to RGB, written to out if given.
+        """
+        return to_rgb(*self.planes(n), out = out)
+
+################################################################################
+################################################################################